@@ -4,10 +4,18 @@ import pandas as pd
 from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 from PIL import Image
+import base64
 import io
 
 # Flask API base URL
 API_BASE_URL = "http://localhost:5000"
+# Rows requested for the comparison table and plot
+COMPARISON_MAX_POINTS = 500
+
+# Function to format a statistic the API reports as null when undefined
+# (e.g. the correlation of a constant series)
+def format_stat(value, spec):
+    return "undefined" if value is None else format(value, spec)
 
 # Function to fetch mutual funds list
 def get_mutual_funds():
@@ -19,6 +27,29 @@ def get_mutual_funds():
         st.error(f"Error fetching mutual funds: {e}")
         return []
 
+# Function to fetch the benchmark codes the API accepts and their names
+def get_benchmarks():
+    try:
+        response = requests.get(f"{API_BASE_URL}/api/benchmarks")
+        response.raise_for_status()
+        return response.json()["benchmarks"]
+    except requests.RequestException:
+        return {"NIFTY50": "Nifty 50"}
+
+# Function to fetch the AUM quarters AMFI currently publishes
+def get_aum_quarters():
+    try:
+        response = requests.get(f"{API_BASE_URL}/api/aum_quarters")
+        response.raise_for_status()
+        return response.json()["quarters"]
+    except requests.RequestException:
+        return [
+            "January - March 2025",
+            "October - December 2024",
+            "July - September 2024",
+            "April - June 2024"
+        ]
+
 # Function to format date
 def format_date(date):
     return date.strftime("%d-%b-%Y")
@@ -77,12 +108,7 @@ if page == "NAV Prediction":
 # Page: AUM Query
 elif page == "AUM Query":
     st.header("Average AUM Query")
-    year_quarter_options = [
-        "January - March 2025",
-        "October - December 2024",
-        "July - September 2024",
-        "April - June 2024"
-    ]
+    year_quarter_options = get_aum_quarters()
     selected_year_quarter = st.selectbox("Year-Quarter", year_quarter_options)
     
     if selected_mf != "Select a mutual fund" and selected_year_quarter:
@@ -109,13 +135,18 @@ elif page == "AUM Query":
 
 # Page: NAV vs Nifty Comparison
 elif page == "NAV vs Nifty Comparison":
-    st.header("NAV vs Nifty 50 Comparison")
+    st.header("NAV vs Benchmark Comparison")
+    benchmark_names = get_benchmarks()
+    benchmark = st.selectbox("Benchmark", list(benchmark_names), format_func=lambda code: benchmark_names[code])
     if selected_mf != "Select a mutual fund" and from_date and to_date:
         if st.button("Compare"):
             payload = {
                 "MFName": selected_mf,
                 "FromDate": format_date(from_date),
-                "ToDate": format_date(to_date)
+                "ToDate": format_date(to_date),
+                "InlinePlot": True,
+                "MaxPoints": COMPARISON_MAX_POINTS,
+                "Benchmark": benchmark
             }
             try:
                 response = requests.post(f"{API_BASE_URL}/api/compare_mf_nifty", json=payload)
@@ -133,14 +164,18 @@ elif page == "NAV vs Nifty Comparison":
                     st.dataframe(comparison_data.style.format({"NAV": "{:.2f}", "Close": "{:.2f}", "nav_norm": "{:.2f}", "nifty_norm": "{:.2f}"}))
                     
                     st.subheader("Correlation")
-                    st.write(f"Correlation between NAV and Nifty 50: {correlation:.4f}")
+                    st.write(f"Correlation between NAV and {benchmark_names[benchmark]}: {format_stat(correlation, '.4f')}")
                     
                     st.subheader("Comparison Plot")
                     try:
-                        plot_response = requests.get(plot_url)
-                        plot_response.raise_for_status()
-                        img = Image.open(io.BytesIO(plot_response.content))
-                        st.image(img, caption="NAV vs Nifty 50 (Normalized)")
+                        if "plot_base64" in data:
+                            plot_bytes = base64.b64decode(data["plot_base64"])
+                        else:
+                            plot_response = requests.get(plot_url)
+                            plot_response.raise_for_status()
+                            plot_bytes = plot_response.content
+                        img = Image.open(io.BytesIO(plot_bytes))
+                        st.image(img, caption=f"NAV vs {benchmark_names[benchmark]} (Normalized)")
                     except requests.RequestException as e:
                         st.error(f"Error fetching plot: {e}")
                     
@@ -174,8 +209,8 @@ elif page == "Historical NAV":
                     st.subheader("Statistics")
                     st.write(f"Start Date: {stats['startDate']}")
                     st.write(f"End Date: {stats['endDate']}")
-                    st.write(f"Average NAV: {stats['average']:.2f}")
-                    st.write(f"Standard Deviation: {stats['stdDev']:.2f}")
+                    st.write(f"Average NAV: {format_stat(stats['average'], '.2f')}")
+                    st.write(f"Standard Deviation: {format_stat(stats['stdDev'], '.2f')}")
                     st.write(f"Null Dates: {', '.join(stats['nullDates']) if stats['nullDates'] else 'None'}")
 
                     
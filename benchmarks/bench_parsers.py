@@ -0,0 +1,65 @@
+import argparse
+import glob
+import json
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.parsers import parse_nav_history_soup, parse_nav_history_lxml
+
+# Times the BeautifulSoup and lxml NavHistoryPeriod parsers on the saved
+# fixtures. Fails if the two parsers disagree on any fixture or if the lxml
+# path is not at least --min-speedup times faster.
+#   python benchmarks/bench_parsers.py [--repeat 5] [--json out.json]
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+def best_time(fn, html, repeat):
+    number = max(1, int(20000 / max(len(html) // 100, 1)))
+    return min(timeit.repeat(lambda: fn(html), number=number, repeat=repeat)) / number
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-speedup", type=float, default=2.0)
+    parser.add_argument("--json")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(FIXTURES_DIR, "**", "nav_history_*.html"), recursive=True), key=os.path.getsize)
+    if not paths:
+        sys.exit("No fixtures found; run benchmarks/make_fixtures.py first")
+
+    results = []
+    failed = False
+    print(f"{'fixture':<32}{'rows':>7}{'soup ms':>10}{'lxml ms':>10}{'speedup':>9}")
+    for path in paths:
+        with open(path) as f:
+            html = f.read()
+        expected = parse_nav_history_soup(html)
+        if parse_nav_history_lxml(html) != expected:
+            print(f"{os.path.basename(path)}: lxml output differs from BeautifulSoup")
+            failed = True
+            continue
+        soup_s = best_time(parse_nav_history_soup, html, args.repeat)
+        lxml_s = best_time(parse_nav_history_lxml, html, args.repeat)
+        speedup = soup_s / lxml_s
+        failed = failed or speedup < args.min_speedup
+        results.append({
+            "fixture": os.path.basename(path),
+            "rows": len(expected),
+            "soupMs": soup_s * 1000,
+            "lxmlMs": lxml_s * 1000,
+            "speedup": speedup
+        })
+        print(f"{os.path.basename(path):<32}{len(expected):>7}{soup_s * 1000:>10.2f}{lxml_s * 1000:>10.2f}{speedup:>8.1f}x")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Micro-benchmarks for the service layer on synthetic histories. Thousands of
+# schemes are registered and given five-year NAV histories (plus the Nifty 50)
+# from the same generator the local provider stand-in serves, then list_nav,
+# add_nav, get_nav_data (warm and fetching through the stand-in),
+# describe_nav, the compare_mf_nifty alignment/correlation path, AUM table
+# parsing and lookup and predict_nav are timed across history sizes.
+#
+# The database is an in-memory mongomock by default (pip install -r
+# requirements-dev.txt). mongomock scans the collection on every upsert, so
+# by default only one scheme's history is stored and add_nav/fetch sizes are
+# capped at 250 rows.
+# Its storage timings only compare with another mongomock run. Pass
+# --mongo-uri for a local mongod; every scheme's history is then stored in a
+# scratch database (mf_benchmark) that is emptied first.
+#   python benchmarks/bench_services.py [--schemes 2000] [--sizes 22,250,1250] [--json out.json]
+#   python benchmarks/bench_services.py --baseline baseline.json [--max-regression 0.25]
+
+DEFAULT_SIZES = "22,250,1250"
+MOCK_WRITE_LIMIT = 250
+MIN_PREDICT_ROWS = 100
+COMPARISON_MAX_POINTS = 500
+AUM_MF_ID = 100
+# Fast calls are looped until a sample takes this long
+MIN_SAMPLE_SECONDS = 0.02
+MAX_NUMBER = 1000
+
+def configure_environment(args):
+    # db, config and model_cache read these when first imported
+    if args.mongo_uri:
+        os.environ["MF_MONGO_URI"] = args.mongo_uri
+        os.environ["MF_MONGO_DB"] = args.mongo_db
+        os.environ.pop("MF_MONGO_MOCK", None)
+    else:
+        os.environ["MF_MONGO_MOCK"] = "1"
+    os.environ["MF_PROVIDER_MODE"] = "local"
+    os.environ["MF_MODEL_DIR"] = tempfile.mkdtemp(prefix="mf_bench_models_")
+
+def check(result):
+    # Service calls return (value, error) or (value, value, error)
+    if isinstance(result, tuple) and result[-1]:
+        raise RuntimeError(result[-1])
+    return result
+
+def measure(fn, repeat, setup=None, teardown=None):
+    # Calls with a setup/teardown are timed one at a time; the rest are looped
+    # so each sample lasts at least MIN_SAMPLE_SECONDS
+    number = 1
+    if setup is None and teardown is None:
+        check(fn())
+        start = time.perf_counter()
+        check(fn())
+        number = max(1, min(MAX_NUMBER, int(MIN_SAMPLE_SECONDS / max(time.perf_counter() - start, 1e-9))))
+    samples = []
+    for _ in range(repeat):
+        args = setup() if setup else None
+        start = time.perf_counter()
+        for _ in range(number):
+            check(fn(*([args] if setup else [])))
+        samples.append((time.perf_counter() - start) / number)
+        if teardown:
+            teardown(args)
+    return {
+        "runs": repeat,
+        "number": number,
+        "minMs": min(samples) * 1000,
+        "medianMs": statistics.median(samples) * 1000,
+        "meanMs": statistics.mean(samples) * 1000
+    }
+
+def history_window():
+    # Five years back from yesterday, the widest range validate_dates allows;
+    # ending before today keeps coverage final
+    to_dt = datetime.combine(datetime.now().date(), datetime.min.time()) - timedelta(days=1)
+    return to_dt - timedelta(days=5 * 365 - 2), to_dt
+
+def nav_docs(data, scheme, from_dt, to_dt):
+    dates, values = data.window("nav", scheme["scID"], from_dt, to_dt)
+    code = f"{scheme['mfID']}@{scheme['scID']}"
+    return [
+        {"code": code, "date": date, "nav": value}
+        for date, value in zip(dates.astype("datetime64[us]").tolist(), values.tolist())
+    ]
+
+def populate(data, schemes, stored, from_dt, to_dt):
+    import db
+    from services.coverage import record_coverage_many
+    from services.benchmark_service import benchmarks, DEFAULT_BENCHMARK
+
+    for collection in (db.mf_collection, db.nav_collection, db.nifty_collection, db.coverage_collection,
+                       db.aum_collection, db.aum_tables_collection, db.aum_quarters_collection):
+        collection.delete_many({})
+    db.mf_collection.insert_many([dict(scheme) for scheme in schemes])
+
+    started = time.perf_counter()
+    batch = []
+    for scheme in schemes[:stored]:
+        batch.extend(nav_docs(data, scheme, from_dt, to_dt))
+        if len(batch) >= 10000:
+            db.nav_collection.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        db.nav_collection.insert_many(batch, ordered=False)
+    record_coverage_many([f"{s['mfID']}@{s['scID']}" for s in schemes[:stored]], from_dt, to_dt)
+
+    dates, values = data.window("closes", benchmarks()[DEFAULT_BENCHMARK]["ticker"], from_dt, to_dt)
+    db.nifty_collection.insert_many([
+        {"code": DEFAULT_BENCHMARK, "date": date, "close": value}
+        for date, value in zip(dates.astype("datetime64[us]").tolist(), values.tolist())
+    ])
+    record_coverage_many([DEFAULT_BENCHMARK], from_dt, to_dt)
+    print(f"Stored {stored} of {len(schemes)} schemes' five-year histories in {time.perf_counter() - started:.1f}s")
+
+def run_suite(args, sizes, write_sizes):
+    # Imported here, after configure_environment
+    import db
+    from services import nav_service, aum_service, local_provider
+    from services.config import use_local_provider
+    from services.cache import nav_cache
+    from services.compare_service import get_comparison
+    from services.utils import format_date
+
+    server = local_provider.start_server(port=0, latencyMs=args.provider_latency_ms, latencyJitterMs=0,
+                                         errorRate=0.0, schemes=args.schemes, seed=args.seed, dataDir=None)
+    use_local_provider(server.url)
+    schemes = server.data.schemes[len(local_provider.SEEDED_SCHEMES):]
+    stored = args.stored if args.stored is not None else (len(schemes) if args.mongo_uri else 1)
+    from_dt, to_dt = history_window()
+    populate(server.data, schemes, stored, from_dt, to_dt)
+
+    fund = schemes[0]
+    dates = [doc["date"] for doc in nav_docs(server.data, fund, from_dt, to_dt)]
+    to_date = format_date(to_dt)
+    unstored = iter(schemes[stored:])
+    results = {}
+
+    def record(name, size, fn, repeat, **kwargs):
+        # The services log with print; keep that out of the report
+        with contextlib.redirect_stdout(io.StringIO()) if not args.verbose else contextlib.nullcontext():
+            stats = measure(fn, repeat, **kwargs)
+        key = f"{name}/{size}"
+        results[key] = dict(stats, name=name, size=size)
+        print(f"{key:<36}{stats['runs']:>4} x {stats['number']:<5}{stats['medianMs']:>12.3f} ms")
+
+    def next_unstored():
+        scheme = next(unstored, None)
+        if scheme is None:
+            raise SystemExit("Not enough unstored schemes left; raise --schemes or lower --stored")
+        return scheme
+
+    def drop_rows(scheme):
+        # Keeps the collection the same size from run to run
+        db.nav_collection.delete_many({"code": f"{scheme['mfID']}@{scheme['scID']}"})
+
+    for size in write_sizes:
+        rows = [{"date": format_date(doc["date"]), "nav": f"{doc['nav']:.4f}"}
+                for doc in nav_docs(server.data, fund, dates[-size], to_dt)]
+        record("add_nav", size, lambda scheme: nav_service.add_nav(scheme["mfID"], scheme["scID"], rows),
+               args.repeat, setup=next_unstored, teardown=drop_rows)
+        record("get_nav_data/fetch", size, lambda scheme: nav_service.get_nav_data(scheme["fund"], format_date(dates[-size]), to_date),
+               args.repeat, setup=next_unstored, teardown=drop_rows)
+
+    code = f"{fund['mfID']}@{fund['scID']}"
+    for size in sizes:
+        from_date = format_date(dates[-size])
+        record("list_nav/cold", size, lambda _: nav_service.list_nav(fund["mfID"], fund["scID"], from_date, to_date),
+               args.repeat, setup=lambda: nav_cache.invalidate(code))
+        record("list_nav/warm", size, lambda: nav_service.list_nav(fund["mfID"], fund["scID"], from_date, to_date), args.repeat)
+        record("get_nav_data", size, lambda: nav_service.get_nav_data(fund["fund"], from_date, to_date), args.repeat)
+        df, _ = check(nav_service.get_nav_data(fund["fund"], from_date, to_date))
+        derived, _ = check(nav_service.get_nav_derived(fund["fund"]))
+        record("describe_nav", size, lambda: nav_service.describe_nav(df), args.repeat)
+        record("describe_nav/derived", size, lambda: nav_service.describe_nav(df, derived), args.repeat)
+        record("compare_mf_nifty", size, lambda: get_comparison(fund["fund"], from_date, to_date, COMPARISON_MAX_POINTS), args.repeat)
+
+    quarter = aum_service.list_quarters()[0]
+    year_id = aum_service.get_quarter_ids()[quarter]
+    rows, _ = check(aum_service.scrape_aum_table(AUM_MF_ID, year_id, quarter))
+    aum_fund = next(scheme["fund"] for scheme in schemes if scheme["mfID"] == AUM_MF_ID)
+    record("get_aum_data/parse", len(rows), lambda: aum_service.scrape_aum_table(AUM_MF_ID, year_id, quarter), args.repeat)
+    record("get_aum_data/cached", len(rows), lambda: aum_service.get_aum_data(aum_fund, quarter), args.repeat)
+
+    if not args.skip_predict:
+        for size in [size for size in sizes if size >= MIN_PREDICT_ROWS]:
+            # Each cold run starts a day later, so its model key is new
+            offsets = iter(range(args.predict_repeat))
+            record("predict_nav/cold", size, lambda from_date: nav_service.predict_nav(fund["fund"], from_date, to_date),
+                   args.predict_repeat, setup=lambda: format_date(dates[-size + next(offsets)]))
+            from_date = format_date(dates[-size + args.predict_repeat - 1])
+            record("predict_nav/cached", size, lambda: nav_service.predict_nav(fund["fund"], from_date, to_date), args.repeat)
+            record("forecast_nav/fast", size, lambda: nav_service.forecast_nav(fund["fund"], format_date(dates[-size]), to_date, mode="fast"),
+                   args.repeat)
+
+    server.shutdown()
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "backend": "mongodb" if args.mongo_uri else "mongomock",
+            "schemes": len(schemes),
+            "stored": stored,
+            "repeat": args.repeat
+        },
+        "results": results
+    }
+
+def compare(report, baseline, max_regression, min_delta_ms):
+    if baseline["meta"]["backend"] != report["meta"]["backend"]:
+        print(f"Warning: baseline ran on {baseline['meta']['backend']}, this run on {report['meta']['backend']}")
+    regressions = []
+    print(f"\n{'benchmark':<36}{'baseline ms':>14}{'current ms':>14}{'change':>10}")
+    for key, result in report["results"].items():
+        base = baseline["results"].get(key)
+        if base is None:
+            print(f"{key:<36}{'-':>14}{result['medianMs']:>14.3f}{'new':>10}")
+            continue
+        change = result["medianMs"] / base["medianMs"] - 1
+        regressed = change > max_regression and result["medianMs"] - base["medianMs"] > min_delta_ms
+        if regressed:
+            regressions.append(key)
+        print(f"{key:<36}{base['medianMs']:>14.3f}{result['medianMs']:>14.3f}{change * 100:>9.1f}%" + ("  REGRESSION" if regressed else ""))
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Service-layer micro-benchmarks on synthetic histories")
+    parser.add_argument("--schemes", type=int, default=2000, help="synthetic schemes to register")
+    parser.add_argument("--stored", type=int, help="schemes given a stored five-year history (default: all, or 1 on mongomock)")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="history lengths in business days")
+    parser.add_argument("--write-sizes", help="sizes for add_nav and fetching (default: --sizes, capped on mongomock)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--predict-repeat", type=int, default=1)
+    parser.add_argument("--skip-predict", action="store_true")
+    parser.add_argument("--provider-latency-ms", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--verbose", action="store_true", help="show the services' own logging")
+    parser.add_argument("--mongo-uri", help="local mongod to use instead of mongomock")
+    parser.add_argument("--mongo-db", default="mf_benchmark")
+    parser.add_argument("--json", help="write the results here")
+    parser.add_argument("--baseline", help="compare against results saved with --json")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="allowed slowdown of the median")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    if args.write_sizes:
+        write_sizes = sorted(int(size) for size in args.write_sizes.split(","))
+    else:
+        write_sizes = [size for size in sizes if args.mongo_uri or size <= MOCK_WRITE_LIMIT]
+    if max(sizes + write_sizes) > 1250:
+        sys.exit("Sizes above 1250 business days fall outside the five-year window")
+
+    configure_environment(args)
+    report = run_suite(args, sizes, write_sizes)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.max_regression, args.min_delta_ms)
+        if regressions:
+            sys.exit(f"{len(regressions)} benchmark(s) regressed by more than {args.max_regression:.0%}")
+
+if __name__ == "__main__":
+    main()
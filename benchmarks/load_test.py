@@ -0,0 +1,369 @@
+import argparse
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+import numpy as np
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.local_provider import SEEDED_SCHEMES, synthetic_schemes
+
+# End-to-end load test of the Flask API. It starts the local provider
+# stand-in and main:app under gunicorn (gunicorn.conf.py, with --workers and
+# --threads) on loopback ports, then --concurrency client threads replay a
+# weighted mix of list_mfs, get_nav, compare, get_aum and nav_pred requests
+# as fast as responses come back. After --warmup seconds, which fill the
+# caches and are not counted, it records --duration seconds of traffic.
+# Cold nav_pred fits take seconds each, so on a small machine give the
+# warm-up long enough to fit every fund/window once.
+# Reported per endpoint: throughput and p50/p95/p99 latency. Reported for
+# the server process tree (master, workers, prediction pools): CPU and RSS,
+# sampled from /proc. Request sequences are seeded, so a run repeats.
+#
+# The database is mongomock (pip install -r requirements-dev.txt) unless
+# --mongo-uri points at a local mongod. With mongomock every worker holds its
+# own in-memory database, seeded with the four db.MF_DATA funds, and its
+# inserts slow down as collections grow, so keep --windows short there. With a mongod the scratch database is emptied
+# and --schemes synthetic funds are registered as well.
+#   python benchmarks/load_test.py [--workers 2] [--threads 4] [--concurrency 16] [--duration 30]
+#   python benchmarks/load_test.py --mix list_mfs=1,get_nav=3 --windows 30,365 --json load.json
+
+DEFAULT_MIX = "list_mfs=20,get_nav=35,compare=25,get_aum=15,nav_pred=5"
+# Preset ranges a user picks (1M, 1Y, 3Y, 5Y), ending yesterday
+WINDOW_DAYS = (30, 365, 3 * 365, 5 * 365 - 2)
+PREDICT_WINDOW_DAYS = (365, 3 * 365)
+COMPARISON_MAX_POINTS = 500
+SAMPLE_INTERVAL = 0.5
+READY_TIMEOUT = 120
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def date_windows(days_list):
+    to_dt = datetime.now() - timedelta(days=1)
+    return [((to_dt - timedelta(days=days)).strftime("%d-%b-%Y"), to_dt.strftime("%d-%b-%Y")) for days in days_list]
+
+# Request builders return (method, path, JSON body)
+def list_mfs_request(rng, context):
+    return "GET", "/api/list_mfs", None
+
+def get_nav_request(rng, context):
+    from_date, to_date = rng.choice(context["windows"])
+    return "POST", "/api/get_nav", {"MFName": rng.choice(context["funds"]), "FromDate": from_date, "ToDate": to_date}
+
+def compare_request(rng, context):
+    from_date, to_date = rng.choice(context["windows"])
+    return "POST", "/api/compare_mf_nifty", {
+        "MFName": rng.choice(context["funds"]),
+        "FromDate": from_date,
+        "ToDate": to_date,
+        "InlinePlot": True,
+        "MaxPoints": COMPARISON_MAX_POINTS
+    }
+
+def get_aum_request(rng, context):
+    return "POST", "/api/get_aum", {"MFName": rng.choice(context["funds"]), "Year_Quarter": rng.choice(context["quarters"])}
+
+def nav_pred_request(rng, context):
+    from_date, to_date = rng.choice(context["predict_windows"])
+    return "POST", "/api/nav_pred", {"MFName": rng.choice(context["funds"]), "FromDate": from_date, "ToDate": to_date}
+
+REQUESTS = {
+    "list_mfs": list_mfs_request,
+    "get_nav": get_nav_request,
+    "compare": compare_request,
+    "get_aum": get_aum_request,
+    "nav_pred": nav_pred_request
+}
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in REQUESTS:
+            raise SystemExit(f"Invalid mix entry {name!r}: must be one of {', '.join(REQUESTS)}")
+        mix[name] = float(weight or 1)
+    return mix
+
+def read_stat(pid):
+    # (ppid, cpu ticks, rss bytes) from /proc/<pid>/stat; the command name
+    # may contain spaces, so fields are counted after its closing bracket
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+    except (OSError, IndexError):
+        return None
+    return int(fields[1]), int(fields[11]) + int(fields[12]), int(fields[21]) * PAGE_SIZE
+
+def process_tree(root_pid):
+    stats = {int(pid): read_stat(pid) for pid in os.listdir("/proc") if pid.isdigit()}
+    stats = {pid: stat for pid, stat in stats.items() if stat}
+    tree, frontier = {}, [root_pid]
+    while frontier:
+        pid = frontier.pop()
+        if pid in stats:
+            tree[pid] = stats[pid]
+            frontier.extend(child for child, stat in stats.items() if stat[0] == pid)
+    return tree
+
+class ResourceSampler(threading.Thread):
+    # CPU is summed per process between its first and last sample; processes
+    # forked during the run (prediction pools) count from zero
+    def __init__(self, root_pid, interval=SAMPLE_INTERVAL):
+        super().__init__(daemon=True)
+        self.root_pid = root_pid
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.first_ticks = {}
+        self.last_ticks = {}
+        self.rss = []
+        self.processes = []
+
+    def sample(self):
+        tree = process_tree(self.root_pid)
+        for pid, (_, ticks, _) in tree.items():
+            self.first_ticks.setdefault(pid, ticks if not self.rss else 0)
+            self.last_ticks[pid] = ticks
+        self.rss.append(sum(rss for _, _, rss in tree.values()))
+        self.processes.append(len(tree))
+
+    def run(self):
+        self.sample()
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        self.sample()
+
+    def report(self, elapsed):
+        cpu_seconds = sum(ticks - self.first_ticks[pid] for pid, ticks in self.last_ticks.items()) / CLOCK_TICKS
+        return {
+            "cpuSeconds": cpu_seconds,
+            "cpuPercent": cpu_seconds / elapsed * 100,
+            "rssPeakMb": max(self.rss) / 2 ** 20,
+            "rssMeanMb": sum(self.rss) / len(self.rss) / 2 ** 20,
+            "processesPeak": max(self.processes)
+        }
+
+def start_stand_in(args, port, log):
+    return subprocess.Popen([
+        sys.executable, "-m", "services.local_provider",
+        "--host", "127.0.0.1", "--port", str(port),
+        "--latency-ms", str(args.provider_latency_ms),
+        "--jitter-ms", str(args.provider_jitter_ms),
+        "--error-rate", str(args.provider_error_rate),
+        "--schemes", str(args.schemes),
+        "--seed", str(args.seed)
+    ], cwd=ROOT, stdout=log, stderr=log)
+
+def start_server(args, port, provider_url, log):
+    env = dict(
+        os.environ,
+        MF_BIND=f"127.0.0.1:{port}",
+        MF_WORKERS=str(args.workers),
+        MF_THREADS=str(args.threads),
+        MF_PROVIDER_MODE="local",
+        MF_LOCAL_PROVIDER_URL=provider_url,
+        MF_MODEL_DIR=tempfile.mkdtemp(prefix="mf_load_models_"),
+        MF_PLOT_DIR=tempfile.mkdtemp(prefix="mf_load_plots_")
+    )
+    if args.mongo_uri:
+        env.update(MF_MONGO_URI=args.mongo_uri, MF_MONGO_DB=args.mongo_db)
+        env.pop("MF_MONGO_MOCK", None)
+    else:
+        env["MF_MONGO_MOCK"] = "1"
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "main:app"],
+        cwd=ROOT, env=env, stdout=log, stderr=log
+    )
+
+def wait_ready(url, process, log_path):
+    deadline = time.monotonic() + READY_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise SystemExit(f"Process exited early, see {log_path}")
+        try:
+            if requests.get(url, timeout=2).status_code < 500:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise SystemExit(f"{url} not ready after {READY_TIMEOUT}s, see {log_path}")
+
+def prepare_database(args):
+    # Scratch mongod database: empty it and register the seeded and
+    # synthetic funds before the workers start
+    from pymongo import MongoClient
+    database = MongoClient(args.mongo_uri, serverSelectionTimeoutMS=5000)[args.mongo_db]
+    for name in ("mf_data", "nav_data", "nifty_data", "coverage", "backfill_runs", "aum_data", "aum_tables", "aum_quarters"):
+        database[name].delete_many({})
+    database["mf_data"].insert_many([dict(scheme) for scheme in SEEDED_SCHEMES + synthetic_schemes(args.schemes)])
+
+def client(index, args, base_url, context, mix, warm_until, stop_at, samples):
+    rng = random.Random(args.seed * 1000 + index)
+    session = requests.Session()
+    names, weights = list(mix), list(mix.values())
+    sent = 0
+    while time.perf_counter() < stop_at and (args.requests is None or sent < args.requests):
+        name = rng.choices(names, weights)[0]
+        method, path, body = REQUESTS[name](rng, context)
+        started = time.perf_counter()
+        try:
+            response = session.request(method, base_url + path, json=body, timeout=args.request_timeout)
+            status = response.status_code
+        except requests.RequestException:
+            status = None
+        elapsed = time.perf_counter() - started
+        if started >= warm_until:
+            samples.append((name, elapsed, status))
+            sent += 1
+
+def summarize(samples, elapsed):
+    endpoints = {}
+    for name in sorted({name for name, _, _ in samples}):
+        latencies = np.array([latency for n, latency, _ in samples if n == name]) * 1000
+        statuses = Counter(status for n, _, status in samples if n == name)
+        errors = sum(count for status, count in statuses.items() if status is None or status >= 400)
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        endpoints[name] = {
+            "requests": len(latencies),
+            "errors": errors,
+            "statuses": {str(status): count for status, count in statuses.items()},
+            "throughputRps": len(latencies) / elapsed,
+            "p50Ms": p50,
+            "p95Ms": p95,
+            "p99Ms": p99,
+            "maxMs": latencies.max()
+        }
+    latencies = np.array([latency for _, latency, _ in samples]) * 1000
+    total = {
+        "requests": len(samples),
+        "errors": sum(endpoint["errors"] for endpoint in endpoints.values()),
+        "throughputRps": len(samples) / elapsed
+    }
+    if len(latencies):
+        total.update(zip(("p50Ms", "p95Ms", "p99Ms"), np.percentile(latencies, [50, 95, 99]).tolist()))
+    return endpoints, total
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the Flask API under gunicorn against local stand-ins")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=16, help="client threads, each with one request in flight")
+    parser.add_argument("--duration", type=float, default=30, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=10, help="unmeasured seconds first")
+    parser.add_argument("--requests", type=int, help="stop each client after this many measured requests")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="endpoint=weight,...")
+    parser.add_argument("--windows", default=",".join(map(str, WINDOW_DAYS)), help="get_nav/compare range lengths in days")
+    parser.add_argument("--request-timeout", type=float, default=180)
+    parser.add_argument("--provider-latency-ms", type=float, default=40)
+    parser.add_argument("--provider-jitter-ms", type=float, default=20)
+    parser.add_argument("--provider-error-rate", type=float, default=0.0)
+    parser.add_argument("--schemes", type=int, default=2000, help="synthetic schemes served by the stand-in")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--mongo-uri", help="local mongod to use instead of per-worker mongomock")
+    parser.add_argument("--mongo-db", default="mf_loadtest")
+    parser.add_argument("--json", help="write the report here")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    if args.mongo_uri:
+        prepare_database(args)
+    log_path = os.path.join(tempfile.mkdtemp(prefix="mf_load_"), "server.log")
+    log = open(log_path, "w")
+    provider_port, server_port = free_port(), free_port()
+    provider_url = f"http://127.0.0.1:{provider_port}"
+    base_url = f"http://127.0.0.1:{server_port}"
+    stand_in = start_stand_in(args, provider_port, log)
+    server = start_server(args, server_port, provider_url, log)
+    try:
+        wait_ready(f"{provider_url}/stats", stand_in, log_path)
+        wait_ready(f"{base_url}/api/list_mfs", server, log_path)
+        funds = [mf["Fund"] for mf in requests.get(f"{base_url}/api/list_mfs").json()]
+        quarters = requests.get(f"{base_url}/api/aum_quarters").json()["quarters"]
+        context = {
+            "funds": funds,
+            "quarters": quarters[:4],
+            "windows": date_windows([int(days) for days in args.windows.split(",")]),
+            "predict_windows": date_windows(PREDICT_WINDOW_DAYS)
+        }
+        print(f"gunicorn {args.workers} worker(s) x {args.threads} thread(s), {args.concurrency} clients, "
+              f"{len(funds)} funds, mix {args.mix}; log at {log_path}")
+
+        started = time.perf_counter()
+        warm_until = started + args.warmup
+        stop_at = warm_until + args.duration
+        per_client = [[] for _ in range(args.concurrency)]
+        clients = [
+            threading.Thread(target=client, args=(index, args, base_url, context, mix, warm_until, stop_at, per_client[index]))
+            for index in range(args.concurrency)
+        ]
+        for thread in clients:
+            thread.start()
+        time.sleep(max(0, warm_until - time.perf_counter()))
+        sampler = ResourceSampler(server.pid)
+        sampler.start()
+        for thread in clients:
+            thread.join()
+        measured = time.perf_counter() - warm_until
+        sampler.stop()
+    finally:
+        server.terminate()
+        stand_in.terminate()
+        server.wait(timeout=30)
+        stand_in.wait(timeout=30)
+        log.close()
+
+    samples = [sample for samples in per_client for sample in samples]
+    endpoints, total = summarize(samples, measured)
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "cpus": os.cpu_count(),
+            "workers": args.workers,
+            "threads": args.threads,
+            "concurrency": args.concurrency,
+            "measuredSeconds": measured,
+            "mix": mix,
+            "backend": "mongodb" if args.mongo_uri else "mongomock",
+            "providerLatencyMs": args.provider_latency_ms,
+            "providerErrorRate": args.provider_error_rate,
+            "seed": args.seed
+        },
+        "endpoints": endpoints,
+        "total": total,
+        "resources": sampler.report(measured)
+    }
+
+    print(f"\n{'endpoint':<12}{'requests':>10}{'errors':>8}{'req/s':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, endpoint in endpoints.items():
+        print(f"{name:<12}{endpoint['requests']:>10}{endpoint['errors']:>8}{endpoint['throughputRps']:>9.1f}"
+              f"{endpoint['p50Ms']:>10.1f}{endpoint['p95Ms']:>10.1f}{endpoint['p99Ms']:>10.1f}")
+    print(f"{'total':<12}{total['requests']:>10}{total['errors']:>8}{total['throughputRps']:>9.1f}"
+          f"{total.get('p50Ms', 0):>10.1f}{total.get('p95Ms', 0):>10.1f}{total.get('p99Ms', 0):>10.1f}")
+    resources = report["resources"]
+    print(f"\nserver CPU {resources['cpuSeconds']:.1f}s ({resources['cpuPercent']:.0f}% of one core), "
+          f"RSS peak {resources['rssPeakMb']:.0f} MB, mean {resources['rssMeanMb']:.0f} MB, "
+          f"up to {resources['processesPeak']} processes")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
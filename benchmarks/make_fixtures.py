@@ -0,0 +1,109 @@
+import argparse
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+# Writes NavHistoryPeriod response fixtures of several sizes, in the markup
+# AMFI returns: scheme header rows followed by one row per NAV date with the
+# NAV, repurchase price, sale price and date cells. With --capture it instead
+# saves live AMFI responses for the seeded schemes under fixtures/captured/,
+# which the parser tests and benchmark pick up alongside the synthetic ones.
+#   python benchmarks/make_fixtures.py [--capture --from 01-Jan-2025 --to 31-Mar-2025]
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+CAPTURED_DIR = os.path.join(FIXTURES_DIR, "captured")
+SIZES = {"month": 22, "year": 250, "five_years": 1250}
+NAV_ALL_HEADER = "Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date"
+SEEDED_SCHEMES = [
+    ("SBI Mutual Fund", 125497, "SBI Small Cap Fund - Direct Plan - Growth"),
+    ("HDFC Mutual Fund", 118955, "HDFC Flexi Cap Fund - Growth Option - Direct Plan"),
+    ("ICICI Prudential Mutual Fund", 120586, "ICICI Prudential Bluechip Fund - Direct Plan - Growth"),
+    ("UTI Mutual Fund", 120663, "UTI Flexi Cap Fund - Direct Plan - IDCW"),
+]
+
+def nav_history_html(rows, seed=0):
+    rng = random.Random(seed)
+    lines = [
+        '<table width="100%" border="0" cellspacing="0" cellpadding="0" class="tblborder">',
+        '<tr><th colspan="4" class="nav-hed1">Open Ended Schemes ( Equity Scheme - Small Cap Fund )</th></tr>',
+        '<tr><th colspan="4" class="nav-hed2">SBI Mutual Fund</th></tr>',
+        '<tr><th colspan="4" class="nav-hed3">SBI Small Cap Fund - Direct Plan - Growth</th></tr>',
+        '<tr><th>Net Asset Value</th><th>Repurchase Price</th><th>Sale Price</th><th>Date</th></tr>',
+    ]
+    day = datetime(2020, 1, 1)
+    nav = 60.0
+    written = 0
+    while written < rows:
+        if day.weekday() < 5:
+            nav *= 1 + rng.gauss(0.0006, 0.011)
+            lines.append(
+                f'<tr>\n<td align="right"> {nav:.4f} </td>\n<td align="right"></td>\n'
+                f'<td align="right"></td>\n<td align="center"> {day:%d-%b-%Y} </td>\n</tr>'
+            )
+            written += 1
+        day += timedelta(days=1)
+    lines.append('</table>')
+    return "\n".join(lines)
+
+def iter_nav_all_lines(rows, date, seed=0):
+    # All-schemes NAV file (NAVAll.txt): category and AMC heading lines
+    # separate blocks of "code;isin;isin;name;nav;date" rows. The seeded
+    # schemes come first, the rest are synthetic scheme codes.
+    rng = random.Random(seed)
+    yield NAV_ALL_HEADER
+    yield ""
+    yield "Open Ended Schemes(Equity Scheme - Flexi Cap Fund)"
+    yield ""
+    for index in range(rows):
+        if index < len(SEEDED_SCHEMES):
+            amc, code, name = SEEDED_SCHEMES[index]
+        else:
+            amc, code, name = f"AMC {index // 200} Mutual Fund", 200000 + index, f"Synthetic Scheme {index} - Direct Plan - Growth"
+        if index % 200 == 0 or index < len(SEEDED_SCHEMES):
+            yield ""
+            yield amc
+            yield ""
+        nav = "N.A." if index % 997 == 13 else f"{rng.uniform(10, 900):.4f}"
+        yield f"{code};INF{code:09d};-;{name};{nav};{date:%d-%b-%Y}"
+
+def capture(from_date, to_date):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import requests
+    from services.config import get_provider
+    from services.local_provider import SEEDED_SCHEMES as SCHEMES
+
+    os.makedirs(CAPTURED_DIR, exist_ok=True)
+    provider = get_provider("amfi")
+    for scheme in SCHEMES:
+        payload = {"mfID": scheme["mfID"], "scID": scheme["scID"], "fDate": from_date, "tDate": to_date}
+        response = requests.post(provider["url"], data=payload, timeout=60)
+        response.raise_for_status()
+        path = os.path.join(CAPTURED_DIR, f"nav_history_{scheme['scID']}_{from_date}_{to_date}.html")
+        with open(path, "w") as f:
+            f.write(response.text)
+        print(f"Wrote {path} ({len(response.text)} bytes)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Write parser fixtures")
+    parser.add_argument("--capture", action="store_true", help="save live AMFI responses instead")
+    parser.add_argument("--from", dest="from_date", default="01-Jan-2025")
+    parser.add_argument("--to", dest="to_date", default="31-Mar-2025")
+    args = parser.parse_args()
+    if args.capture:
+        capture(args.from_date, args.to_date)
+        return
+
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for name, rows in SIZES.items():
+        path = os.path.join(FIXTURES_DIR, f"nav_history_{name}.html")
+        with open(path, "w") as f:
+            f.write(nav_history_html(rows))
+        print(f"Wrote {path} ({rows} rows)")
+    path = os.path.join(FIXTURES_DIR, "NAVAll_sample.txt")
+    with open(path, "w") as f:
+        f.write("\n".join(iter_nav_all_lines(500, datetime(2025, 4, 1))) + "\n")
+    print(f"Wrote {path} (500 rows)")
+
+if __name__ == "__main__":
+    main()
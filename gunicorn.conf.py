@@ -0,0 +1,20 @@
+import os
+
+# Production server settings for the Flask API:
+#   gunicorn -c gunicorn.conf.py main:app
+# Each worker is a separate process with its own series and derived caches
+# and its own prediction job pool; threads share them within a worker.
+# Override with MF_BIND, MF_WORKERS, MF_THREADS, MF_JOB_WORKERS and MF_TIMEOUT.
+
+bind = os.environ.get("MF_BIND", "0.0.0.0:5000")
+workers = int(os.environ.get("MF_WORKERS", os.cpu_count() or 1))
+threads = int(os.environ.get("MF_THREADS", 4))
+worker_class = "gthread" if threads > 1 else "sync"
+# Split the cores between the workers' job pools rather than giving every
+# worker a pool of cpu_count fitting processes
+os.environ.setdefault("MF_JOB_WORKERS", str(max(1, (os.cpu_count() or 1) // workers)))
+# Above the longest blocking endpoint (batch predictions wait up to
+# nav_service.BATCH_PREDICTION_TIMEOUT = 600s), so a sync worker is not killed
+# partway through a request that the API would answer with its own timeout
+timeout = int(os.environ.get("MF_TIMEOUT", 660))
+keepalive = 5
@@ -1,9 +1,16 @@
-from flask import Flask, jsonify, request, send_file
-import pandas as pd
-import matplotlib.pyplot as plt
+import base64
+from flask import Flask, Response, jsonify, request
 from db import mf_collection
-from services.nav_service import get_nav_data, describe_nav, get_mf_ids, get_aum_data, predict_nav
-from services.nifty_service import get_nifty_data
+from services.nav_service import get_nav_data, get_nav_derived, describe_nav, get_mf_ids, forecast_nav, predict_nav_batch, backtest_nav, submit_prediction, get_prediction_job, prediction_job_view, MAX_BATCH_FUNDS
+from services.jobs import prediction_jobs
+from services.aum_service import get_aum_data, list_quarters
+from services.cache import cache_stats
+from services.http_client import provider_stats
+from services.utils import to_records
+from services.compare_service import get_comparison, get_comparison_matrix, plot_name, key_from_plot_name
+from services.benchmark_service import get_benchmark_data, benchmarks, DEFAULT_BENCHMARK
+from services.plots import plot_cache, PLOT_MAX_AGE
+from services.analytics_service import get_analytics, get_rolling_analytics, get_derived_window, DEFAULT_ROLLING_WINDOW
 
 app = Flask(__name__)
 
@@ -23,8 +30,9 @@ def get_nav():
     if error:
         return jsonify({"error": error}), 400 if "Invalid" in error else 404 if "not found" in error else 500
     
-    nav_data = df.to_dict(orient="records")
-    stats = describe_nav(df)
+    nav_data = to_records(df, "date")
+    derived, _ = get_nav_derived(mf_name)
+    stats = describe_nav(df, derived)
     return jsonify({"nav_data": nav_data, "stats": stats})
 
 @app.route('/api/fetch_nifty', methods=['POST'])
@@ -32,12 +40,13 @@ def fetch_nifty():
     data = request.get_json()
     from_date = data.get("FromDate")
     to_date = data.get("ToDate")
+    benchmark = data.get("Benchmark", DEFAULT_BENCHMARK)
 
-    df, error = get_nifty_data(from_date, to_date)
+    df, error = get_benchmark_data(benchmark, from_date, to_date)
     if error:
-        return jsonify({"error": error}), 500
+        return jsonify({"error": error}), 400 if error.startswith("Invalid") else 500
     
-    nifty_data = [{"date": row["Date"], "close": row["Close"]} for _, row in df.iterrows()]
+    nifty_data = to_records(df.rename(columns={"Date": "date", "Close": "close"}), "date")
     return jsonify({"nifty_data": nifty_data})
 
 @app.route('/api/compare_mf_nifty', methods=['POST'])
@@ -46,62 +55,110 @@ def compare_mf_nifty():
     mf_name = data.get("MFName")
     from_date = data.get("FromDate")
     to_date = data.get("ToDate")
+    inline_plot = data.get("InlinePlot", False)
+    max_points = data.get("MaxPoints")
+    benchmark = data.get("Benchmark", DEFAULT_BENCHMARK)
 
-    # Fetch MF data
-    mf_df, mf_error = get_nav_data(mf_name, from_date, to_date)
-    if mf_error:
-        return jsonify({"error": mf_error}), 500
-    
-    # Fetch Nifty data
-    nifty_df, nifty_error = get_nifty_data(from_date, to_date)
-    if nifty_error:
-        return jsonify({"error": nifty_error}), 500
-    
-    # Convert dates to datetime for alignment
-    mf_df["date"] = pd.to_datetime(mf_df["date"], format="%d-%b-%Y")
-    nifty_df["Date"] = pd.to_datetime(nifty_df["Date"], format="%d-%b-%Y")
-    
-    # Align datasets by date
-    aligned_df = pd.merge(mf_df[["date", "nav"]], nifty_df[["Date", "Close"]], 
-                          left_on="date", right_on="Date", how="inner")
-    if aligned_df.empty:
-        return jsonify({"error": "No overlapping data between MF and Nifty"}), 500
-    
-    aligned_df = aligned_df.drop(columns=["Date"])
-    aligned_df = aligned_df.rename(columns={"date": "Date", "nav": "NAV"})
-    
-    # Convert NAV to numeric
-    aligned_df["NAV"] = pd.to_numeric(aligned_df["NAV"], errors="coerce")
-    
-    # Normalize data (start at 100)
-    aligned_df["nav_norm"] = (aligned_df["NAV"] / aligned_df["NAV"].iloc[0]) * 100
-    aligned_df["nifty_norm"] = (aligned_df["Close"] / aligned_df["Close"].iloc[0]) * 100
-    
-    # Calculate correlation
-    correlation = aligned_df["NAV"].corr(aligned_df["Close"])
-    
-    # Visualize
-    plt.figure(figsize=(10, 6))
-    plt.plot(aligned_df["Date"], aligned_df["nav_norm"], label=f"{mf_name} (Normalized NAV)")
-    plt.plot(aligned_df["Date"], aligned_df["nifty_norm"], label="Nifty 50 (Normalized)")
-    plt.title(f"Comparison: {mf_name} vs Nifty 50")
-    plt.xlabel("Date")
-    plt.ylabel("Normalized Value (Base = 100)")
-    plt.legend()
-    plt.grid(True)
-    plot_path = f"comparison_{mf_name.replace(' ', '_')}.png"
-    plt.savefig(plot_path)
-    plt.close()
-    
-    # Format Date back to string
-    aligned_df["Date"] = aligned_df["Date"].dt.strftime("%d-%b-%Y")
-    comparison_data = aligned_df.to_dict(orient="records")
+    comparison, error = get_comparison(mf_name, from_date, to_date, max_points, benchmark)
+    if error:
+        return jsonify({"error": error}), 400 if error.startswith("Invalid") else 500
     
-    return jsonify({
-        "comparison_data": comparison_data,
-        "correlation": correlation,
-        "plot": f"/plot/{plot_path}"
-    })
+    response = {
+        "benchmark": comparison["benchmark"],
+        "comparison_data": to_records(comparison["aligned"], "Date"),
+        "total_points": comparison["total_points"],
+        "correlation": comparison["correlation"],
+        "plot": f"/plot/{plot_name(comparison['plot_key'])}"
+    }
+    if inline_plot:
+        response["plot_base64"] = base64.b64encode(comparison["png"]).decode("ascii")
+    return jsonify(response)
+
+@app.route('/api/compare_matrix', methods=['POST'])
+def compare_matrix():
+    data = request.get_json()
+    mf_names = data.get("MFNames")
+    from_date = data.get("FromDate")
+    to_date = data.get("ToDate")
+    benchmarks = data.get("Benchmarks", [DEFAULT_BENCHMARK])
+    max_points = data.get("MaxPoints")
+    plot = data.get("Plot", False)
+    inline_plot = data.get("InlinePlot", False)
+    
+    if not mf_names or not isinstance(mf_names, list) or not from_date or not to_date:
+        return jsonify({"error": "MFNames (list), FromDate, and ToDate are required"}), 400
+    if not benchmarks or not isinstance(benchmarks, list):
+        return jsonify({"error": "Benchmarks must be a non-empty list"}), 400
+    if len(mf_names) > MAX_BATCH_FUNDS:
+        return jsonify({"error": f"At most {MAX_BATCH_FUNDS} funds per batch"}), 400
+    
+    comparison, error = get_comparison_matrix(
+        list(dict.fromkeys(mf_names)), from_date, to_date, list(dict.fromkeys(benchmarks)),
+        max_points, plot or inline_plot
+    )
+    if error:
+        return jsonify({"error": error}), 400 if "Invalid" in error else 404 if "No " in error else 500
+    
+    png = comparison.pop("png", None)
+    plot_key = comparison.pop("plot_key", None)
+    if plot_key:
+        comparison["plot"] = f"/plot/{plot_name(plot_key)}"
+    if inline_plot:
+        comparison["plot_base64"] = base64.b64encode(png).decode("ascii")
+    return jsonify(comparison)
+
+@app.route('/api/analytics', methods=['POST'])
+def analytics():
+    data = request.get_json()
+    mf_names = data.get("MFNames") or ([data["MFName"]] if data.get("MFName") else None)
+    from_date = data.get("FromDate")
+    to_date = data.get("ToDate")
+    windows = data.get("Windows")
+    benchmark = data.get("Benchmark", DEFAULT_BENCHMARK)
+    
+    if not mf_names or not isinstance(mf_names, list) or not from_date or not to_date:
+        return jsonify({"error": "MFName or MFNames (list), FromDate, and ToDate are required"}), 400
+    if len(mf_names) > MAX_BATCH_FUNDS:
+        return jsonify({"error": f"At most {MAX_BATCH_FUNDS} funds per batch"}), 400
+    
+    result, error = get_analytics(list(dict.fromkeys(mf_names)), from_date, to_date, windows, benchmark)
+    if error:
+        return jsonify({"error": error}), 400 if "Invalid" in error else 500
+    return jsonify(result)
+
+@app.route('/api/analytics/rolling', methods=['POST'])
+def rolling_analytics():
+    data = request.get_json()
+    mf_name = data.get("MFName")
+    from_date = data.get("FromDate")
+    to_date = data.get("ToDate")
+    window = data.get("Window", DEFAULT_ROLLING_WINDOW)
+    benchmark = data.get("Benchmark", DEFAULT_BENCHMARK)
+    
+    if not mf_name or not from_date or not to_date:
+        return jsonify({"error": "MFName, FromDate, and ToDate are required"}), 400
+    
+    result, error = get_rolling_analytics(mf_name, from_date, to_date, window, benchmark)
+    if error:
+        return jsonify({"error": error}), 400 if "Invalid" in error else 404 if "not found" in error else 500
+    return jsonify(result)
+
+@app.route('/api/derived', methods=['POST'])
+def derived_series():
+    data = request.get_json()
+    mf_name = data.get("MFName")
+    from_date = data.get("FromDate")
+    to_date = data.get("ToDate")
+    window = data.get("Window", DEFAULT_ROLLING_WINDOW)
+    benchmark = data.get("Benchmark", DEFAULT_BENCHMARK)
+    
+    if not from_date or not to_date:
+        return jsonify({"error": "FromDate and ToDate are required; omit MFName for a benchmark"}), 400
+    
+    result, error = get_derived_window(mf_name, from_date, to_date, window, benchmark)
+    if error:
+        return jsonify({"error": error}), 400 if "Invalid" in error else 404 if "not found" in error or "No data" in error else 500
+    return jsonify(result)
 
 @app.route('/api/get_aum', methods=['POST'])
 def get_aum():
@@ -118,28 +175,136 @@ def get_aum():
     
     return jsonify({"aum_data": aum_data})
 
+@app.route('/api/benchmarks', methods=['GET'])
+def list_benchmarks():
+    # Benchmark codes accepted by the Benchmark/Benchmarks fields, with names
+    names = {code: benchmark["name"] for code, benchmark in benchmarks().items()}
+    return jsonify({"benchmarks": names, "default": DEFAULT_BENCHMARK})
+
+@app.route('/api/aum_quarters', methods=['GET'])
+def aum_quarters():
+    return jsonify({"quarters": list_quarters()})
+
 @app.route('/api/nav_pred', methods=['POST'])
 def nav_pred():
     data = request.get_json()
     mf_name = data.get("MFName")
     from_date = data.get("FromDate")
     to_date = data.get("ToDate")
+    horizon = data.get("Horizon", 14)
+    mode = data.get("Mode")
+    latency_budget_ms = data.get("LatencyBudgetMs")
     
     if not mf_name or not from_date or not to_date:
         return jsonify({"error": "MFName, FromDate, and ToDate are required"}), 400
     
-    predictions, metrics, error = predict_nav(mf_name, from_date, to_date)
+    result, error = forecast_nav(mf_name, from_date, to_date, horizon, mode, latency_budget_ms)
     if error:
-        return jsonify({"error": error}), 404 if "not found" in error else 400 if "Invalid" in error else 500
+        return jsonify({"error": error}), prediction_error_status(error)
+    
+    return jsonify(result)
+
+@app.route('/api/nav_pred/batch', methods=['POST'])
+def nav_pred_batch():
+    data = request.get_json()
+    mf_names = data.get("MFNames")
+    from_date = data.get("FromDate")
+    to_date = data.get("ToDate")
+    horizon = data.get("Horizon", 14)
+    
+    if not mf_names or not isinstance(mf_names, list) or not from_date or not to_date:
+        return jsonify({"error": "MFNames (list), FromDate, and ToDate are required"}), 400
+    if len(mf_names) > MAX_BATCH_FUNDS:
+        return jsonify({"error": f"At most {MAX_BATCH_FUNDS} funds per batch"}), 400
+    
+    results, error = predict_nav_batch(list(dict.fromkeys(mf_names)), from_date, to_date, horizon)
+    if error:
+        return jsonify({"error": error}), prediction_error_status(error)
     
+    failed = sum(1 for result in results.values() if "error" in result)
     return jsonify({
-        "predictions": predictions,
-        "metrics": metrics
+        "results": results,
+        "succeeded": len(results) - failed,
+        "failed": failed
     })
 
+@app.route('/api/nav_pred/backtest', methods=['POST'])
+def nav_pred_backtest():
+    data = request.get_json()
+    mf_name = data.get("MFName")
+    from_date = data.get("FromDate")
+    to_date = data.get("ToDate")
+    horizon = data.get("Horizon", 14)
+    step = data.get("Step", 5)
+    
+    if not mf_name or not from_date or not to_date:
+        return jsonify({"error": "MFName, FromDate, and ToDate are required"}), 400
+    
+    job, error = backtest_nav(mf_name, from_date, to_date, horizon, step)
+    if error:
+        return jsonify({"error": error}), prediction_error_status(error)
+    
+    return jsonify(prediction_job_view(job)), 200 if job["status"] == "done" else 202
+
+@app.route('/api/nav_pred/jobs', methods=['POST'])
+def submit_nav_pred_job():
+    data = request.get_json()
+    mf_name = data.get("MFName")
+    from_date = data.get("FromDate")
+    to_date = data.get("ToDate")
+    horizon = data.get("Horizon", 14)
+    
+    if not mf_name or not from_date or not to_date:
+        return jsonify({"error": "MFName, FromDate, and ToDate are required"}), 400
+    
+    job, error = submit_prediction(mf_name, from_date, to_date, horizon)
+    if error:
+        return jsonify({"error": error}), prediction_error_status(error)
+    
+    return jsonify(prediction_job_view(job)), 200 if job["status"] == "done" else 202
+
+@app.route('/api/nav_pred/jobs/<job_id>', methods=['GET'])
+def get_nav_pred_job(job_id):
+    job, error = get_prediction_job(job_id)
+    if error:
+        return jsonify({"error": error}), 404
+    return jsonify(prediction_job_view(job))
+
+def prediction_error_status(error):
+    if "not found" in error:
+        return 404
+    if "Invalid" in error:
+        return 400
+    if "queue is full" in error:
+        return 429
+    if "still running" in error or "timed out" in error:
+        return 504
+    return 500
+
+@app.route('/api/cache_stats', methods=['GET'])
+def get_cache_stats():
+    return jsonify(dict(cache_stats(), jobs=prediction_jobs.stats()))
+
+@app.route('/api/provider_stats', methods=['GET'])
+def get_provider_stats():
+    return jsonify(provider_stats())
+
 @app.route('/plot/<path:filename>', methods=['GET'])
 def get_plot(filename):
-    return send_file(filename, mimetype='image/png')
+    # Plots are content-addressed, so a given URL never changes and clients
+    # may cache it for as long as they like
+    key = key_from_plot_name(filename)
+    png = plot_cache.get(key) if key else None
+    if png is None:
+        return jsonify({"error": "Plot not found, request the comparison again"}), 404
+    
+    response = Response(png, mimetype='image/png')
+    response.set_etag(key)
+    response.cache_control.public = True
+    response.cache_control.max_age = PLOT_MAX_AGE
+    response.cache_control.immutable = True
+    return response.make_conditional(request)
 
+# Development server; production runs gunicorn -c gunicorn.conf.py main:app
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
@@ -0,0 +1,144 @@
+import numpy as np
+
+# Risk/return analytics over a fund series aligned with a benchmark. Daily log
+# returns of both are turned into prefix sums (of returns, squares, the cross
+# product and the active return) once, so the volatility, beta, alpha, tracking error and
+# correlation of any window come from a few subtractions. Point-to-point
+# returns and CAGR read the two endpoint values directly; the value series is
+# itself the cumulative product of the daily returns. Max drawdown depends on
+# the path inside the window and is a single vectorized pass over it.
+
+TRADING_DAYS = 252
+DAYS_PER_YEAR = 365.25
+
+def align_series(frames):
+    # frames maps a label to a frame with date/value columns; returns the dates
+    # every series has a valid value on and a (dates x labels) matrix
+    columns = {}
+    for label, df in frames.items():
+        values = df["value"].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(values)
+        columns[label] = (df["date"].to_numpy(dtype="datetime64[ns]")[valid], values[valid])
+
+    dates = None
+    for column_dates, _ in columns.values():
+        dates = column_dates if dates is None else np.intersect1d(dates, column_dates, assume_unique=True)
+
+    matrix = np.empty((len(dates), len(columns)), dtype=np.float64)
+    for j, (column_dates, values) in enumerate(columns.values()):
+        matrix[:, j] = values[np.searchsorted(column_dates, dates)]
+    return dates, list(columns), matrix
+
+def prefix_sums(values):
+    # Leading zero so the sum of returns k = i+1 .. j is sums[j] - sums[i]
+    sums = np.zeros(len(values) + 1, dtype=np.float64)
+    np.cumsum(values, out=sums[1:])
+    return sums
+
+def finite(value):
+    return float(value) if np.isfinite(value) else None
+
+def finite_list(values):
+    return [float(v) if np.isfinite(v) else None for v in values]
+
+class ReturnSeries:
+    def __init__(self, dates, fund, benchmark):
+        self.dates = np.asarray(dates, dtype="datetime64[ns]")
+        self.fund = np.asarray(fund, dtype=np.float64)
+        self.benchmark = np.asarray(benchmark, dtype=np.float64)
+        fund_returns = np.diff(np.log(self.fund))
+        benchmark_returns = np.diff(np.log(self.benchmark))
+        self.sum_f = prefix_sums(fund_returns)
+        self.sum_b = prefix_sums(benchmark_returns)
+        self.sum_ff = prefix_sums(fund_returns * fund_returns)
+        self.sum_bb = prefix_sums(benchmark_returns * benchmark_returns)
+        self.sum_fb = prefix_sums(fund_returns * benchmark_returns)
+        # Active return kept separately; var_f + var_b - 2 cov cancels badly
+        # when the fund tracks its benchmark closely
+        active = fund_returns - benchmark_returns
+        self.sum_a = prefix_sums(active)
+        self.sum_aa = prefix_sums(active * active)
+
+    def __len__(self):
+        return len(self.dates)
+
+    def index_range(self, from_dt, to_dt):
+        # First and last observation inside [from_dt, to_dt], or None when the
+        # window holds fewer than two observations
+        i = int(np.searchsorted(self.dates, np.datetime64(from_dt, "ns"), side="left"))
+        j = int(np.searchsorted(self.dates, np.datetime64(to_dt, "ns"), side="right")) - 1
+        return (i, j) if j - i >= 1 else None
+
+    def _moments(self, i, j):
+        # Mean, variances and covariance of daily log returns over (i, j];
+        # works elementwise when i and j are index arrays
+        n = j - i
+        mean_f = (self.sum_f[j] - self.sum_f[i]) / n
+        mean_b = (self.sum_b[j] - self.sum_b[i]) / n
+        mean_a = (self.sum_a[j] - self.sum_a[i]) / n
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scale = n / np.maximum(n - 1, 1)
+            var_f = ((self.sum_ff[j] - self.sum_ff[i]) / n - mean_f * mean_f) * scale
+            var_b = ((self.sum_bb[j] - self.sum_bb[i]) / n - mean_b * mean_b) * scale
+            var_a = ((self.sum_aa[j] - self.sum_aa[i]) / n - mean_a * mean_a) * scale
+            cov = ((self.sum_fb[j] - self.sum_fb[i]) / n - mean_f * mean_b) * scale
+        return mean_f, mean_b, np.maximum(var_f, 0), np.maximum(var_b, 0), cov, np.maximum(var_a, 0)
+
+    def drawdown(self, i, j):
+        values = self.fund[i:j + 1]
+        peaks = np.maximum.accumulate(values)
+        drawdowns = values / peaks - 1
+        trough = int(np.argmin(drawdowns))
+        peak = int(np.argmax(values[:trough + 1]))
+        recovered = np.flatnonzero(values[trough:] >= values[peak])
+        end = trough + int(recovered[0]) if len(recovered) else len(values) - 1
+        days = (self.dates[i + end] - self.dates[i + peak]) // np.timedelta64(1, "D")
+        return {
+            "max_drawdown_percent": float(drawdowns[trough] * 100),
+            "peak_date": self.dates[i + peak],
+            "trough_date": self.dates[i + trough],
+            "recovery_date": self.dates[i + end] if len(recovered) else None,
+            "max_drawdown_duration_days": int(days) if drawdowns[trough] < 0 else 0
+        }
+
+    def window(self, i, j):
+        mean_f, mean_b, var_f, var_b, cov, var_a = self._moments(i, j)
+        years = (self.dates[j] - self.dates[i]) / np.timedelta64(1, "D") / DAYS_PER_YEAR
+        growth = self.fund[j] / self.fund[i]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            beta = cov / var_b
+            correlation = cov / np.sqrt(var_f * var_b)
+        metrics = {
+            "start_date": self.dates[i],
+            "end_date": self.dates[j],
+            "observations": j - i + 1,
+            "return_percent": float((growth - 1) * 100),
+            "benchmark_return_percent": float((self.benchmark[j] / self.benchmark[i] - 1) * 100),
+            "cagr_percent": finite((growth ** (1 / years) - 1) * 100) if years > 0 else None,
+            "volatility_percent": float(np.sqrt(var_f * TRADING_DAYS) * 100),
+            "benchmark_volatility_percent": float(np.sqrt(var_b * TRADING_DAYS) * 100),
+            "beta": finite(beta),
+            "alpha_percent": finite((mean_f - beta * mean_b) * TRADING_DAYS * 100),
+            "tracking_error_percent": float(np.sqrt(var_a * TRADING_DAYS) * 100),
+            "correlation": finite(correlation)
+        }
+        metrics.update(self.drawdown(i, j))
+        return metrics
+
+    def rolling(self, window):
+        # Every trailing window of `window` returns at once: index arrays into
+        # the prefix sums instead of a loop
+        j = np.arange(window, len(self.dates))
+        i = j - window
+        mean_f, mean_b, var_f, var_b, cov, _ = self._moments(i, j)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            beta = cov / var_b
+            correlation = cov / np.sqrt(var_f * var_b)
+        return {
+            "dates": self.dates[j],
+            "return_percent": (self.fund[j] / self.fund[i] - 1) * 100,
+            "benchmark_return_percent": (self.benchmark[j] / self.benchmark[i] - 1) * 100,
+            "volatility_percent": np.sqrt(var_f * TRADING_DAYS) * 100,
+            "beta": beta,
+            "correlation": correlation
+        }
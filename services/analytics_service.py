@@ -0,0 +1,142 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+from .utils import validate_dates, parse_date, DATE_FORMAT
+from .nav_service import get_nav_data, get_nav_data_many, get_nav_derived
+from .benchmark_service import get_benchmark_derived, resolve_benchmark, DEFAULT_BENCHMARK
+from .compare_service import load_benchmarks
+from .analytics import ReturnSeries, align_series, finite_list
+
+# Loads funds and their benchmark once, aligns them and answers window and
+# rolling queries from the precomputed prefix sums in analytics.ReturnSeries.
+# Single-series views (index, drawdown, rolling volatility) slice the derived
+# series maintained on ingest.
+
+PERIODS = {"1M": 30, "3M": 91, "6M": 182, "1Y": 365, "3Y": 3 * 365, "5Y": 5 * 365}
+DEFAULT_ROLLING_WINDOW = 63
+MAX_WINDOWS = 100
+
+def to_json_value(value):
+    if isinstance(value, np.datetime64):
+        return pd.Timestamp(value).strftime(DATE_FORMAT)
+    return value
+
+def load_return_series_many(mf_names, from_date, to_date, benchmark=DEFAULT_BENCHMARK):
+    error = validate_dates(from_date, to_date)
+    if error:
+        return None, error
+    frames, error = load_benchmarks([benchmark], from_date, to_date)
+    if error:
+        return None, error
+    bench_df = frames[benchmark]
+    
+    series = {}
+    for name, (df, error) in get_nav_data_many(mf_names, from_date, to_date).items():
+        if error:
+            series[name] = (None, error)
+            continue
+        dates, _, matrix = align_series({name: df.rename(columns={"nav": "value"}), benchmark: bench_df})
+        if len(dates) < 2:
+            series[name] = (None, f"No overlapping data between fund and {benchmark}")
+        else:
+            series[name] = (ReturnSeries(dates, matrix[:, 0], matrix[:, 1]), None)
+    return series, None
+
+def parse_windows(windows, from_date, to_date):
+    # Windows are trailing periods ("1Y") ending at ToDate or explicit
+    # {"FromDate", "ToDate"} ranges inside the requested range
+    from_dt, to_dt = parse_date(from_date), parse_date(to_date)
+    parsed = []
+    for window in windows or [{"FromDate": from_date, "ToDate": to_date}]:
+        if isinstance(window, str) and window in PERIODS:
+            parsed.append((window, max(from_dt, to_dt - timedelta(days=PERIODS[window])), to_dt))
+            continue
+        if not isinstance(window, dict):
+            return None, f"Invalid window: {window}"
+        try:
+            start, end = parse_date(window["FromDate"]), parse_date(window["ToDate"])
+        except (KeyError, TypeError, ValueError):
+            return None, f"Invalid window: {window}"
+        if start < from_dt or end > to_dt or start >= end:
+            return None, f"Invalid window: {window} must lie inside FromDate..ToDate"
+        parsed.append((f"{window['FromDate']}..{window['ToDate']}", start, end))
+    return parsed, None
+
+def get_analytics(mf_names, from_date, to_date, windows=None, benchmark=DEFAULT_BENCHMARK):
+    if windows is not None and (not isinstance(windows, list) or len(windows) > MAX_WINDOWS):
+        return None, f"Invalid Windows: must be a list of at most {MAX_WINDOWS} windows"
+    benchmark, error = resolve_benchmark(benchmark)
+    if error:
+        return None, error
+    series, error = load_return_series_many(mf_names, from_date, to_date, benchmark)
+    if error:
+        return None, error
+    windows, error = parse_windows(windows, from_date, to_date)
+    if error:
+        return None, error
+    
+    results = {}
+    for name in mf_names:
+        returns, error = series[name]
+        if error:
+            results[name] = {"error": error}
+            continue
+        results[name] = {"windows": []}
+        for label, start, end in windows:
+            indices = returns.index_range(start, end)
+            if indices is None:
+                results[name]["windows"].append({"window": label, "error": "Not enough data in window"})
+                continue
+            metrics = {key: to_json_value(value) for key, value in returns.window(*indices).items()}
+            results[name]["windows"].append(dict(metrics, window=label))
+    return {"benchmark": benchmark, "results": results}, None
+
+def get_rolling_analytics(mf_name, from_date, to_date, window=DEFAULT_ROLLING_WINDOW, benchmark=DEFAULT_BENCHMARK):
+    if isinstance(window, bool) or not isinstance(window, int) or window < 2:
+        return None, "Invalid Window: must be an integer number of trading days of at least 2"
+    benchmark, error = resolve_benchmark(benchmark)
+    if error:
+        return None, error
+    series, error = load_return_series_many([mf_name], from_date, to_date, benchmark)
+    if error:
+        return None, error
+    returns, error = series[mf_name]
+    if error:
+        return None, error
+    if len(returns) <= window:
+        return None, "Not enough data for the rolling window"
+    
+    rolling = returns.rolling(window)
+    return {
+        "benchmark": benchmark,
+        "window": window,
+        "dates": pd.DatetimeIndex(rolling.pop("dates")).strftime(DATE_FORMAT).tolist(),
+        **{key: finite_list(values) for key, values in rolling.items()}
+    }, None
+
+def get_derived_window(mf_name, from_date, to_date, rolling_window=DEFAULT_ROLLING_WINDOW, benchmark=DEFAULT_BENCHMARK):
+    # Without mf_name this is the benchmark's own series
+    if isinstance(rolling_window, bool) or not isinstance(rolling_window, int) or rolling_window < 2:
+        return None, "Invalid Window: must be an integer number of trading days of at least 2"
+    benchmark, error = resolve_benchmark(benchmark)
+    if error:
+        return None, error
+    
+    # Make sure the range is ingested, which also extends the derived series
+    _, error = get_nav_data(mf_name, from_date, to_date) if mf_name else load_benchmarks([benchmark], from_date, to_date)
+    if error:
+        return None, error
+    derived, error = get_nav_derived(mf_name) if mf_name else (get_benchmark_derived(benchmark), None)
+    if error:
+        return None, error
+    
+    indices = derived.index_range(parse_date(from_date), parse_date(to_date))
+    if indices is None:
+        return None, "No data in the requested range"
+    window = derived.window(*indices, rolling_window)
+    return {
+        "series": mf_name or benchmark,
+        "window": rolling_window,
+        "dates": pd.DatetimeIndex(window.pop("dates")).strftime(DATE_FORMAT).tolist(),
+        **{key: finite_list(values) for key, values in window.items()}
+    }, None
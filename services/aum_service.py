@@ -0,0 +1,210 @@
+import re
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from io import StringIO
+import pandas as pd
+from pymongo import UpdateOne
+from db import mf_collection, aum_collection, aum_tables_collection, aum_quarters_collection
+from .config import get_provider
+from .http_client import get_client
+from .storage import parse_value
+
+# AMFI publishes average AUM per AMC per quarter as one table listing every
+# scheme of that AMC, and a published quarter never changes. Each table is
+# therefore fetched once: its rows are stored per (mf_id, quarter) with an
+# indexed, normalised scheme key, and recently used tables are also kept in
+# memory, so repeat and sibling-scheme lookups need no network call.
+#
+# AMFI's Year_Id is a position in its quarter dropdown (1 = latest), so it
+# shifts every quarter. Stored data is keyed by the quarter label and the
+# label -> Year_Id mapping is discovered from the AUM page and refreshed daily.
+
+TABLE_CACHE_SIZE = 256
+QUARTER_TTL = timedelta(days=1)
+SEEDED_QUARTERS = {
+    "January - March 2025": "1",
+    "October - December 2024": "2",
+    "July - September 2024": "3",
+    "April - June 2024": "4",
+}
+QUARTER_OPTION = re.compile(
+    r'<option[^>]*value="(\d+)"[^>]*>\s*([A-Za-z]+ - [A-Za-z]+ \d{4})\s*</option>', re.IGNORECASE
+)
+
+_tables = OrderedDict()
+_tables_lock = threading.Lock()
+_quarters = {"ids": None, "loaded_at": None, "refreshing": False}
+_quarters_lock = threading.Lock()
+
+def normalize_scheme(name):
+    return " ".join(str(name).lower().split())
+
+def discover_quarters():
+    provider = get_provider("amfi_aum_quarters")
+    response = get_client().get(provider["url"], headers=provider.get("headers"))
+    if response.status_code != 200:
+        return None
+    quarter_ids = {label: year_id for year_id, label in QUARTER_OPTION.findall(response.text)}
+    if not quarter_ids:
+        return None
+    now = datetime.now()
+    aum_quarters_collection.bulk_write([
+        UpdateOne({"quarter": label}, {"$set": {"year_id": year_id, "discovered_at": now}}, upsert=True)
+        for label, year_id in quarter_ids.items()
+    ], ordered=False)
+    return quarter_ids
+
+def load_quarter_ids():
+    stale_before = datetime.now() - QUARTER_TTL
+    stored = list(aum_quarters_collection.find({"discovered_at": {"$gte": stale_before}}, {"_id": 0}))
+    quarter_ids = {doc["quarter"]: doc["year_id"] for doc in stored}
+    if not quarter_ids:
+        try:
+            quarter_ids = discover_quarters()
+        except Exception as e:
+            print(f"Error discovering AUM quarters: {e}")
+            quarter_ids = None
+    if not quarter_ids:
+        # Keep serving the last known mapping rather than failing outright
+        quarter_ids = {doc["quarter"]: doc["year_id"] for doc in aum_quarters_collection.find({}, {"_id": 0})}
+        quarter_ids = quarter_ids or dict(SEEDED_QUARTERS)
+    return quarter_ids
+
+def get_quarter_ids():
+    # The lock only guards the in-memory mapping; discovery runs outside it.
+    # While one request refreshes a stale mapping the others keep using it.
+    with _quarters_lock:
+        ids = _quarters["ids"]
+        if ids and (datetime.now() - _quarters["loaded_at"] < QUARTER_TTL or _quarters["refreshing"]):
+            return ids
+        _quarters["refreshing"] = True
+    try:
+        quarter_ids = load_quarter_ids()
+    except Exception:
+        with _quarters_lock:
+            _quarters["refreshing"] = False
+        raise
+    with _quarters_lock:
+        _quarters.update(ids=quarter_ids, loaded_at=datetime.now(), refreshing=False)
+    return quarter_ids
+
+def list_quarters():
+    return list(get_quarter_ids())
+
+def scrape_aum_table(mf_id, year_id, year_quarter):
+    provider = get_provider("amfi_aum")
+    payload = {
+        "AUmType": "S",
+        "AumCatType": "Typewise",
+        "MF_Id": str(mf_id),
+        "Year_Id": year_id,
+        "Year_Quarter": year_quarter
+    }
+    
+    response = get_client().post(provider["url"], data=payload, headers=provider["headers"])
+    if response.status_code != 200:
+        return None, "Failed to fetch AUM data from AMFI"
+    
+    tables = pd.read_html(StringIO(response.text))
+    if not tables:
+        return None, "No AUM data tables found"
+    
+    df = tables[0]
+    df.columns = [' '.join(col).strip() if isinstance(col, tuple) else col for col in df.columns]
+    
+    scheme_col = next((col for col in df.columns if "Scheme NAV Name" in col), None)
+    aum_col = next((col for col in df.columns if "Average AUM for The Month" in col and "Fund Of Funds" not in col), None)
+    
+    if not scheme_col or not aum_col:
+        return None, "Required AUM columns not found"
+    
+    df = df[df[scheme_col].notna()]
+    rows = [
+        {"scheme": str(scheme), "scheme_key": normalize_scheme(scheme), "aum_lakhs": parse_value(aum)}
+        for scheme, aum in zip(df[scheme_col], df[aum_col])
+    ]
+    # An empty table is usually a quarter AMFI has not published yet; report it
+    # instead of storing it so the next request fetches again
+    if not rows:
+        return None, f"No AUM data available for: {year_quarter}"
+    return rows, None
+
+def store_aum_table(mf_id, year_quarter, rows):
+    if not rows:
+        return
+    aum_collection.bulk_write([
+        UpdateOne(
+            {"mf_id": mf_id, "quarter": year_quarter, "scheme_key": row["scheme_key"]},
+            {"$setOnInsert": {"scheme": row["scheme"], "aum_lakhs": row["aum_lakhs"], "position": position}},
+            upsert=True
+        )
+        for position, row in enumerate(rows)
+    ], ordered=False)
+    # The table marker is written last so a partial bulk write is fetched again
+    aum_tables_collection.update_one(
+        {"mf_id": mf_id, "quarter": year_quarter},
+        {"$set": {"schemes": len(rows), "fetched_at": datetime.now()}},
+        upsert=True
+    )
+
+def cache_table(mf_id, year_quarter, rows):
+    with _tables_lock:
+        _tables[(mf_id, year_quarter)] = rows
+        _tables.move_to_end((mf_id, year_quarter))
+        while len(_tables) > TABLE_CACHE_SIZE:
+            _tables.popitem(last=False)
+
+def load_aum_table(mf_id, year_quarter):
+    with _tables_lock:
+        rows = _tables.get((mf_id, year_quarter))
+        if rows is not None:
+            _tables.move_to_end((mf_id, year_quarter))
+            return rows, None
+    
+    # Markers with no schemes were left by empty fetches and are not final
+    if aum_tables_collection.find_one({"mf_id": mf_id, "quarter": year_quarter, "schemes": {"$gt": 0}}):
+        rows = list(aum_collection.find(
+            {"mf_id": mf_id, "quarter": year_quarter},
+            {"_id": 0, "scheme": 1, "scheme_key": 1, "aum_lakhs": 1}
+        ).sort("position", 1))
+    else:
+        year_id = get_quarter_ids().get(year_quarter)
+        if not year_id:
+            return None, f"Invalid Year_Quarter: {year_quarter}"
+        rows, error = scrape_aum_table(mf_id, year_id, year_quarter)
+        if error:
+            return None, error
+        store_aum_table(mf_id, year_quarter, rows)
+    
+    cache_table(mf_id, year_quarter, rows)
+    return rows, None
+
+def find_scheme(rows, mf_name):
+    # Exact scheme name first, otherwise the first scheme containing the name
+    key = normalize_scheme(mf_name)
+    exact = next((row for row in rows if row["scheme_key"] == key), None)
+    return exact or next((row for row in rows if key in row["scheme_key"]), None)
+
+def get_aum_data(mf_name, year_quarter):
+    mf = mf_collection.find_one({"fund": mf_name})
+    if not mf:
+        return None, "Mutual Fund not found"
+    
+    mf_id = mf["mfID"]
+    
+    try:
+        rows, error = load_aum_table(mf_id, year_quarter)
+        if error:
+            return None, error
+        
+        match = find_scheme(rows, mf_name)
+        if not match:
+            return None, f"Scheme not found: {mf_name}"
+        if match["aum_lakhs"] is None:
+            return None, f"AUM not available for: {mf_name}"
+        
+        return {"fund": mf_name, "year_quarter": year_quarter, "aum_lakhs": match["aum_lakhs"]}, None
+    
+    except Exception as e:
+        return None, f"Error fetching AUM data: {str(e)}"
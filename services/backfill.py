@@ -0,0 +1,90 @@
+import argparse
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from db import mf_collection, backfill_collection
+from .nav_service import fetch_nav_range
+from .benchmark_service import fetch_benchmarks_range, benchmarks
+
+# Backfills every scheme in mf_collection, and every configured benchmark, over the
+# five-year window validate_dates allows. Only intervals missing from coverage
+# are scraped; schemes run on a bounded worker pool and writes go through the
+# bulk upsert path. Completed codes are checkpointed on the run document, so an
+# interrupted run resumes where it stopped.
+#   python -m services.backfill [--workers 8] [--fresh]
+
+def backfill_window():
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    return today - timedelta(days=5 * 365), today
+
+def start_run(fresh):
+    if not fresh:
+        run = backfill_collection.find_one({"finished": None}, sort=[("started", -1)])
+        if run:
+            print(f"Resuming backfill started {run['started']:%d-%b-%Y %H:%M}, {len(run['done'])} codes done")
+            return run
+    from_dt, to_dt = backfill_window()
+    run = {"from": from_dt, "to": to_dt, "started": datetime.now(), "finished": None, "done": []}
+    run["_id"] = backfill_collection.insert_one(run).inserted_id
+    return run
+
+def backfill_code(run, code, fetch):
+    stats = fetch(run["from"], run["to"])
+    if stats["failed"] == 0:
+        backfill_collection.update_one({"_id": run["_id"]}, {"$addToSet": {"done": code}})
+    return code, stats
+
+def run_backfill(workers, fresh=False):
+    run = start_run(fresh)
+    done = set(run["done"])
+    tasks = []
+    for mf in mf_collection.find({}, {"mfID": 1, "scID": 1}):
+        code = f"{mf['mfID']}@{mf['scID']}"
+        if code not in done:
+            tasks.append((code, lambda f, t, mf=mf: fetch_nav_range(mf["mfID"], mf["scID"], f, t, max_workers=1)))
+    for code in benchmarks():
+        if code not in done:
+            tasks.append((code, lambda f, t, code=code: fetch_benchmarks_range([code], f, t, max_workers=1)))
+
+    print(f"Backfilling {len(tasks)} codes from {run['from']:%d-%b-%Y} to {run['to']:%d-%b-%Y} with {workers} workers")
+    started = time.perf_counter()
+    rows = chunks = 0
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(backfill_code, run, code, fetch) for code, fetch in tasks]
+        for completed, future in enumerate(as_completed(futures), 1):
+            code, stats = future.result()
+            rows += stats["rows"]
+            chunks += stats["chunks"]
+            if stats["failed"]:
+                failed.append(code)
+            print(f"[{completed}/{len(tasks)}] {code}: {stats['rows']} rows in {stats['chunks']} chunks"
+                  + (f", {stats['failed']} failed" if stats["failed"] else ""))
+    elapsed = time.perf_counter() - started
+
+    if not failed:
+        backfill_collection.update_one({"_id": run["_id"]}, {"$set": {"finished": datetime.now()}})
+    summary = {
+        "codes": len(tasks),
+        "chunks": chunks,
+        "rows": rows,
+        "failed": failed,
+        "seconds": elapsed,
+        "schemesPerSecond": len(tasks) / elapsed if elapsed else None,
+        "rowsPerSecond": rows / elapsed if elapsed else None
+    }
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill NAV and benchmark history for every scheme")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--fresh", action="store_true", help="start a new run instead of resuming")
+    args = parser.parse_args()
+
+    summary = run_backfill(args.workers, args.fresh)
+    print(
+        f"Backfilled {summary['codes']} codes, {summary['rows']} rows in {summary['seconds']:.1f}s "
+        f"({summary['schemesPerSecond'] or 0:.2f} schemes/s, {summary['rowsPerSecond'] or 0:.1f} rows/s)"
+    )
+    if summary["failed"]:
+        print(f"Failed (rerun to resume): {', '.join(summary['failed'])}")
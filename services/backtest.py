@@ -0,0 +1,170 @@
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+import numpy as np
+from statsmodels.tsa.arima.model import ARIMA
+from .forecasting import MODEL_CONFIG, fit_hybrid, recursive_residual_forecast
+
+# Walk-forward backtest of the hybrid ARIMA+XGBoost model. The model is fitted
+# once on the usual training split; every later origin reuses the fitted
+# parameters and only runs the Kalman filter over the newly observed days
+# (ARIMAResults.extend), so an origin costs a filter update and a forecast
+# instead of a full refit. The XGBoost residual model stays fixed.
+#
+# Origins are split into contiguous blocks that run in parallel; each block
+# re-filters the history up to its first origin with the fitted params. The
+# API runs a backtest as one two-stage prediction job (base fit, then the
+# blocks on the same pool), so it shares the job pool's queue limit and
+# timeout with forecasts. The command line uses its own process pool.
+#   python -m services.backtest "Fund A" "Fund B" --from 01-Jan-2020 --to 31-Dec-2024
+
+DEFAULT_STEP = 5
+MAX_ORIGINS = 500
+BACKTEST_TIMEOUT = 600
+
+def walk_forward_origins(n_obs, train_size, horizon, step=DEFAULT_STEP, max_origins=MAX_ORIGINS):
+    # Forecast origins are the index of the first unseen day; the last one
+    # still leaves a full horizon of actuals to score against
+    origins = np.arange(train_size, n_obs - horizon + 1, step)
+    return origins[-max_origins:] if max_origins else origins
+
+def fit_base(df, config):
+    model = fit_hybrid(df, config)
+    return {"params": model["arima_fit"].params.to_numpy(), "xgb_model": model["xgb_model"]}
+
+def backtest_block(nav, base, order, origins, horizon):
+    # Runs in a worker process; returns forecast errors and actuals with one
+    # row per origin and one column per horizon step
+    booster = base["xgb_model"].get_booster()
+    values = nav.to_numpy(dtype=np.float64)
+    position = int(origins[0])
+    arima = ARIMA(nav.iloc[:position], order=order).filter(base["params"])
+
+    errors = np.empty((len(origins), horizon), dtype=np.float64)
+    actuals = np.empty((len(origins), horizon), dtype=np.float64)
+    for i, origin in enumerate(origins):
+        if origin > position:
+            arima = arima.extend(nav.iloc[position:origin])
+            position = int(origin)
+        arima_future = np.asarray(arima.forecast(steps=horizon), dtype=np.float64)
+        predicted = recursive_residual_forecast(booster, values[:origin], arima_future)
+        actuals[i] = values[origin:origin + horizon]
+        errors[i] = predicted - actuals[i]
+    return errors, actuals
+
+def horizon_metrics(errors, actuals):
+    # Same definitions as the split metrics in fit_hybrid, per horizon step
+    mean_actual = actuals.mean(axis=0)
+    rmse = np.sqrt((errors ** 2).mean(axis=0)) / mean_actual * 100
+    mae = np.abs(errors).mean(axis=0) / mean_actual * 100
+    return [
+        {"horizon": h + 1, "rmse_percent": float(rmse[h]), "mae_percent": float(mae[h])}
+        for h in range(errors.shape[1])
+    ]
+
+def backtest_result(df, origins, errors, actuals):
+    per_horizon = horizon_metrics(errors, actuals)
+    return {
+        "origins": len(errors),
+        "firstOrigin": df.index[origins[0]].strftime("%d-%b-%Y"),
+        "horizons": per_horizon,
+        "metrics": {
+            "rmse_percent": float(np.mean([h["rmse_percent"] for h in per_horizon])),
+            "mae_percent": float(np.mean([h["mae_percent"] for h in per_horizon]))
+        }
+    }
+
+def origin_blocks(origins, workers):
+    return np.array_split(origins, min(workers, len(origins)))
+
+def merge_blocks(df, origins, parts):
+    # parts are backtest_block results for consecutive blocks of origins
+    errors = np.vstack([p[0] for p in parts])
+    actuals = np.vstack([p[1] for p in parts])
+    return backtest_result(df, origins, errors, actuals)
+
+def run_backtests(series, config=MODEL_CONFIG, horizon=None, step=DEFAULT_STEP, max_origins=MAX_ORIGINS, timeout=BACKTEST_TIMEOUT):
+    # series maps a name to a preprocessed daily frame; returns per-name
+    # results or errors plus overall throughput
+    horizon = horizon or config["horizon"]
+    workers = os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        return fan_out(pool, workers, series, config, horizon, step, max_origins, timeout)
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+def fan_out(pool, workers, series, config, horizon, step, max_origins, timeout):
+    started = time.monotonic()
+    plans = {}
+    results = {}
+    for name, df in series.items():
+        train_size = int(config["train_fraction"] * len(df))
+        origins = walk_forward_origins(len(df), train_size, horizon, step, max_origins)
+        if not len(origins):
+            results[name] = {"error": "Insufficient data for backtest"}
+            continue
+        plans[name] = {"df": df, "origins": origins, "base": pool.submit(fit_base, df, config)}
+
+    # Fan each fund's origins out once its base fit is done
+    blocks = {}
+    for name, plan in plans.items():
+        try:
+            base = plan["base"].result(timeout=max(0, timeout - (time.monotonic() - started)))
+        except Exception as e:
+            results[name] = {"error": f"Error in backtest: {str(e)}"}
+            continue
+        blocks[name] = [
+            pool.submit(backtest_block, plan["df"]["nav"], base, tuple(config["arima_order"]), chunk, horizon)
+            for chunk in origin_blocks(plan["origins"], workers)
+        ]
+
+    wait([f for futures in blocks.values() for f in futures], timeout=max(0, timeout - (time.monotonic() - started)))
+    folds = 0
+    for name, futures in blocks.items():
+        try:
+            parts = [f.result(timeout=0) for f in futures]
+        except Exception as e:
+            results[name] = {"error": f"Error in backtest: {str(e)}"}
+            continue
+        results[name] = merge_blocks(plans[name]["df"], plans[name]["origins"], parts)
+        folds += results[name]["origins"]
+
+    seconds = time.monotonic() - started
+    return {
+        "results": results,
+        "folds": folds,
+        "seconds": seconds,
+        "foldsPerSecond": folds / seconds if seconds else None
+    }
+
+def main():
+    from .nav_service import get_nav_data_many, build_prediction
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the NAV forecaster")
+    parser.add_argument("funds", nargs="+")
+    parser.add_argument("--from", dest="from_date", required=True)
+    parser.add_argument("--to", dest="to_date", required=True)
+    parser.add_argument("--horizon", type=int, default=MODEL_CONFIG["horizon"])
+    parser.add_argument("--step", type=int, default=DEFAULT_STEP)
+    parser.add_argument("--max-origins", type=int, default=MAX_ORIGINS)
+    args = parser.parse_args()
+
+    series = {}
+    for name, (df, error) in get_nav_data_many(args.funds, args.from_date, args.to_date).items():
+        spec, error = (None, error) if error else build_prediction(name, df, args.horizon)
+        if error:
+            print(f"{name}: {error}")
+        else:
+            series[name] = spec["df"]
+
+    summary = run_backtests(series, horizon=args.horizon, step=args.step, max_origins=args.max_origins)
+    for name, result in summary["results"].items():
+        if "error" in result:
+            print(f"{name}: {result['error']}")
+        else:
+            print(f"{name}: {result['origins']} origins, RMSE {result['metrics']['rmse_percent']:.2f}%, MAE {result['metrics']['mae_percent']:.2f}%")
+    print(f"{summary['folds']} folds in {summary['seconds']:.1f}s ({summary['foldsPerSecond'] or 0:.1f} folds/s)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from db import nifty_collection
+from .utils import validate_dates, parse_date, format_date, DATE_FORMAT
+from .storage import insert_rows
+from .cache import benchmark_cache, load_cached_series, load_cached_series_many
+from .derived import benchmark_derived, load_derived
+from .config import get_provider
+from .http_client import get_client
+from .coverage import plan_fetches, record_coverage
+
+# Benchmark index closes from Yahoo Finance (or the local stand-in's closes
+# endpoint), keyed by the codes configured in providers.json (NIFTY50,
+# NIFTYMIDCAP150, ...). Every index is stored in the nifty_data collection
+# under its code and goes through the same coverage, series cache and derived
+# series as the Nifty 50 always did. Codes that need the same missing range
+# are downloaded together in one multi-ticker call.
+
+DEFAULT_BENCHMARK = "NIFTY50"
+# Longest run of weekday market holidays; an empty download over more past
+# weekdays than this means the provider failed (yfinance does not raise on
+# network errors, it returns no rows)
+MAX_HOLIDAY_WEEKDAYS = 3
+
+def benchmarks():
+    return get_provider("yahoo")["benchmarks"]
+
+def resolve_benchmark(name):
+    # Accepts a benchmark code or its Yahoo ticker
+    configured = benchmarks()
+    if name in configured:
+        return name, None
+    for code, benchmark in configured.items():
+        if benchmark["ticker"] == name:
+            return code, None
+    return None, f"Invalid Benchmark: must be one of {', '.join(configured)}"
+
+def benchmark_name(code):
+    return benchmarks()[code]["name"]
+
+def close_rows(closes):
+    closes = closes.dropna()
+    return [
+        {"date": date, "close": close}
+        for date, close in zip(closes.index.to_pydatetime(), closes.to_numpy(dtype=np.float64).tolist())
+    ]
+
+def weekdays_before_today(from_date, to_date):
+    start = parse_date(from_date).date()
+    end = min(parse_date(to_date).date() + timedelta(days=1), datetime.now().date())
+    return int(np.busday_count(start, end)) if start < end else 0
+
+def download_closes(provider, tickers, from_date, to_date):
+    # Closes as a (date x ticker) frame, or None when the provider failed
+    if provider["source"] == "http":
+        response = get_client().get(provider["url"], params={"symbols": ",".join(tickers), "from": from_date, "to": to_date})
+        if response.status_code != 200:
+            print(f"Error downloading closes for {', '.join(tickers)}: HTTP {response.status_code}")
+            return None
+        data = response.json()
+        return pd.DataFrame(data["closes"], index=pd.to_datetime(data["dates"], format=DATE_FORMAT), dtype=np.float64)
+
+    # yfinance treats end as exclusive; both bounds are inclusive here
+    frame = yf.download(tickers, start=parse_date(from_date), end=parse_date(to_date) + timedelta(days=1), interval="1d", progress=False)
+    if frame.empty:
+        return pd.DataFrame()
+    closes = frame["Close"]
+    if isinstance(closes, pd.Series):
+        closes = closes.to_frame(tickers[0])
+    return closes
+
+def scrape_benchmark_history(codes, from_date, to_date):
+    # One download for all codes; returns rows per code, or None on failure.
+    # A code with no closes over more weekdays than a holiday run maps to
+    # None as well.
+    provider = get_provider("yahoo")
+    tickers = {provider["benchmarks"][code]["ticker"]: code for code in codes}
+    try:
+        closes = download_closes(provider, list(tickers), from_date, to_date)
+        if closes is None:
+            return None
+        rows = {code: close_rows(closes[ticker]) if ticker in closes.columns else [] for ticker, code in tickers.items()}
+    except Exception as e:
+        print(f"Error scraping benchmark data for {', '.join(codes)}: {str(e)}")
+        return None
+    if weekdays_before_today(from_date, to_date) > MAX_HOLIDAY_WEEKDAYS:
+        for code, code_rows in rows.items():
+            if not code_rows:
+                print(f"Error scraping benchmark data for {code}: no closes for {from_date} to {to_date}")
+                rows[code] = None
+    return rows
+
+def add_benchmark_data(code, rows):
+    series = insert_rows(nifty_collection, code, rows, "close")
+    benchmark_cache.extend(code, series)
+    benchmark_derived.extend(code, series)
+    return series
+
+def fetch_benchmarks_range(codes, from_dt, to_dt, max_workers=None):
+    # Download and store whatever part of [from_dt, to_dt] is not covered yet
+    # for each code; codes missing the same chunk share one provider call
+    provider = get_provider("yahoo")
+    groups = defaultdict(list)
+    for code in codes:
+        for chunk in plan_fetches(code, from_dt, to_dt, provider["maxDaysPerRequest"]):
+            groups[chunk].append(code)
+    if not groups:
+        return {"chunks": 0, "failed": 0, "rows": 0}
+
+    def run(item):
+        # Coverage is only recorded for codes whose closes were stored, so
+        # failed ones are fetched again next time; an empty holiday range is
+        # recorded provisionally
+        (start, end), chunk_codes = item
+        try:
+            rows = scrape_benchmark_history(chunk_codes, format_date(start), format_date(end))
+            if rows is None:
+                return None
+            count = 0
+            for code in chunk_codes:
+                if rows[code] is None:
+                    continue
+                count += len(add_benchmark_data(code, rows[code]))
+                record_coverage(code, start, end, provisional=not rows[code])
+        except Exception as e:
+            print(f"Error fetching {', '.join(chunk_codes)} {start:%d-%b-%Y}..{end:%d-%b-%Y}: {e}")
+            return None
+        return None if any(rows[code] is None for code in chunk_codes) else count
+
+    workers = min(max_workers or provider["maxConcurrentRequests"], len(groups))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(run, groups.items()))
+    return {
+        "chunks": len(groups),
+        "failed": results.count(None),
+        "rows": sum(rows for rows in results if rows is not None)
+    }
+
+def get_benchmarks_data(codes, from_date, to_date):
+    # Frames with Date/Close columns per code, loaded together
+    error = validate_dates(from_date, to_date)
+    if error:
+        return None, error
+    resolved = []
+    for name in codes:
+        code, error = resolve_benchmark(name)
+        if error:
+            return None, error
+        resolved.append(code)
+
+    codes = list(dict.fromkeys(resolved))
+    from_dt = parse_date(from_date)
+    to_dt = parse_date(to_date)
+    fetch_benchmarks_range(codes, from_dt, to_dt)
+    series = load_cached_series_many(benchmark_cache, nifty_collection, set(codes), from_dt, to_dt, "close")
+    for code in codes:
+        if not len(series[code]):
+            return None, f"Failed to fetch {benchmark_name(code)} data"
+    return {code: series[code].to_frame("Date", "Close") for code in codes}, None
+
+def get_benchmark_data(code, from_date, to_date):
+    frames, error = get_benchmarks_data([code], from_date, to_date)
+    if error:
+        return None, error
+    return next(iter(frames.values())), None
+
+def list_benchmark_data(code, from_date, to_date):
+    series = load_cached_series(benchmark_cache, nifty_collection, code, parse_date(from_date), parse_date(to_date), "close")
+    return series.to_frame("Date", "Close")
+
+def get_benchmark_derived(code):
+    return load_derived(benchmark_derived, nifty_collection, code, "close")
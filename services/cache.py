@@ -0,0 +1,151 @@
+import threading
+import time
+from collections import OrderedDict
+from .storage import load_series, load_series_many
+from .model_cache import model_cache
+from .plots import plot_cache
+from .derived import nav_derived, benchmark_derived
+
+# In-process cache of parsed series. Each entry holds every stored row of a
+# code inside a [from_dt, to_dt] window, so any range inside that window is a
+# binary-search slice instead of a Mongo round-trip. Historical rows never
+# change; the TTL only bounds how long rows written by other processes can go
+# unseen. Loads run outside the lock, so every extend() bumps a per-code
+# generation and a load that started before the latest extend is not cached
+# (it may be missing the rows that extend() added).
+
+class SeriesCache:
+    def __init__(self, max_entries=256, ttl_seconds=1800):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.extensions = 0
+        self.evictions = 0
+        self.stale_loads = 0
+        self._generations = {}
+
+    def _live_entry(self, code):
+        entry = self._entries.get(code)
+        if entry and time.monotonic() - entry["loaded_at"] > self.ttl_seconds:
+            del self._entries[code]
+            self.evictions += 1
+            return None
+        return entry
+
+    def get(self, code, from_dt, to_dt):
+        with self._lock:
+            entry = self._live_entry(code)
+            if entry and entry["from_dt"] <= from_dt and to_dt <= entry["to_dt"]:
+                self._entries.move_to_end(code)
+                self.hits += 1
+                return entry["series"].slice(from_dt, to_dt)
+            self.misses += 1
+            return None
+
+    def window(self, code, from_dt, to_dt):
+        # Range to load so that a refreshed entry still covers what is cached,
+        # plus the generation to hand back to put()
+        with self._lock:
+            generation = self._generations.get(code, 0)
+            entry = self._live_entry(code)
+            if not entry:
+                return from_dt, to_dt, generation
+            return min(entry["from_dt"], from_dt), max(entry["to_dt"], to_dt), generation
+
+    def put(self, code, series, from_dt, to_dt, generation):
+        with self._lock:
+            if self._generations.get(code, 0) != generation:
+                self.stale_loads += 1
+                return
+            self._entries[code] = {
+                "series": series,
+                "from_dt": from_dt,
+                "to_dt": to_dt,
+                "loaded_at": time.monotonic()
+            }
+            self._entries.move_to_end(code)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def extend(self, code, series):
+        # Merge freshly ingested rows into a cached entry; rows outside the
+        # entry's window are picked up when the window grows
+        if not len(series):
+            return
+        with self._lock:
+            self._generations[code] = self._generations.get(code, 0) + 1
+            entry = self._entries.get(code)
+            if not entry:
+                return
+            rows = series.slice(entry["from_dt"], entry["to_dt"])
+            if len(rows):
+                entry["series"] = entry["series"].merge(rows)
+                self.extensions += 1
+
+    def invalidate(self, code=None):
+        with self._lock:
+            if code is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(code, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hitRate": self.hits / lookups if lookups else None,
+                "extensions": self.extensions,
+                "evictions": self.evictions,
+                "staleLoads": self.stale_loads
+            }
+
+nav_cache = SeriesCache()
+benchmark_cache = SeriesCache(max_entries=32)
+
+def load_cached_series(cache, collection, code, from_dt, to_dt, value_field):
+    series = cache.get(code, from_dt, to_dt)
+    if series is not None:
+        return series
+    
+    window_from, window_to, generation = cache.window(code, from_dt, to_dt)
+    series = load_series(collection, code, window_from, window_to, value_field)
+    cache.put(code, series, window_from, window_to, generation)
+    return series.slice(from_dt, to_dt)
+
+def load_cached_series_many(cache, collection, codes, from_dt, to_dt, value_field):
+    series = {}
+    missing = []
+    for code in codes:
+        cached = cache.get(code, from_dt, to_dt)
+        if cached is not None:
+            series[code] = cached
+        else:
+            missing.append(code)
+    if not missing:
+        return series
+    
+    # Load every miss in one query over the union of their windows
+    windows = {code: cache.window(code, from_dt, to_dt) for code in missing}
+    window_from = min(w[0] for w in windows.values())
+    window_to = max(w[1] for w in windows.values())
+    for code, loaded in load_series_many(collection, missing, window_from, window_to, value_field).items():
+        cache.put(code, loaded, window_from, window_to, windows[code][2])
+        series[code] = loaded.slice(from_dt, to_dt)
+    return series
+
+def cache_stats():
+    return {
+        "nav": nav_cache.stats(),
+        "benchmarks": benchmark_cache.stats(),
+        "models": model_cache.stats(),
+        "plots": plot_cache.stats(),
+        "derived": {"nav": nav_derived.stats(), "benchmarks": benchmark_derived.stats()}
+    }
@@ -0,0 +1,174 @@
+import re
+import numpy as np
+import pandas as pd
+from .nav_service import get_nav_data, get_nav_data_many
+from .benchmark_service import get_benchmarks_data, benchmark_name, DEFAULT_BENCHMARK
+from .plots import plot_cache, plot_key, render_line_plot
+from .downsample import downsample_rows, min_points
+from .analytics import align_series, finite, finite_list, TRADING_DAYS
+
+# NAV vs benchmark comparison: aligns both series on common dates, normalizes
+# them to 100 and renders the comparison plot through the plot cache. The
+# matrix form loads N funds and the benchmarks in one batch, aligns them into
+# a single date x series matrix and computes everything on that matrix.
+
+PLOT_PREFIX = "comparison_"
+PLOT_KEY = re.compile(r"[0-9a-f]{64}")
+
+def plot_name(key):
+    return f"{PLOT_PREFIX}{key}.png"
+
+def key_from_plot_name(name):
+    # Keys are sha256 hex digests; anything else (e.g. a path) is not a plot
+    if not name.startswith(PLOT_PREFIX) or not name.endswith(".png"):
+        return None
+    key = name[len(PLOT_PREFIX):-len(".png")]
+    return key if PLOT_KEY.fullmatch(key) else None
+
+def max_points_error(max_points, series_count):
+    # Downsampling keeps at least one interior row per series
+    minimum = min_points(series_count)
+    if max_points is not None and (isinstance(max_points, bool) or not isinstance(max_points, int) or max_points < minimum):
+        return f"Invalid MaxPoints: must be an integer of at least {minimum}"
+    return None
+
+def get_comparison(mf_name, from_date, to_date, max_points=None, benchmark=DEFAULT_BENCHMARK):
+    error = max_points_error(max_points, 2)
+    if error:
+        return None, error
+    
+    # Fetch MF data
+    mf_df, mf_error = get_nav_data(mf_name, from_date, to_date)
+    if mf_error:
+        return None, mf_error
+    
+    # Fetch benchmark data (Nifty 50 unless another index is asked for)
+    frames, nifty_error = get_benchmarks_data([benchmark], from_date, to_date)
+    if nifty_error:
+        return None, nifty_error
+    benchmark, nifty_df = next(iter(frames.items()))
+    
+    # Align datasets by date
+    aligned_df = pd.merge(mf_df[["date", "nav"]], nifty_df[["Date", "Close"]], 
+                          left_on="date", right_on="Date", how="inner")
+    if aligned_df.empty:
+        return None, f"No overlapping data between MF and {benchmark_name(benchmark)}"
+    
+    aligned_df = aligned_df.drop(columns=["Date"])
+    aligned_df = aligned_df.rename(columns={"date": "Date", "nav": "NAV"})
+    
+    # Normalize data (start at 100)
+    aligned_df["nav_norm"] = (aligned_df["NAV"] / aligned_df["NAV"].iloc[0]) * 100
+    aligned_df["nifty_norm"] = (aligned_df["Close"] / aligned_df["Close"].iloc[0]) * 100
+    
+    # Calculate correlation on the full-resolution data; a constant series
+    # has none (NaN), reported as null
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = finite(aligned_df["NAV"].corr(aligned_df["Close"]))
+    
+    # Downsample the rows returned and drawn, keeping the shape of both lines
+    total_points = len(aligned_df)
+    rows = downsample_rows(
+        aligned_df["Date"].to_numpy(dtype="datetime64[ns]").astype("int64"),
+        [aligned_df["nav_norm"].to_numpy(), aligned_df["nifty_norm"].to_numpy()],
+        max_points
+    )
+    aligned_df = aligned_df.iloc[rows].reset_index(drop=True)
+    
+    # Visualize; the key covers everything drawn, so a hit skips matplotlib
+    key = plot_key(
+        "compare_mf_nifty", mf_name, benchmark, from_date, to_date, max_points,
+        aligned_df["Date"].to_numpy(dtype="datetime64[ns]"),
+        aligned_df["NAV"].to_numpy(dtype="float64"),
+        aligned_df["Close"].to_numpy(dtype="float64")
+    )
+    png = plot_cache.get_or_render(key, lambda: render_line_plot(
+        aligned_df["Date"],
+        [(f"{mf_name} (Normalized NAV)", aligned_df["nav_norm"]), (f"{benchmark_name(benchmark)} (Normalized)", aligned_df["nifty_norm"])],
+        f"Comparison: {mf_name} vs {benchmark_name(benchmark)}",
+        "Normalized Value (Base = 100)"
+    ))
+    
+    return {"aligned": aligned_df, "benchmark": benchmark, "total_points": total_points, "correlation": correlation, "plot_key": key, "png": png}, None
+
+def load_benchmarks(names, from_date, to_date):
+    # date/value frames keyed by benchmark code, fetched in one batch
+    frames, error = get_benchmarks_data(names, from_date, to_date)
+    if error:
+        return None, error
+    return {code: df.rename(columns={"Date": "date", "Close": "value"}) for code, df in frames.items()}, None
+
+def series_stats(matrix):
+    # Per-column total return, annualized volatility of daily returns and the
+    # deepest fall from a running peak, all in percent
+    returns = np.diff(matrix, axis=0) / matrix[:-1]
+    drawdowns = matrix / np.maximum.accumulate(matrix, axis=0) - 1
+    return {
+        "return_percent": (matrix[-1] / matrix[0] - 1) * 100,
+        "volatility_percent": returns.std(axis=0, ddof=1) * np.sqrt(TRADING_DAYS) * 100,
+        "max_drawdown_percent": drawdowns.min(axis=0) * 100
+    }
+
+def get_comparison_matrix(mf_names, from_date, to_date, benchmarks=(DEFAULT_BENCHMARK,), max_points=None, with_plot=False):
+    error = max_points_error(max_points, len(benchmarks) + 1)
+    if error:
+        return None, error
+    
+    frames, error = load_benchmarks(benchmarks, from_date, to_date)
+    if error:
+        return None, error
+    benchmarks = list(frames)
+    errors = {}
+    for name, (df, error) in get_nav_data_many(mf_names, from_date, to_date).items():
+        if error:
+            errors[name] = error
+        else:
+            frames[name] = df.rename(columns={"nav": "value"})
+    if len(frames) == len(benchmarks):
+        return None, "No fund data available for comparison"
+    
+    dates, labels, matrix = align_series(frames)
+    if len(dates) < 2:
+        return None, "No overlapping data between the funds and benchmarks"
+    error = max_points_error(max_points, len(labels))
+    if error:
+        return None, error
+    
+    # Correlation and statistics on the full-resolution matrix; a constant
+    # series has no correlation (NaN), reported as null
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = np.atleast_2d(np.corrcoef(matrix, rowvar=False))
+    stats = series_stats(matrix)
+    normalized = matrix / matrix[0] * 100
+    
+    total_points = len(dates)
+    rows = downsample_rows(dates.astype("int64"), list(normalized.T), max_points)
+    dates, normalized = dates[rows], normalized[rows]
+    
+    comparison = {
+        "dates": pd.DatetimeIndex(dates).strftime("%d-%b-%Y").tolist(),
+        "total_points": total_points,
+        "normalized": {label: normalized[:, j].tolist() for j, label in enumerate(labels)},
+        "correlation": {"labels": labels, "matrix": [finite_list(row) for row in np.round(correlation, 6)]},
+        "stats": {
+            label: {
+                "benchmark": label in benchmarks,
+                "start_value": float(matrix[0, j]),
+                "end_value": float(matrix[-1, j]),
+                **{stat: finite(values[j]) for stat, values in stats.items()}
+            }
+            for j, label in enumerate(labels)
+        },
+        "errors": errors
+    }
+    
+    if with_plot:
+        key = plot_key("comparison_matrix", from_date, to_date, max_points, *labels, dates, normalized)
+        comparison["plot_key"] = key
+        comparison["png"] = plot_cache.get_or_render(key, lambda: render_line_plot(
+            dates,
+            [(label, normalized[:, j]) for j, label in enumerate(labels)],
+            f"Comparison: {len(labels) - len(benchmarks)} funds vs {', '.join(benchmarks)}",
+            "Normalized Value (Base = 100)"
+        ))
+    return comparison, None
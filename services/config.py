@@ -0,0 +1,34 @@
+import json
+import os
+
+# Load providers configuration from the same directory as the services
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+PROVIDERS_PATH = os.path.join(BASE_DIR, 'providers.json')
+with open(PROVIDERS_PATH, 'r') as f:
+    _config = json.load(f)
+PROVIDERS = _config["providers"]
+HTTP_CONFIG = _config["http"]
+LOCAL_CONFIG = _config["local"]
+PROVIDER_MODES = ("live", "local")
+
+# "live" talks to AMFI and Yahoo; "local" applies each provider's "local"
+# overrides, whose relative URLs point at the stand-in in local_provider.py
+PROVIDER_MODE = os.environ.get("MF_PROVIDER_MODE", _config["mode"])
+LOCAL_URL = os.environ.get("MF_LOCAL_PROVIDER_URL", f"http://{LOCAL_CONFIG['host']}:{LOCAL_CONFIG['port']}")
+if PROVIDER_MODE not in PROVIDER_MODES:
+    raise SystemExit(f"Invalid MF_PROVIDER_MODE: must be one of {', '.join(PROVIDER_MODES)}")
+
+def use_local_provider(url=None):
+    # Switches this process to the stand-in, e.g. one started in-process
+    global PROVIDER_MODE, LOCAL_URL
+    PROVIDER_MODE = "local"
+    LOCAL_URL = url or LOCAL_URL
+
+def get_provider(name):
+    provider = next(p for p in PROVIDERS if p["providerName"] == name)
+    if PROVIDER_MODE != "local" or "local" not in provider:
+        return provider
+    provider = dict(provider, **provider["local"])
+    if provider.get("url", "").startswith("/"):
+        provider["url"] = LOCAL_URL + provider["url"]
+    return provider
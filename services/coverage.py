@@ -0,0 +1,163 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from db import coverage_collection
+
+# Coverage tracking: for every code we record the date intervals that have
+# already been requested from the provider, including intervals that came back
+# empty (weekends, holidays, dates before a scheme's launch). The planner
+# subtracts coverage from a requested range so only genuinely missing
+# intervals are fetched. Coverage reaching today is provisional, because
+# today's NAV/close may not be published yet, and expires after a short while.
+# So is coverage from a fetch that returned no rows: it may be a genuine gap
+# (holidays, before launch) or an error page served with HTTP 200.
+
+ONE_DAY = timedelta(days=1)
+PROVISIONAL_TTL = timedelta(hours=1)
+COMPACT_THRESHOLD = 64
+
+_coverage_cache = {}
+_coverage_lock = threading.Lock()
+
+def merge_intervals(intervals):
+    merged = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1] + ONE_DAY:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+def merge_provisional(intervals):
+    # Like merge_intervals for (start, end, expires); a merged interval
+    # expires with the earliest of its parts
+    merged = []
+    for start, end, expires in sorted(intervals):
+        if merged and start <= merged[-1][1] + ONE_DAY:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end), min(merged[-1][2], expires))
+        else:
+            merged.append((start, end, expires))
+    return merged
+
+def missing_intervals(covered, from_dt, to_dt):
+    gaps = []
+    cursor = from_dt
+    for start, end in covered:
+        if end < cursor:
+            continue
+        if start > to_dt:
+            break
+        if start > cursor:
+            gaps.append((cursor, start - ONE_DAY))
+        cursor = max(cursor, end + ONE_DAY)
+        if cursor > to_dt:
+            break
+    if cursor <= to_dt:
+        gaps.append((cursor, to_dt))
+    return gaps
+
+def split_interval(start, end, max_days):
+    chunks = []
+    while start <= end:
+        chunk_end = min(end, start + timedelta(days=max_days - 1))
+        chunks.append((start, chunk_end))
+        start = chunk_end + ONE_DAY
+    return chunks
+
+def coverage_view(entry):
+    # Permanent intervals plus the provisional ones that have not expired;
+    # expired ones are dropped so the range through today is fetched again
+    now = datetime.now()
+    entry["provisional"] = [interval for interval in entry["provisional"] if interval[2] > now]
+    live = [(start, end) for start, end, _ in entry["provisional"]]
+    return merge_intervals(entry["permanent"] + live) if live else entry["permanent"]
+
+def load_coverage(code):
+    doc = coverage_collection.find_one({"code": code}, {"_id": 0, "intervals": 1})
+    now = datetime.now()
+    permanent, provisional = [], []
+    for interval in (doc or {}).get("intervals", []):
+        if not interval.get("expires"):
+            permanent.append((interval["start"], interval["end"]))
+        elif interval["expires"] > now:
+            provisional.append((interval["start"], interval["end"], interval["expires"]))
+    entry = {"permanent": merge_intervals(permanent), "provisional": merge_provisional(provisional)}
+    with _coverage_lock:
+        _coverage_cache[code] = entry
+    if doc and len(doc["intervals"]) > COMPACT_THRESHOLD:
+        coverage_collection.update_one(
+            {"code": code},
+            {"$set": {"intervals": [{"start": s, "end": e} for s, e in entry["permanent"]] + [
+                {"start": s, "end": e, "expires": expires} for s, e, expires in entry["provisional"]
+            ]}}
+        )
+    return coverage_view(entry)
+
+def get_coverage(code):
+    with _coverage_lock:
+        entry = _coverage_cache.get(code)
+        if entry is not None:
+            return coverage_view(entry)
+    return load_coverage(code)
+
+def record_coverage(code, start, end, provisional=False):
+    record_coverage_many([code], start, end, provisional)
+
+def record_coverage_many(codes, start, end, provisional=False):
+    today = datetime.combine(datetime.now().date(), datetime.min.time())
+    interval = {"start": start, "end": end}
+    if provisional or end >= today:
+        interval["expires"] = datetime.now() + PROVISIONAL_TTL
+    # $push keeps concurrent recorders from overwriting each other
+    coverage_collection.bulk_write([
+        UpdateOne({"code": code}, {"$push": {"intervals": interval}}, upsert=True)
+        for code in codes
+    ], ordered=False)
+    with _coverage_lock:
+        for code in codes:
+            entry = _coverage_cache.get(code)
+            if entry is None:
+                continue
+            if "expires" in interval:
+                entry["provisional"] = merge_provisional(entry["provisional"] + [(start, end, interval["expires"])])
+            else:
+                entry["permanent"] = merge_intervals(entry["permanent"] + [(start, end)])
+
+def plan_fetches(code, from_dt, to_dt, max_days):
+    if not missing_intervals(get_coverage(code), from_dt, to_dt):
+        return []
+    # The in-process view only ever under-reports coverage; re-read it before
+    # going to the network in case another worker already fetched the gap
+    gaps = missing_intervals(load_coverage(code), from_dt, to_dt)
+    chunks = []
+    for start, end in merge_intervals(gaps):
+        chunks.extend(split_interval(start, end, max_days))
+    return chunks
+
+def fetch_missing(code, from_dt, to_dt, fetch, max_days, max_workers):
+    # fetch(start, end) returns the ingested rows, or None when the provider
+    # call failed; failed chunks are not recorded and will be retried
+    chunks = plan_fetches(code, from_dt, to_dt, max_days)
+    if not chunks:
+        return {"chunks": 0, "failed": 0, "rows": 0}
+
+    def run(chunk):
+        start, end = chunk
+        try:
+            result = fetch(start, end)
+        except Exception as e:
+            print(f"Error fetching {code} {start:%d-%b-%Y}..{end:%d-%b-%Y}: {e}")
+            return None
+        if result is None:
+            return None
+        record_coverage(code, start, end, provisional=not len(result))
+        return len(result)
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(chunks))) as executor:
+        results = list(executor.map(run, chunks))
+    return {
+        "chunks": len(chunks),
+        "failed": results.count(None),
+        "rows": sum(rows for rows in results if rows is not None)
+    }
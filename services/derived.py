@@ -0,0 +1,205 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+import numpy as np
+from .storage import load_series
+
+# Derived series per code, kept next to the raw rows and updated as rows are
+# ingested. For every valid value it holds the cumulative log return since the
+# first row (so the daily log return and any base-100 index are differences
+# of it), the running maximum for drawdowns, and running sums of values,
+# squared values and squared log returns, so the mean/std of any window or of
+# every rolling window is a difference of two sums. Arrays grow by doubling;
+# appending rows after the last date costs O(1) amortized per row and per
+# derived series. Rows that land before the last date (a late backfill) drop
+# the entry and it is rebuilt from storage on next use.
+
+FIELDS = ("values", "cum_log", "running_max", "sum_values", "sum_squares", "sum_returns_sq")
+
+class DerivedSeries:
+    def __init__(self, capacity=256):
+        self.n = 0
+        self._dates = np.empty(capacity, dtype="datetime64[ns]")
+        self._arrays = {field: np.empty(capacity, dtype=np.float64) for field in FIELDS}
+
+    def __len__(self):
+        return self.n
+
+    # Views of the filled part of each array
+    @property
+    def dates(self):
+        return self._dates[:self.n]
+
+    @property
+    def values(self):
+        return self._arrays["values"][:self.n]
+
+    @property
+    def cum_log(self):
+        return self._arrays["cum_log"][:self.n]
+
+    @property
+    def running_max(self):
+        return self._arrays["running_max"][:self.n]
+
+    @property
+    def sum_values(self):
+        return self._arrays["sum_values"][:self.n]
+
+    @property
+    def sum_squares(self):
+        return self._arrays["sum_squares"][:self.n]
+
+    @property
+    def sum_returns_sq(self):
+        return self._arrays["sum_returns_sq"][:self.n]
+
+    def _reserve(self, count):
+        capacity = len(self._dates)
+        if self.n + count <= capacity:
+            return
+        while capacity < self.n + count:
+            capacity *= 2
+        dates = np.empty(capacity, dtype="datetime64[ns]")
+        dates[:self.n] = self._dates[:self.n]
+        self._dates = dates
+        for field, array in self._arrays.items():
+            grown = np.empty(capacity, dtype=np.float64)
+            grown[:self.n] = array[:self.n]
+            self._arrays[field] = grown
+
+    def append(self, dates, values):
+        # dates must be sorted and after the last stored date; NaN values
+        # (unparseable NAVs) are skipped
+        valid = ~np.isnan(values)
+        dates, values = dates[valid], values[valid]
+        count = len(values)
+        if not count:
+            return
+        self._reserve(count)
+        a = self._arrays
+        n = self.n
+        last = a["values"][n - 1] if n else values[0]
+        log_returns = np.diff(np.log(np.concatenate([[last], values])))
+
+        self._dates[n:n + count] = dates
+        a["values"][n:n + count] = values
+        a["cum_log"][n:n + count] = (a["cum_log"][n - 1] if n else 0) + np.cumsum(log_returns)
+        a["running_max"][n:n + count] = np.maximum.accumulate(
+            np.concatenate([[a["running_max"][n - 1]], values]) if n else values
+        )[-count:]
+        a["sum_values"][n:n + count] = (a["sum_values"][n - 1] if n else 0) + np.cumsum(values)
+        a["sum_squares"][n:n + count] = (a["sum_squares"][n - 1] if n else 0) + np.cumsum(values * values)
+        a["sum_returns_sq"][n:n + count] = (a["sum_returns_sq"][n - 1] if n else 0) + np.cumsum(log_returns * log_returns)
+        self.n = n + count
+
+    def index_range(self, from_dt, to_dt):
+        i = int(np.searchsorted(self.dates, np.datetime64(from_dt, "ns"), side="left"))
+        j = int(np.searchsorted(self.dates, np.datetime64(to_dt, "ns"), side="right")) - 1
+        return (i, j) if j >= i else None
+
+    def value_stats(self, i, j):
+        # Mean and sample std of the values in [i, j]
+        count = j - i + 1
+        total = self.sum_values[j] - self.sum_values[i] + self.values[i]
+        squares = self.sum_squares[j] - self.sum_squares[i] + self.values[i] ** 2
+        mean = total / count
+        if count < 2:
+            return float(mean), None
+        variance = max(squares - count * mean * mean, 0) / (count - 1)
+        return float(mean), float(np.sqrt(variance))
+
+    def window(self, i, j, rolling_window):
+        # Slices of the derived arrays for [i, j]; rolling statistics cover
+        # the `rolling_window` log returns ending at each day
+        cum_log = self.cum_log
+        k = np.arange(i, j + 1)
+        start = np.maximum(k - rolling_window, 0)
+        count = k - start
+        with np.errstate(divide="ignore", invalid="ignore"):
+            mean = (cum_log[k] - cum_log[start]) / count
+            squares = (self.sum_returns_sq[k] - self.sum_returns_sq[start]) / count
+            std = np.sqrt(np.maximum(squares - mean * mean, 0) * count / (count - 1))
+        full = count == rolling_window
+        return {
+            "dates": self.dates[i:j + 1],
+            "value": self.values[i:j + 1],
+            "log_return": np.concatenate([[np.nan], np.diff(cum_log[i:j + 1])]),
+            "index": np.exp(cum_log[i:j + 1] - cum_log[i]) * 100,
+            "drawdown_percent": (self.values[i:j + 1] / self.running_max[i:j + 1] - 1) * 100,
+            "rolling_mean_return": np.where(full, mean, np.nan),
+            "rolling_volatility_percent": np.where(full, std * np.sqrt(252) * 100, np.nan)
+        }
+
+class DerivedStore:
+    def __init__(self, max_entries=256, ttl_seconds=1800):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.builds = 0
+        self.appends = 0
+        self.rebuilds = 0
+        self.stale_loads = 0
+        self._generations = {}
+
+    def get(self, code, loader):
+        # As in SeriesCache, a build whose load started before the latest
+        # extend() is returned but not cached
+        with self._lock:
+            entry = self._entries.get(code)
+            if entry and time.monotonic() - entry["loaded_at"] <= self.ttl_seconds:
+                self._entries.move_to_end(code)
+                return entry["derived"]
+            generation = self._generations.get(code, 0)
+        series = loader()
+        derived = DerivedSeries(max(256, len(series)))
+        derived.append(series.dates, series.values)
+        with self._lock:
+            self.builds += 1
+            if self._generations.get(code, 0) != generation:
+                self.stale_loads += 1
+                return derived
+            self._entries[code] = {"derived": derived, "loaded_at": time.monotonic()}
+            self._entries.move_to_end(code)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return derived
+
+    def extend(self, code, series):
+        # Called with freshly ingested rows (including ones already stored)
+        if not len(series):
+            return
+        with self._lock:
+            self._generations[code] = self._generations.get(code, 0) + 1
+            entry = self._entries.get(code)
+            if not entry:
+                return
+            derived = entry["derived"]
+            last = derived.dates[-1] if len(derived) else None
+            newer = series.dates > last if last is not None else np.ones(len(series), dtype=bool)
+            older = ~newer & ~np.isnan(series.values)
+            if older.any() and not np.isin(series.dates[older], derived.dates).all():
+                del self._entries[code]
+                self.rebuilds += 1
+                return
+            derived.append(series.dates[newer], series.values[newer])
+            self.appends += 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "builds": self.builds,
+                "appends": self.appends,
+                "rebuilds": self.rebuilds,
+                "staleLoads": self.stale_loads
+            }
+
+nav_derived = DerivedStore()
+benchmark_derived = DerivedStore(max_entries=32)
+
+def load_derived(store, collection, code, value_field):
+    return store.get(code, lambda: load_series(collection, code, datetime.min, datetime.max, value_field))
@@ -0,0 +1,78 @@
+import numpy as np
+
+# Shape-preserving downsampling with Largest-Triangle-Three-Buckets (LTTB).
+# The first and last points are kept; every bucket in between contributes the
+# point forming the largest triangle with the previously kept point and the
+# average of the next bucket. The loop runs once per output point with NumPy
+# doing the work inside each bucket, so the cost is O(n) regardless of the
+# requested size.
+
+MIN_POINTS = 3
+# Each search step re-runs LTTB on every column; a few steps get within
+# (max_points / count) / 2**steps of the best share
+MAX_SEARCH_STEPS = 4
+
+def lttb_indices(x, y, max_points):
+    n = len(y)
+    if max_points >= n or n <= MIN_POINTS:
+        return np.arange(n)
+    max_points = max(max_points, MIN_POINTS)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+
+    # Bucket edges over the interior points 1 .. n-2
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    selected = np.empty(max_points, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for i in range(max_points - 2):
+        start, end = edges[i], edges[i + 1]
+        if i + 2 < len(edges):
+            next_x = x[end:edges[i + 2]].mean()
+            next_y = y[end:edges[i + 2]].mean()
+        else:
+            next_x, next_y = x[-1], y[-1]
+        area = np.abs(
+            (x[previous] - next_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (next_y - y[previous])
+        )
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+def min_points(series_count):
+    # Every column keeps the shared first and last rows plus at least one
+    # interior row of its own
+    return MIN_POINTS + series_count - 1
+
+def downsample_rows(x, columns, max_points):
+    # Row indices that keep the shape of every column, at most max_points of
+    # them; each column gets the same share of the budget and the picks are
+    # merged so rows stay aligned
+    if max_points is None or max_points >= len(x):
+        return np.arange(len(x))
+    if max_points < min_points(len(columns)):
+        raise ValueError(f"max_points must be at least {min_points(len(columns))} for {len(columns)} series")
+    
+    def merged(share):
+        return np.unique(np.concatenate([lttb_indices(x, column, share) for column in columns]))
+    
+    # A share of lo always fits (the columns only have the end rows in
+    # common at worst); columns with similar shapes pick overlapping rows, so
+    # search, for a bounded number of steps, for the largest share whose
+    # merged rows still fit
+    count = len(columns)
+    lo = (max_points - 2) // count + 2
+    hi = max_points
+    rows = merged(lo)
+    for _ in range(MAX_SEARCH_STEPS):
+        if lo >= hi:
+            break
+        share = (lo + hi + 1) // 2
+        candidate = merged(share)
+        if len(candidate) <= max_points:
+            lo, rows = share, candidate
+        else:
+            hi = share - 1
+    return rows
@@ -0,0 +1,210 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from statsmodels.tsa.arima.model import ARIMA
+from sklearn.metrics import mean_squared_error, mean_absolute_error
+from .utils import format_date
+
+# Hybrid NAV forecaster: ARIMA models the trend and an XGBoost regressor on
+# lag/rolling features models the ARIMA residuals.
+
+MODEL_CONFIG = {
+    "model": "arima_xgb",
+    "arima_order": [5, 1, 0],
+    "xgb_params": {"n_estimators": 100, "learning_rate": 0.1, "max_depth": 3},
+    "train_fraction": 0.8,
+    "horizon": 14
+}
+FAST_CONFIG = {
+    "model": "ridge_lags",
+    "lags": 5,
+    "ridge_alpha": 1.0,
+    "train_fraction": 0.8,
+    "horizon": 14
+}
+FEATURE_COLS = ["lag1", "lag2", "lag3", "rolling_mean_3", "rolling_std_3"]
+MAX_HORIZON = 365
+LAGS = 3
+ROLLING_WINDOW = 3
+
+def preprocess(df):
+    df = df.copy()
+    df["nav"] = df["nav"].interpolate()  # Fill gaps
+    df = df.dropna()  # Drop any remaining NaNs
+    if df.empty:
+        return df
+    
+    # Set date as index with daily frequency
+    df.set_index("date", inplace=True)
+    df = df.asfreq('D', method='ffill')  # Ensure daily frequency, forward-fill gaps
+    return df
+
+def create_features(data, nav_col="nav"):
+    df_features = data.copy()
+    df_features["lag1"] = df_features[nav_col].shift(1)
+    df_features["lag2"] = df_features[nav_col].shift(2)
+    df_features["lag3"] = df_features[nav_col].shift(3)
+    df_features["rolling_mean_3"] = df_features[nav_col].rolling(window=3).mean()
+    df_features["rolling_std_3"] = df_features[nav_col].rolling(window=3).std()
+    return df_features
+
+def fit_hybrid(df, config=MODEL_CONFIG):
+    # Step 2: Train-test split (80% train, 20% test)
+    train_size = int(config["train_fraction"] * len(df))
+    train_df = df[:train_size]
+    test_df = df[train_size:]
+    
+    # Step 3: Train ARIMA for long-term trend
+    arima_model = ARIMA(train_df["nav"], order=tuple(config["arima_order"]))
+    arima_fit = arima_model.fit()
+    
+    # Predict ARIMA for train and test periods
+    arima_train_pred = arima_fit.predict(start=train_df.index[0], end=train_df.index[-1])
+    arima_test_pred = arima_fit.forecast(steps=len(test_df))
+    arima_test_pred.index = test_df.index  # Align test predictions with test_df index
+    
+    # Step 4: Calculate residuals
+    train_residuals = train_df["nav"] - arima_train_pred
+    
+    # Step 5: Feature engineering for XGBoost
+    train_features = create_features(train_df).dropna()
+    test_features = create_features(test_df).dropna()
+    
+    # Align residuals with feature indices
+    train_residuals = train_residuals.loc[train_features.index]
+    
+    X_train = train_features[FEATURE_COLS]
+    y_train = train_residuals
+    X_test = test_features[FEATURE_COLS]
+    
+    # Step 6: Train XGBoost on residuals
+    xgb_model = xgb.XGBRegressor(**config["xgb_params"])
+    xgb_model.fit(X_train, y_train)
+    
+    # Step 7: Combine predictions
+    xgb_test_pred = xgb_model.predict(X_test)
+    final_test_pred = arima_test_pred.loc[test_features.index] + xgb_test_pred
+    
+    # Step 8: Evaluate performance
+    metrics = split_metrics(test_df["nav"].loc[test_features.index], final_test_pred)
+    return {"arima_fit": arima_fit, "xgb_model": xgb_model, "metrics": metrics}
+
+def split_metrics(actual, predicted):
+    # RMSE/MAE on the test split as a percentage of the mean test NAV
+    test_nav_mean = actual.mean()
+    rmse = np.sqrt(mean_squared_error(actual, predicted))
+    mae = mean_absolute_error(actual, predicted)
+    return {
+        "rmse_percent": float((rmse / test_nav_mean) * 100),
+        "mae_percent": float((mae / test_nav_mean) * 100)
+    }
+
+def recursive_residual_forecast(booster, recent_nav, arima_future):
+    # Recursive multi-step forecast with the same features create_features
+    # builds (3 lags, 3-day rolling mean/std including the current value), kept
+    # in a fixed-size ring buffer instead of a growing DataFrame. As in the
+    # original formulation the first step repeats the last observed NAV and
+    # every later step feeds back the previous final forecast.
+    horizon = len(arima_future)
+    ring = np.empty(LAGS + 1, dtype=np.float64)  # last LAGS values + current
+    ring[:LAGS] = recent_nav[-LAGS:]
+    head = 0  # position of the oldest value in the ring
+    window_sum = ring[LAGS - ROLLING_WINDOW + 1:LAGS].sum()
+    features = np.empty((1, len(FEATURE_COLS)), dtype=np.float64)
+    final = np.empty(horizon, dtype=np.float64)
+    
+    current = recent_nav[-1]
+    for i in range(horizon):
+        slot = (head + LAGS) % (LAGS + 1)
+        ring[slot] = current
+        lag1 = ring[(head + 2) % (LAGS + 1)]
+        lag2 = ring[(head + 1) % (LAGS + 1)]
+        lag3 = ring[head]
+        
+        window_sum += current
+        mean = window_sum / ROLLING_WINDOW
+        deviations = (current - mean) ** 2 + (lag1 - mean) ** 2 + (lag2 - mean) ** 2
+        features[0] = (lag1, lag2, lag3, mean, np.sqrt(deviations / (ROLLING_WINDOW - 1)))
+        
+        final[i] = arima_future[i] + booster.inplace_predict(features, validate_features=False)[0]
+        
+        # Slide the window: lag2 drops out of the next step's rolling window
+        # and the oldest lag is overwritten by the next current value
+        window_sum -= lag2
+        head = (head + 1) % (LAGS + 1)
+        current = final[i]
+    return final
+
+def prediction_records(df, values):
+    last_date = df.index.max()
+    future_dates = pd.date_range(start=last_date + timedelta(days=1), periods=len(values), freq='D')
+    return [
+        {"date": format_date(future_dates[i]), "nav_predicted": float(values[i])}
+        for i in range(len(values))
+    ]
+
+def forecast_hybrid(model, df, horizon):
+    # Step 9: Forecast the next `horizon` days
+    arima_future = np.asarray(model["arima_fit"].forecast(steps=horizon), dtype=np.float64)
+    final_future_pred = recursive_residual_forecast(
+        model["xgb_model"].get_booster(), df["nav"].to_numpy(dtype=np.float64), arima_future
+    )
+    return prediction_records(df, final_future_pred)
+
+def fit_and_forecast(df, config):
+    # Entry point for prediction jobs; runs in a worker process
+    model = fit_hybrid(df, config)
+    predictions = forecast_hybrid(model, df, config["horizon"])
+    return dict(model, config=config, predictions=predictions)
+
+# Fast mode: closed-form ridge regression of the daily NAV change on the
+# previous `lags` changes, solved in NumPy. Fitting and forecasting take a few
+# milliseconds, so it runs inline instead of in the job pool.
+
+def lag_design(diffs, lags):
+    # Row i holds diffs[i + lags - 1], ..., diffs[i] plus an intercept and
+    # predicts diffs[i + lags]
+    windows = np.lib.stride_tricks.sliding_window_view(diffs, lags)[:, ::-1]
+    return np.hstack([windows, np.ones((len(windows), 1))])
+
+def fit_ridge(X, y, alpha):
+    penalty = alpha * np.eye(X.shape[1])
+    penalty[-1, -1] = 0  # leave the intercept unpenalized
+    return np.linalg.solve(X.T @ X + penalty, X.T @ y)
+
+def recursive_ridge_forecast(weights, recent_nav, horizon):
+    lags = len(weights) - 1
+    recent = np.diff(recent_nav[-lags - 1:])[::-1].copy()  # newest change first
+    level = recent_nav[-1]
+    final = np.empty(horizon, dtype=np.float64)
+    for i in range(horizon):
+        change = recent @ weights[:-1] + weights[-1]
+        recent[1:] = recent[:-1]
+        recent[0] = change
+        level += change
+        final[i] = level
+    return final
+
+def fit_fast(df, config=FAST_CONFIG):
+    nav = df["nav"].to_numpy(dtype=np.float64)
+    train_size = int(config["train_fraction"] * len(df))
+    diffs = np.diff(nav[:train_size])
+    
+    weights = fit_ridge(lag_design(diffs, config["lags"])[:-1], diffs[config["lags"]:], config["ridge_alpha"])
+    
+    # Like the ARIMA trend in fit_hybrid, forecast the whole test split from
+    # the end of training and score the rows fit_hybrid scores (the test split
+    # minus its first LAGS days)
+    test_pred = recursive_ridge_forecast(weights, nav[:train_size], len(nav) - train_size)
+    metrics = split_metrics(nav[train_size + LAGS:], test_pred[LAGS:])
+    return {"weights": weights, "metrics": metrics}
+
+def forecast_fast(model, df, horizon):
+    final = recursive_ridge_forecast(model["weights"], df["nav"].to_numpy(dtype=np.float64), horizon)
+    return prediction_records(df, final)
+
+def fit_and_forecast_fast(df, config=FAST_CONFIG):
+    model = fit_fast(df, config)
+    predictions = forecast_fast(model, df, config["horizon"])
+    return dict(model, config=config, predictions=predictions)
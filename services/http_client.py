@@ -0,0 +1,106 @@
+import random
+import threading
+import time
+from collections import deque
+from urllib.parse import urlparse
+import requests
+from requests.adapters import HTTPAdapter
+from .config import HTTP_CONFIG
+
+# Shared HTTP client for all provider calls: one keep-alive connection pool,
+# connect/read timeouts, retries with jittered exponential backoff on 5xx and
+# connection errors, a per-host concurrency cap and per-host latency stats.
+
+class ProviderClient:
+    def __init__(self, config):
+        self.config = config
+        self.timeout = (config["connectTimeout"], config["readTimeout"])
+        self.retries = config["retries"]
+        self.retry_statuses = set(config["retryStatuses"])
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=config["poolConnections"],
+            pool_maxsize=config["poolMaxSize"],
+            max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._lock = threading.Lock()
+        self._host_limits = {}
+        self._stats = {}
+
+    def _host_limit(self, host):
+        with self._lock:
+            if host not in self._host_limits:
+                limit = self.config["hostLimits"].get(host, self.config["maxConcurrentPerHost"])
+                self._host_limits[host] = threading.BoundedSemaphore(limit)
+            return self._host_limits[host]
+
+    def _record(self, host, elapsed, failed, retried):
+        with self._lock:
+            stats = self._stats.setdefault(host, {
+                "requests": 0, "errors": 0, "retries": 0, "latencies": deque(maxlen=1000)
+            })
+            stats["requests"] += 1
+            stats["errors"] += int(failed)
+            stats["retries"] += int(retried)
+            stats["latencies"].append(elapsed)
+
+    def _backoff(self, attempt):
+        cap = min(self.config["backoffMax"], self.config["backoffBase"] * (2 ** attempt))
+        return random.uniform(0, cap)
+
+    def request(self, method, url, **kwargs):
+        host = urlparse(url).netloc
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.retries + 1):
+            response, error = None, None
+            start = time.perf_counter()
+            with self._host_limit(host):
+                try:
+                    response = self.session.request(method, url, **kwargs)
+                except (requests.ConnectionError, requests.Timeout) as e:
+                    error = e
+            failed = error is not None or response.status_code in self.retry_statuses
+            self._record(host, time.perf_counter() - start, failed, attempt > 0)
+            if not failed:
+                return response
+            if attempt == self.retries:
+                if error is not None:
+                    raise error
+                return response
+            time.sleep(self._backoff(attempt))
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def stats(self):
+        with self._lock:
+            report = {}
+            for host, stats in self._stats.items():
+                latencies = sorted(stats["latencies"])
+                report[host] = {
+                    "requests": stats["requests"],
+                    "errors": stats["errors"],
+                    "retries": stats["retries"],
+                    "p50LatencyMs": latencies[len(latencies) // 2] * 1000 if latencies else None,
+                    "p95LatencyMs": latencies[int(len(latencies) * 0.95)] * 1000 if latencies else None,
+                    "maxLatencyMs": latencies[-1] * 1000 if latencies else None
+                }
+            return report
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = ProviderClient(HTTP_CONFIG)
+        return _client
+
+def provider_stats():
+    return get_client().stats()
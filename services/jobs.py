@@ -0,0 +1,217 @@
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+# Asynchronous jobs for CPU-bound model fits. Jobs run in a process pool sized
+# to the machine's cores (or MF_JOB_WORKERS, which gunicorn.conf.py sets to
+# each server worker's share) so a fit never blocks a Flask worker thread. The
+# number of queued/running jobs is capped, identical pending jobs (same key)
+# share one job, as do repeated results served from a cache. Jobs exceeding
+# JOB_TIMEOUT are reported as failed. A job that is already executing cannot
+# be interrupted inside ProcessPoolExecutor; its result is discarded once it
+# has timed out.
+
+JOB_TIMEOUT = 300
+JOB_RETENTION = 3600
+MAX_JOBS_KEPT = 1000
+JOB_WORKERS = int(os.environ.get("MF_JOB_WORKERS", 0)) or None
+
+class JobManager:
+    def __init__(self, max_workers=None, max_pending=None, job_timeout=JOB_TIMEOUT):
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_pending = max_pending or 4 * self.max_workers
+        self.job_timeout = job_timeout
+        self._executor = None
+        self._jobs = {}
+        self._pending_by_key = {}
+        self._done_by_key = {}
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            # Forking a multithreaded server worker can copy locks held by
+            # other threads into the child; start workers from a fork server
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=multiprocessing.get_context("forkserver")
+            )
+        return self._executor
+
+    def _new_job(self, key, label):
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "key": key,
+            "label": label,
+            "status": "queued",
+            "submitted": datetime.now(),
+            "deadline": time.monotonic() + self.job_timeout,
+            "finished": None,
+            "result": None,
+            "error": None,
+            "future": None,
+            "parts": [],
+            "pending_parts": 0,
+            "settled": threading.Event()
+        }
+        self._jobs[job["job_id"]] = job
+        return job
+
+    def _active(self):
+        return sum(1 for job in self._jobs.values() if job["status"] in ("queued", "running"))
+
+    def _expire(self):
+        now = time.monotonic()
+        for job in self._jobs.values():
+            if job["status"] in ("queued", "running") and now > job["deadline"]:
+                job["future"].cancel()
+                for part in job["parts"]:
+                    part.cancel()
+                self._fail(job, "Prediction timed out")
+        finished = [job for job in self._jobs.values() if job["finished"]]
+        finished.sort(key=lambda job: job["finished"])
+        cutoff = datetime.now().timestamp() - JOB_RETENTION
+        excess = len(self._jobs) - MAX_JOBS_KEPT
+        for index, job in enumerate(finished):
+            if job["finished"].timestamp() < cutoff or index < excess:
+                del self._jobs[job["job_id"]]
+                if self._done_by_key.get(job["key"]) == job["job_id"]:
+                    del self._done_by_key[job["key"]]
+
+    def _fail(self, job, error):
+        job["status"] = "failed"
+        job["error"] = error
+        job["finished"] = datetime.now()
+        if self._pending_by_key.get(job["key"]) == job["job_id"]:
+            del self._pending_by_key[job["key"]]
+        job["settled"].set()
+
+    def complete(self, key, label, result):
+        # Record a job whose result was available without running anything.
+        # Repeat hits on one key share the job already recorded for it.
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(self._done_by_key.get(key))
+            if job:
+                job["result"] = result
+                return job
+            job = self._new_job(key, label)
+            job["status"] = "done"
+            job["result"] = result
+            job["finished"] = datetime.now()
+            self._done_by_key[key] = job["job_id"]
+            job["settled"].set()
+            return job
+
+    def _run(self, fn, args):
+        # Called with the lock held
+        try:
+            return self._pool().submit(fn, *args)
+        except BrokenProcessPool:
+            self._executor = None
+            return self._pool().submit(fn, *args)
+
+    def submit(self, key, label, fn, args, on_result=None, split=None):
+        # With split, the job has two stages: split(fn's result) returns
+        # (fn, args) tasks that run in parallel on the pool, and on_result
+        # receives fn's result and the list of task results
+        with self._lock:
+            self._expire()
+            job_id = self._pending_by_key.get(key)
+            if job_id:
+                return self._jobs[job_id], None
+            if self._active() >= self.max_pending:
+                return None, "Prediction queue is full, retry later"
+            
+            job = self._new_job(key, label)
+            job["future"] = self._run(fn, args)
+            self._pending_by_key[key] = job["job_id"]
+        job["future"].add_done_callback(lambda future: self._finish(job, future, on_result, split))
+        return job, None
+
+    def _finish(self, job, future, on_result, split=None):
+        if future.cancelled():
+            return
+        error = future.exception()
+        result = None
+        if error is None and split:
+            try:
+                return self._split(job, future.result(), on_result, split)
+            except Exception as e:
+                error = e
+        elif error is None:
+            result = future.result()
+            if on_result:
+                try:
+                    result = on_result(result)
+                except Exception as e:
+                    error = e
+        self._settle(job, result, error)
+
+    def _split(self, job, first, on_result, split):
+        tasks = split(first)
+        if not tasks:
+            return self._settle(job, on_result(first, []), None)
+        with self._lock:
+            if job["status"] not in ("queued", "running"):
+                return
+            job["status"] = "running"
+            job["parts"] = [self._run(fn, args) for fn, args in tasks]
+            job["pending_parts"] = len(job["parts"])
+        for part in job["parts"]:
+            part.add_done_callback(lambda _: self._part_done(job, first, on_result))
+
+    def _part_done(self, job, first, on_result):
+        with self._lock:
+            job["pending_parts"] -= 1
+            if job["pending_parts"]:
+                return
+        if any(part.cancelled() for part in job["parts"]):
+            return
+        error = next((part.exception() for part in job["parts"] if part.exception()), None)
+        result = None
+        if error is None:
+            try:
+                result = on_result(first, [part.result() for part in job["parts"]])
+            except Exception as e:
+                error = e
+        self._settle(job, result, error)
+
+    def _settle(self, job, result, error):
+        with self._lock:
+            if job["status"] not in ("queued", "running"):
+                return
+            if error is not None:
+                self._fail(job, f"Error in NAV prediction: {error}")
+                return
+            job["status"] = "done"
+            job["result"] = result
+            job["finished"] = datetime.now()
+            if self._pending_by_key.get(job["key"]) == job["job_id"]:
+                del self._pending_by_key[job["key"]]
+            self._done_by_key[job["key"]] = job["job_id"]
+            job["settled"].set()
+
+    def get(self, job_id):
+        with self._lock:
+            self._expire()
+            job = self._jobs.get(job_id)
+            if job and job["status"] == "queued" and job["future"].running():
+                job["status"] = "running"
+            return job
+
+    def wait(self, job, timeout):
+        job["settled"].wait(min(timeout, max(0, job["deadline"] - time.monotonic())))
+        return self.get(job["job_id"]) or job
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job["status"]] = counts.get(job["status"], 0) + 1
+            return {"workers": self.max_workers, "maxPending": self.max_pending, "jobs": counts}
+
+prediction_jobs = JobManager(max_workers=JOB_WORKERS)
@@ -0,0 +1,318 @@
+import argparse
+import json
+import os
+import random
+import threading
+import time
+import zlib
+from collections import Counter, defaultdict
+from datetime import datetime
+from functools import lru_cache
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+import pandas as pd
+from .config import LOCAL_CONFIG
+from .utils import parse_date, DATE_FORMAT
+
+# Offline stand-in for AMFI and Yahoo. It serves the same paths and markup the
+# live providers do (NavHistoryPeriod, AverageAUMDetails, the average-AUM
+# page and NAVAll.txt) plus a JSON closes endpoint for index tickers, so with
+# MF_PROVIDER_MODE=local the whole fetch/parse/ingest path runs unchanged
+# against it. Every response waits latencyMs +/- latencyJitterMs and fails
+# with a 503 at errorRate. Histories are deterministic random walks per scheme
+# or ticker over business days, unless dataDir holds a recording for it:
+#   <dataDir>/nav/<scID>.csv        date,nav
+#   <dataDir>/closes/<ticker>.csv   date,close
+#   <dataDir>/aum/<mfID>.csv        scheme,aum_lakhs
+# with dates as DD-MMM-YYYY.
+#   python -m services.local_provider [--port 8765] [--latency-ms 40] [--error-rate 0.01]
+
+SERIES_START = np.datetime64("2015-01-01")
+SYNTHETIC_SCHEME_BASE = 200000
+SCHEMES_PER_AMC = 200
+QUARTER_MONTHS = ("January - March", "April - June", "July - September", "October - December")
+QUARTERS_LISTED = 8
+NAV_ALL_HEADER = "Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date"
+
+# Same schemes as db.MF_DATA, so the seeded funds resolve in local mode too
+SEEDED_SCHEMES = [
+    {"company": "SBI Mutual Fund", "fund": "SBI Small Cap Fund - Direct Plan - Growth", "mfID": 22, "scID": 125497},
+    {"company": "HDFC Mutual Fund", "fund": "HDFC Flexi Cap Fund - Growth Option - Direct Plan", "mfID": 9, "scID": 118955},
+    {"company": "ICICI Prudential Mutual Fund", "fund": "ICICI Prudential Bluechip Fund - Direct Plan - Growth", "mfID": 20, "scID": 120586},
+    {"company": "UTI Mutual Fund", "fund": "UTI Flexi Cap Fund - Direct Plan - IDCW", "mfID": 28, "scID": 120663}
+]
+
+def synthetic_schemes(count):
+    # mf_data documents for the synthetic schemes the stand-in lists
+    return [
+        {
+            "company": f"AMC {index // SCHEMES_PER_AMC} Mutual Fund",
+            "fund": f"Synthetic Scheme {index} - Direct Plan - Growth",
+            "mfID": 100 + index // SCHEMES_PER_AMC,
+            "scID": SYNTHETIC_SCHEME_BASE + index
+        }
+        for index in range(count)
+    ]
+
+def recent_quarters(today):
+    # Latest complete quarter first, as AMFI's dropdown lists them
+    year, quarter = today.year, (today.month - 1) // 3
+    labels = []
+    for _ in range(QUARTERS_LISTED):
+        quarter -= 1
+        if quarter < 0:
+            year, quarter = year - 1, 3
+        labels.append(f"{QUARTER_MONTHS[quarter]} {year}")
+    return labels
+
+class LocalData:
+    def __init__(self, seed, schemes, data_dir=None):
+        self.seed = seed
+        self.data_dir = data_dir
+        self.schemes = SEEDED_SCHEMES + synthetic_schemes(schemes)
+        self.by_amc = defaultdict(list)
+        for scheme in self.schemes:
+            self.by_amc[scheme["mfID"]].append(scheme)
+
+    def _rng(self, key):
+        return np.random.default_rng(zlib.crc32(f"{self.seed}:{key}".encode()))
+
+    def _walk(self, key, low, high, drift, volatility):
+        # Always generated up to today, so any range of it is stable
+        dates = np.arange(SERIES_START, np.datetime64(datetime.now().date()) + 1, dtype="datetime64[D]")
+        dates = dates[np.is_busday(dates)]
+        rng = self._rng(key)
+        start = rng.uniform(low, high)
+        return dates, start * np.exp(np.cumsum(rng.normal(drift, volatility, len(dates))))
+
+    @lru_cache(maxsize=256)
+    def _recorded(self, kind, key):
+        if not self.data_dir:
+            return None
+        path = os.path.join(self.data_dir, kind, f"{key}.csv")
+        return pd.read_csv(path) if os.path.exists(path) else None
+
+    def series(self, kind, key):
+        recorded = self._recorded(kind, str(key))
+        if recorded is not None:
+            dates = pd.to_datetime(recorded.iloc[:, 0], format=DATE_FORMAT).to_numpy(dtype="datetime64[D]")
+            order = np.argsort(dates)
+            return dates[order], recorded.iloc[:, 1].to_numpy(dtype=np.float64)[order]
+        if kind == "nav":
+            return self._walk(f"nav:{key}", 10, 900, 0.0004, 0.011)
+        return self._walk(f"closes:{key}", 5000, 50000, 0.0003, 0.009)
+
+    def window(self, kind, key, from_dt, to_dt):
+        dates, values = self.series(kind, key)
+        lo = np.searchsorted(dates, np.datetime64(from_dt.date()), side="left")
+        hi = np.searchsorted(dates, np.datetime64(to_dt.date()), side="right")
+        return dates[lo:hi], values[lo:hi]
+
+    def nav_history_html(self, sc_id, from_dt, to_dt):
+        dates, values = self.window("nav", sc_id, from_dt, to_dt)
+        lines = [
+            '<table width="100%" border="0" cellspacing="0" cellpadding="0" class="tblborder">',
+            '<tr><th>Net Asset Value</th><th>Repurchase Price</th><th>Sale Price</th><th>Date</th></tr>'
+        ]
+        lines.extend(
+            f'<tr><td align="right"> {value:.4f} </td><td align="right"></td>'
+            f'<td align="right"></td><td align="center"> {date} </td></tr>'
+            for date, value in zip(pd.DatetimeIndex(dates).strftime(DATE_FORMAT), values.tolist())
+        )
+        lines.append('</table>')
+        return "\n".join(lines)
+
+    def closes(self, tickers, from_dt, to_dt):
+        # One row per date any ticker has, like a multi-ticker yfinance download
+        columns = {}
+        for ticker in tickers:
+            dates, values = self.window("closes", ticker, from_dt, to_dt)
+            columns[ticker] = pd.Series(values, index=pd.DatetimeIndex(dates))
+        frame = pd.DataFrame(columns)
+        return {
+            "dates": frame.index.strftime(DATE_FORMAT).tolist(),
+            "closes": {ticker: frame[ticker].astype(object).where(frame[ticker].notna(), None).tolist() for ticker in frame.columns}
+        }
+
+    def aum_rows(self, mf_id, year_id):
+        recorded = self._recorded("aum", str(mf_id))
+        if recorded is not None:
+            return list(zip(recorded.iloc[:, 0].astype(str), recorded.iloc[:, 1].tolist()))
+        return [
+            (scheme["fund"], round(float(self._rng(f"aum:{scheme['scID']}:{year_id}").uniform(100, 5e6)), 2))
+            for scheme in self.by_amc.get(mf_id, [])
+        ]
+
+    def aum_html(self, mf_id, year_id):
+        lines = [
+            '<table class="table">',
+            '<thead><tr><th rowspan="2">Sr</th><th rowspan="2">Scheme NAV Name</th><th colspan="2">Average AUM for The Month</th></tr>',
+            '<tr><th>Excluding Fund of Funds - Domestic but including Fund of Funds - Overseas</th><th>Fund Of Funds - Domestic</th></tr></thead>',
+            '<tbody>'
+        ]
+        lines.extend(
+            f'<tr><td>{position}</td><td>{scheme}</td><td>{aum:.2f}</td><td>0.00</td></tr>'
+            for position, (scheme, aum) in enumerate(self.aum_rows(mf_id, year_id), 1)
+        )
+        lines.append('</tbody></table>')
+        return "\n".join(lines)
+
+    def quarters_html(self):
+        options = "".join(
+            f'<option value="{year_id}">{label}</option>'
+            for year_id, label in enumerate(recent_quarters(datetime.now()), 1)
+        )
+        return f'<html><body><select id="AumYear">{options}</select></body></html>'
+
+    def nav_all_lines(self):
+        yield NAV_ALL_HEADER
+        yield ""
+        yield "Open Ended Schemes(Equity Scheme - Flexi Cap Fund)"
+        company = None
+        for scheme in self.schemes:
+            if scheme["company"] != company:
+                company = scheme["company"]
+                yield ""
+                yield company
+                yield ""
+            dates, values = self.series("nav", scheme["scID"])
+            date = pd.Timestamp(dates[-1]).strftime(DATE_FORMAT)
+            yield f"{scheme['scID']};INF{scheme['scID']:09d};-;{scheme['fund']};{values[-1]:.4f};{date}"
+
+# Routes take the stand-in data and the request parameters and return
+# (status, body, content type)
+def nav_history_route(data, params):
+    from_dt, to_dt = parse_date(params["fDate"]), parse_date(params["tDate"])
+    return 200, data.nav_history_html(int(params["scID"]), from_dt, to_dt), "text/html"
+
+def aum_route(data, params):
+    return 200, data.aum_html(int(params["MF_Id"]), params["Year_Id"]), "text/html"
+
+def quarters_route(data, params):
+    return 200, data.quarters_html(), "text/html"
+
+def nav_all_route(data, params):
+    return 200, "\n".join(data.nav_all_lines()) + "\n", "text/plain"
+
+def closes_route(data, params):
+    tickers = [ticker for ticker in params["symbols"].split(",") if ticker]
+    closes = data.closes(tickers, parse_date(params["from"]), parse_date(params["to"]))
+    return 200, json.dumps(closes), "application/json"
+
+ROUTES = {
+    ("POST", "/modules/NavHistoryPeriod"): nav_history_route,
+    ("POST", "/modules/AverageAUMDetails"): aum_route,
+    ("GET", "/research-information/aum-data/average-aum"): quarters_route,
+    ("GET", "/spages/NAVAll.txt"): nav_all_route,
+    ("GET", "/yahoo/closes"): closes_route
+}
+
+class LocalProviderHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so the client's connection pool behaves as it does live
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, content_type):
+        body = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _handle(self, method):
+        url = urlparse(self.path)
+        if method == "POST":
+            length = int(self.headers.get("Content-Length", 0))
+            params = parse_qs(self.rfile.read(length).decode("utf-8"))
+        else:
+            params = parse_qs(url.query)
+        params = {key: values[0] for key, values in params.items()}
+
+        if url.path == "/stats":
+            return self._send(200, json.dumps(self.server.stats()), "application/json")
+        route = ROUTES.get((method, url.path))
+        if route is None:
+            return self._send(404, "Not found", "text/plain")
+        if self.server.delay_and_fail(url.path):
+            return self._send(503, "Service unavailable (injected)", "text/plain")
+        try:
+            status, body, content_type = route(self.server.data, params)
+        except (KeyError, ValueError) as e:
+            status, body, content_type = 400, f"Bad request: {e}", "text/plain"
+        self._send(status, body, content_type)
+
+    def do_GET(self):
+        self._handle("GET")
+
+    def do_POST(self):
+        self._handle("POST")
+
+class LocalProviderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, config):
+        super().__init__((config["host"], config["port"]), LocalProviderHandler)
+        self.data = LocalData(config["seed"], config["schemes"], config["dataDir"])
+        self.latency = config["latencyMs"] / 1000
+        self.jitter = config["latencyJitterMs"] / 1000
+        self.error_rate = config["errorRate"]
+        self._lock = threading.Lock()
+        self._requests = Counter()
+        self._errors = Counter()
+
+    @property
+    def url(self):
+        return f"http://{self.server_address[0]}:{self.server_port}"
+
+    def delay_and_fail(self, path):
+        delay = self.latency + random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        failed = random.random() < self.error_rate
+        with self._lock:
+            self._requests[path] += 1
+            self._errors[path] += int(failed)
+        return failed
+
+    def stats(self):
+        with self._lock:
+            return {path: {"requests": count, "errors": self._errors[path]} for path, count in self._requests.items()}
+
+def start_server(**overrides):
+    # Runs the stand-in on a daemon thread; port 0 picks a free port. Pair it
+    # with config.use_local_provider(server.url) in the same process.
+    server = LocalProviderServer(dict(LOCAL_CONFIG, **overrides))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local stand-in for the AMFI and Yahoo providers")
+    parser.add_argument("--host", default=LOCAL_CONFIG["host"])
+    parser.add_argument("--port", type=int, default=LOCAL_CONFIG["port"])
+    parser.add_argument("--latency-ms", type=float, default=LOCAL_CONFIG["latencyMs"])
+    parser.add_argument("--jitter-ms", type=float, default=LOCAL_CONFIG["latencyJitterMs"])
+    parser.add_argument("--error-rate", type=float, default=LOCAL_CONFIG["errorRate"])
+    parser.add_argument("--schemes", type=int, default=LOCAL_CONFIG["schemes"], help="synthetic schemes listed in NAVAll.txt and AUM tables")
+    parser.add_argument("--seed", type=int, default=LOCAL_CONFIG["seed"])
+    parser.add_argument("--data-dir", default=LOCAL_CONFIG["dataDir"], help="recorded histories that replace the synthetic ones")
+    args = parser.parse_args()
+
+    server = LocalProviderServer({
+        "host": args.host,
+        "port": args.port,
+        "latencyMs": args.latency_ms,
+        "latencyJitterMs": args.jitter_ms,
+        "errorRate": args.error_rate,
+        "schemes": args.schemes,
+        "seed": args.seed,
+        "dataDir": args.data_dir
+    })
+    print(f"Serving AMFI/Yahoo stand-in at {server.url}; run the API with MF_PROVIDER_MODE=local")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
@@ -0,0 +1,57 @@
+from pymongo import UpdateOne
+from db import nav_collection, nifty_collection
+from .storage import insert_rows, parse_value
+from .coverage import record_coverage
+
+# One-off migrations for existing documents. Run with: python -m services.migrations
+#   1. the legacy layout, where each code kept its whole history in a single
+#      growing array, is expanded to one document per (code, date) row
+#   2. values still stored as strings are converted to floats
+#   3. coverage is seeded from the stored first/last date of every code, the
+#      same contiguity the old min/max check assumed, so existing data is not
+#      re-fetched
+
+BATCH_SIZE = 1000
+
+def migrate_history_arrays(collection, array_field, value_field):
+    migrated_codes = 0
+    migrated_rows = 0
+    for doc in collection.find({array_field: {"$exists": True}}):
+        migrated_rows += len(insert_rows(collection, doc["code"], doc[array_field], value_field))
+        collection.delete_one({"_id": doc["_id"]})
+        migrated_codes += 1
+    return migrated_codes, migrated_rows
+
+def migrate_string_values(collection, value_field):
+    converted = 0
+    ops = []
+    for doc in collection.find({value_field: {"$type": "string"}}, {"_id": 1, value_field: 1}):
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {value_field: parse_value(doc[value_field])}}))
+        if len(ops) >= BATCH_SIZE:
+            converted += collection.bulk_write(ops, ordered=False).modified_count
+            ops = []
+    if ops:
+        converted += collection.bulk_write(ops, ordered=False).modified_count
+    return converted
+
+def seed_coverage(collection):
+    seeded = 0
+    pipeline = [{"$group": {"_id": "$code", "start": {"$min": "$date"}, "end": {"$max": "$date"}}}]
+    for group in collection.aggregate(pipeline):
+        if group["start"] is None:
+            continue
+        record_coverage(group["_id"], group["start"], group["end"])
+        seeded += 1
+    return seeded
+
+def run_migrations():
+    codes, rows = migrate_history_arrays(nav_collection, "nav_history", "nav")
+    print(f"nav_data: migrated {codes} codes, {rows} rows")
+    codes, rows = migrate_history_arrays(nifty_collection, "history", "close")
+    print(f"nifty_data: migrated {codes} codes, {rows} rows")
+    print(f"nav_data: converted {migrate_string_values(nav_collection, 'nav')} string NAVs")
+    print(f"nifty_data: converted {migrate_string_values(nifty_collection, 'close')} string closes")
+    print(f"coverage: seeded {seed_coverage(nav_collection) + seed_coverage(nifty_collection)} codes")
+
+if __name__ == "__main__":
+    run_migrations()
@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+# Cache of fitted forecasting models and their forecasts. The key covers the
+# fund, the model configuration and a hash of the preprocessed training
+# series, so a new NAV row inside the window produces a new key and the stale
+# entry simply ages out. Entries live in an in-memory LRU and are also pickled
+# to a local artifact directory so they survive process restarts.
+
+ARTIFACT_DIR = os.environ.get(
+    "MF_MODEL_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "model_artifacts")
+)
+
+def model_key(fund, config, df):
+    digest = hashlib.sha256()
+    digest.update(fund.encode())
+    digest.update(json.dumps(config, sort_keys=True).encode())
+    digest.update(df.index.asi8.tobytes())
+    digest.update(df["nav"].to_numpy(dtype="float64").tobytes())
+    return digest.hexdigest()
+
+class ModelCache:
+    def __init__(self, artifact_dir=ARTIFACT_DIR, max_entries=32, max_artifacts=500):
+        self.artifact_dir = artifact_dir
+        self.max_entries = max_entries
+        self.max_artifacts = max_artifacts
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.artifact_dir, f"{key}.pkl")
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+        try:
+            with open(self._path(key), "rb") as f:
+                entry = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, entry)
+        return entry
+
+    def put(self, key, entry):
+        entry = dict(entry, key=key, created=datetime.now())
+        with self._lock:
+            self._remember(key, entry)
+        try:
+            os.makedirs(self.artifact_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+            self._prune_artifacts()
+        except OSError as e:
+            print(f"Error saving model artifact {key}: {e}")
+        return entry
+
+    def _prune_artifacts(self):
+        paths = [os.path.join(self.artifact_dir, name) for name in os.listdir(self.artifact_dir) if name.endswith(".pkl")]
+        if len(paths) <= self.max_artifacts:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_artifacts]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "hits": self.hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses
+            }
+
+model_cache = ModelCache()
@@ -0,0 +1,112 @@
+import argparse
+import time
+from collections import defaultdict
+from db import nav_collection, mf_collection
+from .utils import parse_date
+from .storage import Series, parse_value, upsert_docs
+from .cache import nav_cache
+from .derived import nav_derived
+from .config import get_provider
+from .coverage import record_coverage_many
+from .http_client import get_client
+
+# Bulk ingestion from AMFI's all-schemes daily NAV file (NAVAll.txt): one
+# download covers every scheme for a day. The file is read line by line and
+# written in fixed-size batches, so memory stays flat however many schemes it
+# lists. Only schemes present in mf_collection are stored.
+#   python -m services.nav_bulk                  download today's file
+#   python -m services.nav_bulk --file NAVAll.txt
+
+BATCH_SIZE = 5000
+
+def iter_nav_file(lines):
+    # Data lines look like
+    #   125497;INF200K01T28;-;SBI Small Cap Fund - Direct Plan - Growth;178.3512;17-Oct-2025
+    # Header, category ("Open Ended Schemes(...)"), AMC name and blank lines are skipped.
+    dates = {}
+    for line in lines:
+        fields = line.strip().split(";")
+        if len(fields) < 6 or not fields[0].isdigit():
+            continue
+        date_str = fields[5].strip()
+        if date_str not in dates:
+            try:
+                dates[date_str] = parse_date(date_str)
+            except ValueError:
+                dates[date_str] = None
+        if dates[date_str] is None:
+            continue
+        yield int(fields[0]), dates[date_str], parse_value(fields[4])
+
+def scheme_codes():
+    return {mf["scID"]: f"{mf['mfID']}@{mf['scID']}" for mf in mf_collection.find({}, {"mfID": 1, "scID": 1})}
+
+def ingest_nav_lines(lines, batch_size=BATCH_SIZE):
+    started = time.perf_counter()
+    codes = scheme_codes()
+    stats = {"rows": 0, "matched": 0, "inserted": 0}
+    batch = []
+    ingested = defaultdict(list)
+
+    def flush():
+        stats["inserted"] += upsert_docs(nav_collection, batch, "nav")
+        batch.clear()
+
+    for sc_id, date, nav in iter_nav_file(lines):
+        stats["rows"] += 1
+        code = codes.get(sc_id)
+        if code is None:
+            continue
+        stats["matched"] += 1
+        batch.append({"code": code, "date": date, "nav": nav})
+        ingested[code].append((date, nav))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    # Keep the series cache, derived series and coverage in step with what
+    # was written
+    by_date = defaultdict(list)
+    for code, rows in ingested.items():
+        rows.sort()
+        series = Series.from_rows([{"date": d, "nav": v} for d, v in rows], "nav")
+        nav_cache.extend(code, series)
+        nav_derived.extend(code, series)
+        for date in set(d for d, _ in rows):
+            by_date[date].append(code)
+    for date, date_codes in by_date.items():
+        record_coverage_many(date_codes, date, date)
+
+    stats["schemes"] = len(ingested)
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+def ingest_nav_file(path, batch_size=BATCH_SIZE):
+    with open(path, encoding="utf-8", errors="replace") as f:
+        return ingest_nav_lines(f, batch_size)
+
+def download_and_ingest(batch_size=BATCH_SIZE):
+    provider = get_provider("amfi_nav_all")
+    response = get_client().get(provider["url"], stream=True)
+    if response.status_code != 200:
+        return None, f"Failed to download NAV file: HTTP {response.status_code}"
+    with response:
+        return ingest_nav_lines(response.iter_lines(decode_unicode=True), batch_size), None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingest AMFI's all-schemes daily NAV file")
+    parser.add_argument("--file", help="local NAVAll.txt instead of downloading it")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    if args.file:
+        stats, error = ingest_nav_file(args.file, args.batch_size), None
+    else:
+        stats, error = download_and_ingest(args.batch_size)
+    if error:
+        raise SystemExit(error)
+    print(
+        f"Read {stats['rows']} rows, matched {stats['matched']} for {stats['schemes']} schemes, "
+        f"inserted {stats['inserted']} in {stats['seconds']:.2f}s"
+    )
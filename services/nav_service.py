@@ -1,107 +1,109 @@
 import requests
-from bs4 import BeautifulSoup
-import pandas as pd
-import json
-from datetime import datetime, timedelta
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from db import nav_collection, mf_collection
-from .utils import validate_dates
-import os
-from io import StringIO
-from statsmodels.tsa.arima.model import ARIMA
-import xgboost as xgb
-from sklearn.metrics import mean_squared_error, mean_absolute_error
+from .utils import validate_dates, parse_date, format_date, DATE_FORMAT
+from .storage import insert_rows
+from .cache import nav_cache, load_cached_series, load_cached_series_many
+from .derived import nav_derived, load_derived
+from .config import get_provider
+from .coverage import fetch_missing
+from .http_client import get_client
+from .parsers import parse_nav_history
+from .forecasting import MODEL_CONFIG, FAST_CONFIG, MAX_HORIZON, preprocess, fit_and_forecast, fit_and_forecast_fast
+from .model_cache import model_cache, model_key
+from .jobs import prediction_jobs
+from .backtest import fit_base, backtest_block, origin_blocks, merge_blocks, walk_forward_origins, DEFAULT_STEP
 import numpy as np
 
-# Load providers configuration from the same directory as nav_service.py
-BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-PROVIDERS_PATH = os.path.join(BASE_DIR, 'providers.json')
-with open(PROVIDERS_PATH, 'r') as f:
-    PROVIDERS = json.load(f)["providers"]
+SYNC_PREDICTION_TIMEOUT = 120
+BATCH_PREDICTION_TIMEOUT = 600
+BATCH_FETCH_WORKERS = 8
+MAX_BATCH_FUNDS = 50
+PREDICTION_MODES = ("full", "fast", "auto")
+# Assumed cost of an uncached full fit until some have been measured
+DEFAULT_FULL_LATENCY_MS = 5000
+
+full_latencies_ms = deque(maxlen=20)
 
 def scrape_nav_history(mf_id, sc_id, f_date, t_date):
-    provider = next(p for p in PROVIDERS if p["providerName"] == "amfi")
+    provider = get_provider("amfi")
     url = provider["url"]
     payload = {'mfID': mf_id, 'scID': sc_id, 'fDate': f_date, 'tDate': t_date}
-    response = requests.post(url, data=payload)
+    try:
+        response = get_client().post(url, data=payload)
+    except requests.RequestException as e:
+        print(f"Error scraping NAV history for {mf_id}@{sc_id}: {e}")
+        return None
     if response.status_code == 200:
-        soup = BeautifulSoup(response.text, 'html.parser')
-        rows = soup.select('tr')
-        nav_data = []
-        for row in rows[1:]:
-            cols = row.find_all('td')
-            if len(cols) >= 4:
-                nav_value = cols[0].get_text(strip=True)
-                nav_date = cols[3].get_text(strip=True)
-                nav_data.append({"date": nav_date, "nav": nav_value})
-        return nav_data
+        return parse_nav_history(response.text)
     return None
 
 def add_nav(mf_id, sc_id, nav_data):
     code = f"{mf_id}@{sc_id}"
-    existing_doc = nav_collection.find_one({"code": code})
-    existing_nav = existing_doc["nav_history"] if existing_doc and "nav_history" in existing_doc else []
-    existing_dates = set(entry["date"] for entry in existing_nav)
-    
-    new_entries = [entry for entry in nav_data if entry["date"] not in existing_dates]
-    if not new_entries:
-        return
-    
-    updated_nav = existing_nav + new_entries
-    updated_nav.sort(key=lambda x: datetime.strptime(x["date"], "%d-%b-%Y"))
-    
-    nav_collection.update_one(
-        {"code": code},
-        {"$set": {"nav_history": updated_nav}},
-        upsert=True
-    )
+    series = insert_rows(nav_collection, code, nav_data, "nav")
+    nav_cache.extend(code, series)
+    nav_derived.extend(code, series)
+    return series
 
 def list_nav(mf_id, sc_id, from_date, to_date):
     code = f"{mf_id}@{sc_id}"
-    doc = nav_collection.find_one({"code": code})
-    if not doc or "nav_history" not in doc:
-        print("No document or nav_history found")
-        return pd.DataFrame(columns=["date", "nav"])
-    
-    from_dt = datetime.strptime(from_date, "%d-%b-%Y")
-    to_dt = datetime.strptime(to_date, "%d-%b-%Y")
-    
-    nav_history = [
-        entry for entry in doc["nav_history"]
-        if from_dt <= datetime.strptime(entry["date"], "%d-%b-%Y") <= to_dt
-    ]
-    
-    df = pd.DataFrame(nav_history, columns=["date", "nav"])
-    df["date"] = pd.to_datetime(df["date"], format="%d-%b-%Y")
-    df = df.sort_values("date")
-    df["date"] = df["date"].dt.strftime("%d-%b-%Y")
-    
-    return df
+    series = load_cached_series(nav_cache, nav_collection, code, parse_date(from_date), parse_date(to_date), "nav")
+    return series.to_frame("date", "nav")
 
-def describe_nav(df):
+def describe_nav(df, derived=None):
     if df.empty:
         return {"startDate": None, "endDate": None, "nullDates": [], "average": None, "stdDev": None}
     
-    df["nav"] = pd.to_numeric(df["nav"], errors="coerce")
-    start_date = df["date"].min()
-    end_date = df["date"].max()
-    null_dates = df[df["nav"].isna()]["date"].tolist()
-    avg_nav = df["nav"].mean()
-    std_nav = df["nav"].std()
+    nav = df["nav"].to_numpy(dtype=np.float64)
+    dates = df["date"].dt.strftime(DATE_FORMAT).to_numpy()
+    valid = ~np.isnan(nav)
+    
+    # With the fund's derived series the mean/std are differences of its
+    # running sums instead of a pass over the window
+    window = derived.index_range(df["date"].iloc[0], df["date"].iloc[-1]) if derived is not None else None
+    if window is not None:
+        average, std_dev = derived.value_stats(*window)
+    else:
+        average = float(nav[valid].mean()) if valid.any() else None
+        std_dev = float(nav[valid].std(ddof=1)) if valid.sum() > 1 else None
     
     return {
-        "startDate": start_date,
-        "endDate": end_date,
-        "nullDates": null_dates,
-        "average": avg_nav,
-        "stdDev": std_nav
+        "startDate": dates[0],
+        "endDate": dates[-1],
+        "nullDates": dates[~valid].tolist(),
+        "average": average,
+        "stdDev": std_dev
     }
 
+def fetch_nav_range(mf_id, sc_id, from_dt, to_dt, max_workers=None):
+    # Scrape and store whatever part of [from_dt, to_dt] is not covered yet
+    provider = get_provider("amfi")
+
+    def fetch(start, end):
+        nav_data = scrape_nav_history(mf_id, sc_id, format_date(start), format_date(end))
+        if nav_data is None:
+            return None
+        return add_nav(mf_id, sc_id, nav_data)
+
+    return fetch_missing(
+        f"{mf_id}@{sc_id}", from_dt, to_dt, fetch,
+        provider["maxDaysPerRequest"], max_workers or provider["maxConcurrentRequests"]
+    )
+
 def get_mf_ids(company, fund):
     mf = mf_collection.find_one({"company": company, "fund": fund})
     if mf:
         return mf["mfID"], mf["scID"]
     return None, None
 
+def get_nav_derived(mf_name):
+    mf = mf_collection.find_one({"fund": mf_name})
+    if not mf:
+        return None, "Mutual Fund not found"
+    return load_derived(nav_derived, nav_collection, f"{mf['mfID']}@{mf['scID']}", "nav"), None
+
 def get_nav_data(mf_name, from_date, to_date):
     mf = mf_collection.find_one({"fund": mf_name})
     if not mf:
@@ -112,251 +114,261 @@ def get_nav_data(mf_name, from_date, to_date):
     if error:
         return None, error
 
-    df = list_nav(mf_id, sc_id, from_date, to_date)
-    if not df.empty:
-        stored_start = df["date"].min()
-        stored_end = df["date"].max()
-        stored_start_dt = datetime.strptime(stored_start, "%d-%b-%Y")
-        stored_end_dt = datetime.strptime(stored_end, "%d-%b-%Y")
-        from_dt = datetime.strptime(from_date, "%d-%b-%Y")
-        to_dt = datetime.strptime(to_date, "%d-%b-%Y")
-        if stored_start_dt <= from_dt and stored_end_dt >= to_dt:
-            return df, None
-        else:
-            if stored_start_dt > from_dt:
-                start_nav_data = scrape_nav_history(mf_id, sc_id, from_date, stored_start)
-                if start_nav_data:
-                    add_nav(mf_id, sc_id, start_nav_data)
-            if stored_end_dt < to_dt:
-                end_nav_data = scrape_nav_history(mf_id, sc_id, stored_end, to_date)
-                if end_nav_data:
-                    add_nav(mf_id, sc_id, end_nav_data)
-            updated_df = list_nav(mf_id, sc_id, from_date, to_date)
-            return updated_df, None
-    else:
-        nav_data = scrape_nav_history(mf_id, sc_id, from_date, to_date)
-        if nav_data:
-            add_nav(mf_id, sc_id, nav_data)
-            return list_nav(mf_id, sc_id, from_date, to_date), None
+    code = f"{mf_id}@{sc_id}"
+    from_dt = parse_date(from_date)
+    to_dt = parse_date(to_date)
+    fetch_nav_range(mf_id, sc_id, from_dt, to_dt)
+    series = load_cached_series(nav_cache, nav_collection, code, from_dt, to_dt, "nav")
+    if not len(series):
         return None, "Failed to fetch data from AMFI"
+    return series.to_frame("date", "nav"), None
 
-def get_aum_data(mf_name, year_quarter):
-    mf = mf_collection.find_one({"fund": mf_name})
-    if not mf:
-        return None, "Mutual Fund not found"
+def get_nav_data_many(mf_names, from_date, to_date):
+    # Batch form of get_nav_data: one lookup for the funds, concurrent
+    # fetches for uncovered ranges and one query for series not in cache
+    error = validate_dates(from_date, to_date)
+    if error:
+        return {name: (None, error) for name in mf_names}
     
-    mf_id = mf["mfID"]
+    from_dt = parse_date(from_date)
+    to_dt = parse_date(to_date)
+    funds = {mf["fund"]: mf for mf in mf_collection.find({"fund": {"$in": list(mf_names)}})}
+    results = {name: (None, "Mutual Fund not found") for name in mf_names if name not in funds}
+    if not funds:
+        return results
     
-    year_quarter_map = {
-        "January - March 2025": "1",
-        "October - December 2024": "2",
-        "July - September 2024": "3",
-        "April - June 2024": "4",
-    }
-    year_id = year_quarter_map.get(year_quarter)
-    if not year_id:
-        return None, f"Invalid Year_Quarter: {year_quarter}"
+    with ThreadPoolExecutor(max_workers=min(len(funds), BATCH_FETCH_WORKERS)) as executor:
+        list(executor.map(lambda mf: fetch_nav_range(mf["mfID"], mf["scID"], from_dt, to_dt), funds.values()))
     
-    url = "https://www.amfiindia.com/modules/AverageAUMDetails"
-    payload = {
-        "AUmType": "S",
-        "AumCatType": "Typewise",
-        "MF_Id": str(mf_id),
-        "Year_Id": year_id,
-        "Year_Quarter": year_quarter
-    }
+    codes = {name: f"{mf['mfID']}@{mf['scID']}" for name, mf in funds.items()}
+    series = load_cached_series_many(nav_cache, nav_collection, set(codes.values()), from_dt, to_dt, "nav")
+    for name, code in codes.items():
+        if len(series[code]):
+            results[name] = (series[code].to_frame("date", "nav"), None)
+        else:
+            results[name] = (None, "Failed to fetch data from AMFI")
+    return results
+
+def validate_horizon(horizon):
+    if not isinstance(horizon, int) or not 1 <= horizon <= MAX_HORIZON:
+        return f"Invalid Horizon: must be an integer between 1 and {MAX_HORIZON}"
+    return None
+
+def build_prediction(mf_name, df, horizon):
+    if df.empty or len(df) < 50:  # Need sufficient data for modeling
+        return None, "Insufficient data for prediction"
+    
+    df = preprocess(df)
+    if df.empty:
+        return None, "No valid data after preprocessing"
+    
+    config = dict(MODEL_CONFIG, horizon=horizon)
+    return {"fund": mf_name, "config": config, "df": df, "key": model_key(mf_name, config, df)}, None
+
+def prepare_prediction(mf_name, from_date, to_date, horizon):
+    error = validate_horizon(horizon)
+    if error:
+        return None, error
+    
+    # Step 1: Fetch and preprocess data
+    df, error = get_nav_data(mf_name, from_date, to_date)
+    if error:
+        return None, error
+    return build_prediction(mf_name, df, horizon)
+
+def forecast_payload(entry):
+    return {"predictions": entry["predictions"], "metrics": entry["metrics"]}
+
+def start_prediction(spec):
+    # Reuse the fitted model and forecast when this fund was already
+    # fitted on exactly the same training series. Jobs keep only the
+    # forecast; the fitted models live in the model cache.
+    entry = model_cache.get(spec["key"])
+    if entry is not None:
+        return prediction_jobs.complete(spec["key"], spec["fund"], forecast_payload(entry)), None
+    
+    def store(result):
+        return forecast_payload(model_cache.put(spec["key"], dict(result, fund=spec["fund"])))
+    
+    return prediction_jobs.submit(spec["key"], spec["fund"], fit_and_forecast, (spec["df"], spec["config"]), store)
+
+def submit_prediction(mf_name, from_date, to_date, horizon=MODEL_CONFIG["horizon"]):
+    try:
+        spec, error = prepare_prediction(mf_name, from_date, to_date, horizon)
+        if error:
+            return None, error
+        return start_prediction(spec)
     
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
-        "Accept": "*/*",
-        "Accept-Language": "en-US,en;q=0.9",
-        "Content-Type": "application/x-www-form-urlencoded; charset=UTF-8",
-        "X-Requested-With": "XMLHttpRequest",
-        "Origin": "https://www.amfiindia.com",
-        "Referer": "https://www.amfiindia.com/research-information/aum-data/average-aum"
+    except Exception as e:
+        return None, f"Error in NAV prediction: {str(e)}"
+
+def get_prediction_job(job_id):
+    job = prediction_jobs.get(job_id)
+    if not job:
+        return None, "Prediction job not found"
+    return job, None
+
+def prediction_job_view(job):
+    view = {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "fund": job["label"],
+        "submitted": job["submitted"].isoformat(),
+        "finished": job["finished"].isoformat() if job["finished"] else None
     }
+    if job["status"] == "done" and "backtest" in job["result"]:
+        view["backtest"] = job["result"]["backtest"]
+    elif job["status"] == "done":
+        view["predictions"] = job["result"]["predictions"]
+        view["metrics"] = job["result"]["metrics"]
+    if job["error"]:
+        view["error"] = job["error"]
+    return view
+
+def predict_nav(mf_name, from_date, to_date, horizon=MODEL_CONFIG["horizon"], timeout=SYNC_PREDICTION_TIMEOUT):
+    result, error = forecast_nav(mf_name, from_date, to_date, horizon, "full", timeout=timeout)
+    if error:
+        return None, None, error
+    return result["predictions"], result["metrics"], None
+
+def predict_nav_batch(mf_names, from_date, to_date, horizon=MODEL_CONFIG["horizon"], timeout=BATCH_PREDICTION_TIMEOUT):
+    error = validate_horizon(horizon)
+    if error:
+        return None, error
+    
+    deadline = time.monotonic() + timeout
+    results = {}
+    specs = []
+    for mf_name, (df, error) in get_nav_data_many(mf_names, from_date, to_date).items():
+        if not error:
+            try:
+                spec, error = build_prediction(mf_name, df, horizon)
+            except Exception as e:
+                error = f"Error in NAV prediction: {str(e)}"
+        if error:
+            results[mf_name] = {"error": error}
+        else:
+            specs.append(spec)
+    
+    # Fan the fits out over the job pool; when the queue is full, wait for
+    # this batch's oldest outstanding job before submitting more
+    jobs = {}
+    outstanding = []
+    for spec in specs:
+        job, error = start_prediction(spec)
+        while error and "queue is full" in error and outstanding:
+            prediction_jobs.wait(outstanding.pop(0), max(0, deadline - time.monotonic()))
+            job, error = start_prediction(spec)
+        if error:
+            results[spec["fund"]] = {"error": error}
+        else:
+            jobs[spec["fund"]] = job
+            outstanding.append(job)
+    
+    for mf_name, job in jobs.items():
+        job = prediction_jobs.wait(job, max(0, deadline - time.monotonic()))
+        if job["status"] == "done":
+            results[mf_name] = {"predictions": job["result"]["predictions"], "metrics": job["result"]["metrics"]}
+        elif job["status"] == "failed":
+            results[mf_name] = {"error": job["error"]}
+        else:
+            results[mf_name] = {"error": f"Prediction still running, poll job {job['job_id']}", "job_id": job["job_id"]}
+    return {mf_name: results[mf_name] for mf_name in mf_names}, None
+
+def backtest_nav(mf_name, from_date, to_date, horizon=MODEL_CONFIG["horizon"], step=DEFAULT_STEP):
+    # Submitted to the prediction job pool like a forecast: the base fit runs
+    # first, then blocks of origins in parallel. The client polls the
+    # returned job for the result
+    error = validate_horizon(horizon)
+    if error:
+        return None, error
+    if not isinstance(step, int) or step < 1:
+        return None, "Invalid Step: must be a positive integer"
     
     try:
-        response = requests.post(url, data=payload, headers=headers)
-        if response.status_code != 200:
-            return None, "Failed to fetch AUM data from AMFI"
-        
-        tables = pd.read_html(StringIO(response.text))
-        if not tables:
-            return None, "No AUM data tables found"
-        
-        df = tables[0]
-        df.columns = [' '.join(col).strip() if isinstance(col, tuple) else col for col in df.columns]
-        
-        scheme_col = next((col for col in df.columns if "Scheme NAV Name" in col), None)
-        aum_col = next((col for col in df.columns if "Average AUM for The Month" in col and "Fund Of Funds" not in col), None)
-        
-        if not scheme_col or not aum_col:
-            return None, "Required AUM columns not found"
-        
-        match = df[df[scheme_col].str.contains(mf_name, case=False, na=False)]
-        if match.empty:
-            return None, f"Scheme not found: {mf_name}"
-        
-        aum_value = float(match.iloc[0][aum_col])
-        return {"fund": mf_name, "year_quarter": year_quarter, "aum_lakhs": aum_value}, None
+        spec, error = prepare_prediction(mf_name, from_date, to_date, horizon)
+        if error:
+            return None, error
+        df, config = spec["df"], spec["config"]
+        train_size = int(config["train_fraction"] * len(df))
+        origins = walk_forward_origins(len(df), train_size, horizon, step)
+        if not len(origins):
+            return None, "Insufficient data for backtest"
+        
+        started = time.monotonic()
+        
+        def split(base):
+            return [
+                (backtest_block, (df["nav"], base, tuple(config["arima_order"]), block, horizon))
+                for block in origin_blocks(origins, prediction_jobs.max_workers)
+            ]
+        
+        def merge(base, parts):
+            seconds = time.monotonic() - started
+            result = merge_blocks(df, origins, parts)
+            return {"backtest": dict(result, folds=result["origins"], seconds=seconds, foldsPerSecond=result["origins"] / seconds if seconds else None)}
+        
+        return prediction_jobs.submit(
+            f"backtest:{spec['key']}:{step}", spec["fund"], fit_base, (df, config), merge, split
+        )
     
     except Exception as e:
-        return None, f"Error fetching AUM data: {str(e)}"
+        return None, f"Error in NAV backtest: {str(e)}"
+
+def full_latency_estimate():
+    if not full_latencies_ms:
+        return DEFAULT_FULL_LATENCY_MS
+    return float(np.median(full_latencies_ms))
+
+def select_mode(spec, latency_budget_ms):
+    # A cached full forecast is as cheap as the fast model; otherwise use the
+    # full model only when recent fits have fit inside the budget
+    if latency_budget_ms is None or model_cache.get(spec["key"]) is not None:
+        return "full"
+    return "full" if latency_budget_ms >= full_latency_estimate() else "fast"
 
-def predict_nav(mf_name, from_date, to_date):
+def forecast_nav(mf_name, from_date, to_date, horizon=MODEL_CONFIG["horizon"], mode=None, latency_budget_ms=None, timeout=SYNC_PREDICTION_TIMEOUT):
+    started = time.perf_counter()
+    mode = mode or ("auto" if latency_budget_ms is not None else "full")
+    if mode not in PREDICTION_MODES:
+        return None, f"Invalid Mode: must be one of {', '.join(PREDICTION_MODES)}"
+    if latency_budget_ms is not None and (isinstance(latency_budget_ms, bool) or not isinstance(latency_budget_ms, (int, float)) or latency_budget_ms <= 0):
+        return None, "Invalid LatencyBudgetMs: must be a positive number"
+    
     try:
-        # Step 1: Fetch and preprocess data
-        df, error = get_nav_data(mf_name, from_date, to_date)
+        spec, error = prepare_prediction(mf_name, from_date, to_date, horizon)
         if error:
-            return None, None, error
-        
-        if df.empty or len(df) < 50:  # Need sufficient data for modeling
-            return None, None, "Insufficient data for prediction"
-        
-        print(f"Initial data size: {len(df)}")
-        
-        df["nav"] = pd.to_numeric(df["nav"], errors="coerce")
-        df["date"] = pd.to_datetime(df["date"], format="%d-%b-%Y")
-        df = df.sort_values("date")
-        df["nav"] = df["nav"].interpolate()  # Fill gaps
-        df = df.dropna()  # Drop any remaining NaNs
-        
-        if df.empty:
-            return None, None, "No valid data after preprocessing"
-        
-        # Set date as index with daily frequency
-        df.set_index("date", inplace=True)
-        df = df.asfreq('D', method='ffill')  # Ensure daily frequency, forward-fill gaps
-        
-        print(f"Preprocessed data size: {len(df)}")
-        
-        # Step 2: Train-test split (80% train, 20% test)
-        train_size = int(0.8 * len(df))
-        train_df = df[:train_size]
-        test_df = df[train_size:]
-        
-        print(f"Train size: {len(train_df)}, Test size: {len(test_df)}")
-        
-        # Step 3: Train ARIMA for long-term trend
-        arima_model = ARIMA(train_df["nav"], order=(5, 1, 0))
-        arima_fit = arima_model.fit()
-        
-        # Predict ARIMA for train and test periods
-        arima_train_pred = arima_fit.predict(start=train_df.index[0], end=train_df.index[-1])
-        arima_test_pred = arima_fit.forecast(steps=len(test_df))
-        arima_test_pred.index = test_df.index  # Align test predictions with test_df index
-        
-        print(f"ARIMA train pred size: {len(arima_train_pred)}, ARIMA test pred size: {len(arima_test_pred)}")
-        
-        # Step 4: Calculate residuals
-        train_residuals = train_df["nav"] - arima_train_pred
-        
-        # Step 5: Feature engineering for XGBoost
-        def create_features(data, nav_col="nav"):
-            df_features = data.copy()
-            df_features["lag1"] = df_features[nav_col].shift(1)
-            df_features["lag2"] = df_features[nav_col].shift(2)
-            df_features["lag3"] = df_features[nav_col].shift(3)
-            df_features["rolling_mean_3"] = df_features[nav_col].rolling(window=3).mean()
-            df_features["rolling_std_3"] = df_features[nav_col].rolling(window=3).std()
-            return df_features
-        
-        # Apply feature engineering
-        train_features = create_features(train_df)
-        test_features = create_features(test_df)
-        
-        # Drop NaNs and align residuals
-        train_features = train_features.dropna()
-        test_features = test_features.dropna()
-        
-        print(f"Train features size: {len(train_features)}, Test features size: {len(test_features)}")
-        
-        # Align residuals with feature indices
-        train_residuals = train_residuals.loc[train_features.index]
-        test_residuals = test_df["nav"].loc[test_features.index] - arima_test_pred.loc[test_features.index]
-        
-        # Features and target for XGBoost
-        feature_cols = ["lag1", "lag2", "lag3", "rolling_mean_3", "rolling_std_3"]
-        X_train = train_features[feature_cols]
-        y_train = train_residuals
-        X_test = test_features[feature_cols]
-        y_test = test_residuals
-        
-        # Debug shapes
-        print(f"X_train shape: {X_train.shape}, y_train shape: {y_train.shape}")
-        print(f"X_test shape: {X_test.shape}, y_test shape: {y_test.shape}")
-        
-        # Step 6: Train XGBoost on residuals
-        xgb_model = xgb.XGBRegressor(n_estimators=100, learning_rate=0.1, max_depth=3)
-        xgb_model.fit(X_train, y_train)
-        
-        # Predict residuals
-        xgb_train_pred = xgb_model.predict(X_train)
-        xgb_test_pred = xgb_model.predict(X_test)
-        
-        # Step 7: Combine predictions
-        final_train_pred = arima_train_pred.loc[train_features.index] + xgb_train_pred
-        final_test_pred = arima_test_pred.loc[test_features.index] + xgb_test_pred
-        
-        # Step 8: Evaluate performance
-        test_nav_mean = test_df["nav"].loc[test_features.index].mean()
-        rmse = np.sqrt(mean_squared_error(test_df["nav"].loc[test_features.index], final_test_pred))
-        mae = mean_absolute_error(test_df["nav"].loc[test_features.index], final_test_pred)
-        rmse_percent = (rmse / test_nav_mean) * 100
-        mae_percent = (mae / test_nav_mean) * 100
-        
-        metrics = {
-            "rmse_percent": rmse_percent,
-            "mae_percent": mae_percent
-        }
-        
-        print(f"Test NAV mean: {test_nav_mean}, RMSE: {rmse}, MAE: {mae}")
-        print(f"RMSE %: {rmse_percent}, MAE %: {mae_percent}")
-        
-        # Step 9: Forecast next 14 days
-        last_date = df.index.max()
-        future_dates = pd.date_range(start=last_date + timedelta(days=1), periods=14, freq='D')
-        
-        # ARIMA forecast for next 14 days
-        arima_future_pred = arima_fit.forecast(steps=14)
-        arima_future_pred.index = future_dates  # Align with future dates
-        
-        # Prepare features for XGBoost future prediction
-        last_data = df.tail(10).copy()  # Use recent data for feature continuity
-        future_features = []
-        last_nav = df["nav"].iloc[-1]
-        
-        for i in range(14):
-            # Simulate NAV for feature engineering
-            if i == 0:
-                prev_nav = last_nav
-            else:
-                prev_nav = arima_future_pred.iloc[i-1] + xgb_model.predict(future_features[-1].reshape(1, -1))[0]
-            
-            new_row = pd.DataFrame({
-                "nav": [prev_nav]
-            }, index=[future_dates[i]])
-            last_data = pd.concat([last_data, new_row])
-            features = create_features(last_data)
-            features = features.dropna()
-            if features.empty:
-                return None, None, "Failed to generate future features"
-            future_features.append(features[feature_cols].iloc[-1].values)
-        
-        future_features = np.array(future_features)
-        xgb_future_pred = xgb_model.predict(future_features)
-        
-        # Final future predictions
-        final_future_pred = arima_future_pred + xgb_future_pred
-        
-        # Format predictions
-        predictions = [
-            {"date": future_dates[i].strftime("%d-%b-%Y"), "nav_predicted": float(final_future_pred.iloc[i])}
-            for i in range(14)
-        ]
-        
-        return predictions, metrics, None
+            return None, error
+        if mode == "auto":
+            mode = select_mode(spec, latency_budget_ms)
+        
+        model_started = time.perf_counter()
+        if mode == "fast":
+            config = dict(FAST_CONFIG, horizon=horizon)
+            result = fit_and_forecast_fast(spec["df"], config)
+        else:
+            config = spec["config"]
+            job, error = start_prediction(spec)
+            if error:
+                return None, error
+            cached = job["status"] == "done"
+            job = prediction_jobs.wait(job, timeout)
+            if job["status"] == "failed":
+                return None, job["error"]
+            if job["status"] != "done":
+                return None, f"Prediction still running, poll job {job['job_id']}"
+            result = job["result"]
+            if not cached:
+                full_latencies_ms.append((time.perf_counter() - model_started) * 1000)
+        
+        return {
+            "predictions": result["predictions"],
+            "metrics": result["metrics"],
+            "mode": mode,
+            "model": config["model"],
+            "modelMs": (time.perf_counter() - model_started) * 1000,
+            "elapsedMs": (time.perf_counter() - started) * 1000
+        }, None
     
     except Exception as e:
-        return None, None, f"Error in NAV prediction: {str(e)}"
\ No newline at end of file
+        return None, f"Error in NAV prediction: {str(e)}"
@@ -1,99 +1,28 @@
-import pandas as pd
-import yfinance as yf
-from datetime import datetime
-from db import nifty_collection
-from .utils import validate_dates
+from .benchmark_service import (
+    scrape_benchmark_history, add_benchmark_data, list_benchmark_data,
+    fetch_benchmarks_range, get_benchmark_data, get_benchmark_derived
+)
+
+# Nifty 50 entry points, kept for existing callers; the work is done by the
+# generic benchmark service under the NIFTY50 code.
+
+NIFTY_CODE = "NIFTY50"
 
 def scrape_nifty_history(from_date, to_date):
-    ticker = "^NSEI"
-    try:
-        from_dt = datetime.strptime(from_date, "%d-%b-%Y")
-        to_dt = datetime.strptime(to_date, "%d-%b-%Y")
-        
-        nifty_df = yf.download(ticker, start=from_dt, end=to_dt, interval="1d", progress=False)
-        if nifty_df.empty:
-            return None
-        
-        nifty_df = nifty_df["Close"].reset_index()
-        nifty_df.columns = ["Date", "Close"]
-        nifty_df["Date"] = nifty_df["Date"].dt.strftime("%d-%b-%Y")
-        
-        return [{"date": row["Date"], "close": float(row["Close"])} for _, row in nifty_df.iterrows()]
-    except Exception as e:
-        print(f"Error scraping Nifty data: {str(e)}")
-        return None
+    rows = scrape_benchmark_history([NIFTY_CODE], from_date, to_date)
+    return None if rows is None else rows[NIFTY_CODE]
 
 def add_nifty_data(nifty_data):
-    code = "NIFTY50"
-    existing_doc = nifty_collection.find_one({"code": code})
-    existing_history = existing_doc["history"] if existing_doc and "history" in existing_doc else []
-    existing_dates = set(entry["date"] for entry in existing_history)
-    
-    new_entries = [entry for entry in nifty_data if entry["date"] not in existing_dates]
-    if not new_entries:
-        return
-    
-    updated_history = existing_history + new_entries
-    updated_history.sort(key=lambda x: datetime.strptime(x["date"], "%d-%b-%Y"))
-    
-    nifty_collection.update_one(
-        {"code": code},
-        {"$set": {"history": updated_history}},
-        upsert=True
-    )
+    return add_benchmark_data(NIFTY_CODE, nifty_data)
 
 def list_nifty_data(from_date, to_date):
-    code = "NIFTY50"
-    doc = nifty_collection.find_one({"code": code})
-    if not doc or "history" not in doc:
-        return pd.DataFrame(columns=["Date", "Close"])
-    
-    #change the string into datetime object to correctly match the date
-    from_dt = datetime.strptime(from_date, "%d-%b-%Y")
-    to_dt = datetime.strptime(to_date, "%d-%b-%Y")
-    
-    history = [
-        entry for entry in doc["history"]
-        if from_dt <= datetime.strptime(entry["date"], "%d-%b-%Y") <= to_dt
-    ]
-    
-    df = pd.DataFrame(history, columns=["date", "close"])
-    df = df.rename(columns={"date": "Date", "close": "Close"})
-    df["Date"] = pd.to_datetime(df["Date"], format="%d-%b-%Y")
-    df = df.sort_values("Date")
-    df["Date"] = df["Date"].dt.strftime("%d-%b-%Y")
-    
-    return df
+    return list_benchmark_data(NIFTY_CODE, from_date, to_date)
+
+def fetch_nifty_range(from_dt, to_dt, max_workers=None):
+    return fetch_benchmarks_range([NIFTY_CODE], from_dt, to_dt, max_workers)
 
 def get_nifty_data(from_date, to_date):
-    error = validate_dates(from_date, to_date)
-    if error:
-        return None, error
-    
-    df = list_nifty_data(from_date, to_date)
-    if not df.empty:
-        stored_start = df["Date"].min()
-        stored_end = df["Date"].max()
-        stored_start_dt = datetime.strptime(stored_start, "%d-%b-%Y")
-        stored_end_dt = datetime.strptime(stored_end, "%d-%b-%Y")
-        from_dt = datetime.strptime(from_date, "%d-%b-%Y")
-        to_dt = datetime.strptime(to_date, "%d-%b-%Y")
-        if stored_start_dt <= from_dt and stored_end_dt >= to_dt:
-            return df, None
-        else:
-            if stored_start_dt > from_dt:
-                start_nifty_data = scrape_nifty_history(from_date, stored_start)
-                if start_nifty_data:
-                    add_nifty_data(start_nifty_data)
-            if stored_end_dt < to_dt:
-                end_nifty_data = scrape_nifty_history(stored_end, to_date)
-                if end_nifty_data:
-                    add_nifty_data(end_nifty_data)
-            updated_df = list_nifty_data(from_date, to_date)
-            return updated_df, None
-    else:
-        nifty_data = scrape_nifty_history(from_date, to_date)
-        if nifty_data:
-            add_nifty_data(nifty_data)
-            return list_nifty_data(from_date, to_date), None
-        return None, "Failed to fetch Nifty data"
\ No newline at end of file
+    return get_benchmark_data(NIFTY_CODE, from_date, to_date)
+
+def get_nifty_derived():
+    return get_benchmark_derived(NIFTY_CODE)
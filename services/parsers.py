@@ -0,0 +1,46 @@
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import html as lxml_html
+except ImportError:
+    lxml_html = None
+
+# Parsers for AMFI NavHistoryPeriod responses. Both return the same
+# [{"date", "nav"}] rows: every <tr> after the first with at least four <td>
+# cells, NAV from the first cell and date from the fourth. The lxml path skips
+# building a BeautifulSoup tree; the BeautifulSoup path is kept as a fallback.
+
+def parse_nav_history_soup(html):
+    soup = BeautifulSoup(html, 'html.parser')
+    rows = soup.select('tr')
+    nav_data = []
+    for row in rows[1:]:
+        cols = row.find_all('td')
+        if len(cols) >= 4:
+            nav_value = cols[0].get_text(strip=True)
+            nav_date = cols[3].get_text(strip=True)
+            nav_data.append({"date": nav_date, "nav": nav_value})
+    return nav_data
+
+def _cell_text(cell):
+    # Same result as BeautifulSoup's get_text(strip=True)
+    return "".join(text.strip() for text in cell.itertext())
+
+def parse_nav_history_lxml(html):
+    if not html.strip():
+        return []
+    tree = lxml_html.fromstring(html)
+    nav_data = []
+    for row in list(tree.iter("tr"))[1:]:
+        cols = list(row.iter("td"))
+        if len(cols) >= 4:
+            nav_data.append({"date": _cell_text(cols[3]), "nav": _cell_text(cols[0])})
+    return nav_data
+
+def parse_nav_history(html):
+    if lxml_html is not None:
+        try:
+            return parse_nav_history_lxml(html)
+        except Exception as e:
+            print(f"lxml parse failed, falling back to BeautifulSoup: {e}")
+    return parse_nav_history_soup(html)
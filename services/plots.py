@@ -0,0 +1,138 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+# In-memory plot rendering and cache. Figures are drawn with the object
+# oriented Figure/Agg API, which keeps no global state and is safe to use from
+# concurrent request threads, and rendered straight into a PNG buffer. PNGs are
+# cached under a hash of everything that determines the picture, so a repeat
+# request finds its plot without touching matplotlib and the key doubles as
+# a strong ETag. Besides the in-memory LRU every PNG is written to a shared
+# directory, so /plot/<name> works on whichever server worker handles it.
+
+PLOT_CACHE_BYTES = 64 * 1024 * 1024
+PLOT_MAX_AGE = 86400
+PLOT_DIR = os.environ.get(
+    "MF_PLOT_DIR",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "plot_artifacts")
+)
+
+def plot_key(*parts):
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            digest.update(np.ascontiguousarray(part).tobytes())
+        else:
+            digest.update(str(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+def render_line_plot(dates, lines, title, ylabel):
+    # lines is a list of (label, values) drawn against the shared dates
+    fig = Figure(figsize=(10, 6))
+    canvas = FigureCanvasAgg(fig)
+    ax = fig.add_subplot()
+    for label, values in lines:
+        ax.plot(dates, values, label=label)
+    ax.set_title(title)
+    ax.set_xlabel("Date")
+    ax.set_ylabel(ylabel)
+    ax.legend()
+    ax.grid(True)
+    buffer = io.BytesIO()
+    canvas.print_png(buffer)
+    return buffer.getvalue()
+
+class PlotCache:
+    def __init__(self, plot_dir=PLOT_DIR, max_bytes=PLOT_CACHE_BYTES, max_files=2000):
+        self.plot_dir = plot_dir
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _path(self, key):
+        return os.path.join(self.plot_dir, f"{key}.png")
+
+    def _remember(self, key, png):
+        if len(png) > self.max_bytes:
+            return
+        if key in self._entries:
+            self.bytes -= len(self._entries.pop(key))
+        self._entries[key] = png
+        self.bytes += len(png)
+        while self.bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.bytes -= len(evicted)
+
+    def get(self, key):
+        with self._lock:
+            png = self._entries.get(key)
+            if png is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return png
+        try:
+            with open(self._path(key), "rb") as f:
+                png = f.read()
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, png)
+        return png
+
+    def put(self, key, png):
+        with self._lock:
+            self._remember(key, png)
+        try:
+            os.makedirs(self.plot_dir, exist_ok=True)
+            tmp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(png)
+            os.replace(tmp_path, self._path(key))
+            self._prune_files()
+        except OSError as e:
+            print(f"Error saving plot {key}: {e}")
+        return png
+
+    def _prune_files(self):
+        paths = [os.path.join(self.plot_dir, name) for name in os.listdir(self.plot_dir) if name.endswith(".png")]
+        if len(paths) <= self.max_files:
+            return
+        paths.sort(key=os.path.getmtime)
+        for path in paths[:len(paths) - self.max_files]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def get_or_render(self, key, render):
+        png = self.get(key)
+        if png is None:
+            png = self.put(key, render())
+        return png
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "diskHits": self.disk_hits,
+                "misses": self.misses
+            }
+
+plot_cache = PlotCache()
@@ -0,0 +1,121 @@
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
+from .utils import parse_date
+
+# NAV and index histories are stored one document per (code, date) row so that
+# range reads and incremental writes only touch the rows they need. Dates are
+# stored as native datetimes and values as floats, converted once on ingestion.
+
+DUPLICATE_KEY = 11000
+
+def parse_value(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+class Series:
+    def __init__(self, dates, values):
+        self.dates = dates
+        self.values = values
+
+    @classmethod
+    def empty(cls):
+        return cls(np.array([], dtype="datetime64[ns]"), np.array([], dtype=np.float64))
+
+    @classmethod
+    def from_rows(cls, rows, value_field):
+        dates = np.array([row["date"] for row in rows], dtype="datetime64[ns]")
+        values = np.array([row.get(value_field) for row in rows], dtype=np.float64)
+        return cls(dates, values)
+
+    def __len__(self):
+        return len(self.dates)
+
+    @property
+    def start(self):
+        return pd.Timestamp(self.dates[0]) if len(self) else None
+
+    @property
+    def end(self):
+        return pd.Timestamp(self.dates[-1]) if len(self) else None
+
+    def slice(self, from_dt, to_dt):
+        lo = np.searchsorted(self.dates, np.datetime64(from_dt, "ns"), side="left")
+        hi = np.searchsorted(self.dates, np.datetime64(to_dt, "ns"), side="right")
+        return Series(self.dates[lo:hi], self.values[lo:hi])
+
+    def merge(self, other):
+        # Parsed values in other replace what is held for the same date, so
+        # a NAV first stored as "N.A." picks up its later value
+        if not len(other):
+            return self
+        parsed = ~np.isnan(other.values)
+        dates = np.concatenate([other.dates[parsed], self.dates, other.dates[~parsed]])
+        values = np.concatenate([other.values[parsed], self.values, other.values[~parsed]])
+        dates, index = np.unique(dates, return_index=True)
+        return Series(dates, values[index])
+
+    def to_frame(self, date_col, value_col):
+        return pd.DataFrame({date_col: self.dates, value_col: self.values})
+
+def parse_rows(rows, value_field):
+    parsed = {}
+    for entry in rows:
+        dt = entry["date"] if isinstance(entry["date"], datetime) else parse_date(entry["date"])
+        parsed[dt] = parse_value(entry[value_field])
+    return [{"date": dt, value_field: value} for dt, value in sorted(parsed.items())]
+
+def upsert_docs(collection, docs, value_field):
+    # Every row is an upsert against the unique (code, date) index, so the
+    # write only carries the delta and concurrent writers for the same code
+    # cannot drop each other's rows. Parsed values overwrite the stored one
+    # (e.g. a NAV first published as "N.A."); missing values only fill gaps.
+    ops = [
+        UpdateOne(
+            {"code": doc["code"], "date": doc["date"]},
+            {"$setOnInsert" if doc[value_field] is None else "$set": {value_field: doc[value_field]}},
+            upsert=True
+        )
+        for doc in docs
+    ]
+    if not ops:
+        return 0
+    try:
+        return collection.bulk_write(ops, ordered=False).upserted_count
+    except BulkWriteError as e:
+        # A concurrent writer inserted the same (code, date) first
+        if any(err.get("code") != DUPLICATE_KEY for err in e.details.get("writeErrors", [])):
+            raise
+        return e.details.get("nUpserted", 0)
+
+def insert_rows(collection, code, rows, value_field):
+    parsed = parse_rows(rows, value_field)
+    if not parsed:
+        return Series.empty()
+    upsert_docs(collection, [{"code": code, **row} for row in parsed], value_field)
+    return Series.from_rows(parsed, value_field)
+
+def find_rows(collection, code, from_dt, to_dt, value_field):
+    cursor = collection.find(
+        {"code": code, "date": {"$gte": from_dt, "$lte": to_dt}},
+        {"_id": 0, "date": 1, value_field: 1}
+    ).sort("date", 1)
+    return list(cursor)
+
+def load_series(collection, code, from_dt, to_dt, value_field):
+    return Series.from_rows(find_rows(collection, code, from_dt, to_dt, value_field), value_field)
+
+def load_series_many(collection, codes, from_dt, to_dt, value_field):
+    # One query for several codes, split into a Series per code
+    rows_by_code = {code: [] for code in codes}
+    cursor = collection.find(
+        {"code": {"$in": list(codes)}, "date": {"$gte": from_dt, "$lte": to_dt}},
+        {"_id": 0, "code": 1, "date": 1, value_field: 1}
+    ).sort([("code", 1), ("date", 1)])
+    for row in cursor:
+        rows_by_code[row["code"]].append(row)
+    return {code: Series.from_rows(rows, value_field) for code, rows in rows_by_code.items()}
@@ -13,4 +13,20 @@ def validate_dates(from_date, to_date):
             return "ToDate cannot be after current date"
         return None
     except ValueError:
-        return "Invalid date format. Use DD-MMM-YYYY"
\ No newline at end of file
+        return "Invalid date format. Use DD-MMM-YYYY"
+
+DATE_FORMAT = "%d-%b-%Y"
+
+def parse_date(date_str):
+    return datetime.strptime(date_str, DATE_FORMAT)
+
+def format_date(dt):
+    return dt.strftime(DATE_FORMAT)
+
+def to_records(df, date_col):
+    # Dates are kept as datetime64 inside the service layer and only turned
+    # back into DD-MMM-YYYY strings (and NaN into null) for JSON output
+    df = df.copy()
+    df[date_col] = df[date_col].dt.strftime(DATE_FORMAT)
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict(orient="records")
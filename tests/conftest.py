@@ -0,0 +1,6 @@
+import os
+
+# Service modules import db, which connects on import; tests run against an
+# in-memory mongomock database and never reach the network. Install the test
+# dependencies with: pip install -r requirements-dev.txt
+os.environ.setdefault("MF_MONGO_MOCK", "1")
@@ -0,0 +1,99 @@
+from datetime import timedelta
+import numpy as np
+import pandas as pd
+import pytest
+from services.analytics import ReturnSeries, align_series, TRADING_DAYS, DAYS_PER_YEAR
+
+# The prefix-sum metrics of ReturnSeries must agree with computing each
+# window directly from its aligned values.
+
+def random_walk(rng, dates, drift, vol):
+    return 100 * np.exp(np.cumsum(rng.normal(drift, vol, len(dates))))
+
+@pytest.fixture(scope="module")
+def aligned():
+    rng = np.random.default_rng(42)
+    dates = pd.bdate_range("2022-01-03", periods=600)
+    fund = random_walk(rng, dates, 0.0004, 0.012)
+    benchmark = random_walk(rng, dates, 0.0003, 0.01)
+    # Dates without a NAV: unpublished ("N.A.", stored as NaN) and missing
+    # rows, on both sides
+    fund[rng.choice(len(dates), 40, replace=False)] = np.nan
+    fund_dates = np.delete(dates.to_numpy(), rng.choice(len(dates), 30, replace=False))
+    benchmark_keep = np.ones(len(dates), dtype=bool)
+    benchmark_keep[rng.choice(len(dates), 30, replace=False)] = False
+    frames = {
+        "fund": pd.DataFrame({"date": dates, "value": fund}).set_index("date").loc[fund_dates].reset_index(),
+        "benchmark": pd.DataFrame({"date": dates[benchmark_keep], "value": benchmark[benchmark_keep]})
+    }
+    dates, _, matrix = align_series(frames)
+    return dates, matrix
+
+def direct(dates, fund, benchmark):
+    fund_returns = np.diff(np.log(fund))
+    benchmark_returns = np.diff(np.log(benchmark))
+    cov = np.cov(fund_returns, benchmark_returns, ddof=1)
+    beta = cov[0, 1] / cov[1, 1]
+    years = (dates[-1] - dates[0]) / np.timedelta64(1, "D") / DAYS_PER_YEAR
+    return {
+        "observations": len(fund),
+        "return_percent": (fund[-1] / fund[0] - 1) * 100,
+        "benchmark_return_percent": (benchmark[-1] / benchmark[0] - 1) * 100,
+        "cagr_percent": ((fund[-1] / fund[0]) ** (1 / years) - 1) * 100,
+        "volatility_percent": np.std(fund_returns, ddof=1) * np.sqrt(TRADING_DAYS) * 100,
+        "benchmark_volatility_percent": np.std(benchmark_returns, ddof=1) * np.sqrt(TRADING_DAYS) * 100,
+        "beta": beta,
+        "alpha_percent": (fund_returns.mean() - beta * benchmark_returns.mean()) * TRADING_DAYS * 100,
+        "tracking_error_percent": np.std(fund_returns - benchmark_returns, ddof=1) * np.sqrt(TRADING_DAYS) * 100,
+        "correlation": np.corrcoef(fund_returns, benchmark_returns)[0, 1],
+        "max_drawdown_percent": (fund / np.maximum.accumulate(fund) - 1).min() * 100
+    }
+
+def test_aligned_dates_have_both_values(aligned):
+    dates, matrix = aligned
+    assert not np.isnan(matrix).any()
+    assert len(dates) < 600 - 40
+
+def test_windows_match_direct_computation(aligned):
+    dates, matrix = aligned
+    series = ReturnSeries(dates, matrix[:, 0], matrix[:, 1])
+    rng = np.random.default_rng(7)
+    first, last = pd.Timestamp(dates[0]), pd.Timestamp(dates[-1])
+
+    windows = [(first, last), (first - timedelta(days=30), last + timedelta(days=30))]
+    for _ in range(200):
+        # Bounds on observed dates (edges) and on days without one
+        i, j = sorted(rng.integers(0, len(dates), 2))
+        from_dt = pd.Timestamp(dates[i]) - timedelta(days=int(rng.integers(0, 3)))
+        to_dt = pd.Timestamp(dates[j]) + timedelta(days=int(rng.integers(0, 3)))
+        windows.append((from_dt, to_dt))
+
+    checked = 0
+    for from_dt, to_dt in windows:
+        inside = (dates >= np.datetime64(from_dt, "ns")) & (dates <= np.datetime64(to_dt, "ns"))
+        bounds = series.index_range(from_dt, to_dt)
+        if inside.sum() < 2:
+            assert bounds is None
+            continue
+        i, j = bounds
+        assert (i, j) == (np.flatnonzero(inside)[0], np.flatnonzero(inside)[-1])
+        if inside.sum() < 3:
+            continue
+        metrics = series.window(i, j)
+        expected = direct(dates[inside], matrix[inside, 0], matrix[inside, 1])
+        for name, value in expected.items():
+            assert metrics[name] == pytest.approx(value, rel=1e-6, abs=1e-9), name
+        checked += 1
+    assert checked > 100
+
+def test_rolling_matches_direct_computation(aligned):
+    dates, matrix = aligned
+    series = ReturnSeries(dates, matrix[:, 0], matrix[:, 1])
+    window = 20
+    rolling = series.rolling(window)
+    for k in (0, 1, len(rolling["dates"]) // 2, len(rolling["dates"]) - 1):
+        j = k + window
+        expected = direct(dates[j - window:j + 1], matrix[j - window:j + 1, 0], matrix[j - window:j + 1, 1])
+        assert rolling["dates"][k] == dates[j]
+        for name in ("return_percent", "benchmark_return_percent", "volatility_percent", "beta", "correlation"):
+            assert rolling[name][k] == pytest.approx(expected[name], rel=1e-6, abs=1e-9), name
@@ -0,0 +1,57 @@
+import pytest
+from db import aum_collection, aum_tables_collection
+from services import aum_service
+
+# A quarter whose table comes back empty (not yet published) must not be
+# stored as final: the next lookup fetches it again.
+
+QUARTER = "January - March 2025"
+ROWS = [{"scheme": "SBI Small Cap Fund", "scheme_key": "sbi small cap fund", "aum_lakhs": 3300000.0}]
+
+@pytest.fixture
+def scraper(monkeypatch):
+    responses = []
+    calls = []
+    def scrape(mf_id, year_id, year_quarter):
+        calls.append(year_quarter)
+        return responses.pop(0)
+    monkeypatch.setattr(aum_service, "scrape_aum_table", scrape)
+    monkeypatch.setattr(aum_service, "get_quarter_ids", lambda: {QUARTER: "1"})
+    aum_collection.delete_many({})
+    aum_tables_collection.delete_many({})
+    aum_service._tables.clear()
+    yield responses, calls
+    aum_service._tables.clear()
+
+def test_empty_table_is_fetched_again(scraper):
+    responses, calls = scraper
+    responses.extend([(None, f"No AUM data available for: {QUARTER}"), (ROWS, None)])
+
+    rows, error = aum_service.load_aum_table(3, QUARTER)
+    assert rows is None and "No AUM data" in error
+    assert aum_tables_collection.count_documents({}) == 0
+
+    rows, error = aum_service.load_aum_table(3, QUARTER)
+    assert error is None and rows == ROWS
+    assert aum_tables_collection.find_one({"mf_id": 3, "quarter": QUARTER})["schemes"] == 1
+    assert len(calls) == 2
+
+def test_stored_table_is_not_fetched_again(scraper):
+    responses, calls = scraper
+    aum_service.store_aum_table(3, QUARTER, ROWS)
+    rows, error = aum_service.load_aum_table(3, QUARTER)
+    assert error is None and [row["scheme_key"] for row in rows] == ["sbi small cap fund"]
+    assert calls == []
+
+def test_empty_marker_is_not_final(scraper):
+    responses, calls = scraper
+    # Left behind by an empty fetch before empty tables were rejected
+    aum_tables_collection.insert_one({"mf_id": 3, "quarter": QUARTER, "schemes": 0})
+    responses.append((ROWS, None))
+    rows, error = aum_service.load_aum_table(3, QUARTER)
+    assert error is None and rows == ROWS
+    assert calls == [QUARTER]
+
+def test_store_skips_empty_rows(scraper):
+    aum_service.store_aum_table(3, QUARTER, [])
+    assert aum_tables_collection.count_documents({}) == 0
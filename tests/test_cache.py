@@ -0,0 +1,36 @@
+from datetime import datetime
+import numpy as np
+from services.cache import SeriesCache
+from services.storage import Series
+
+def series(*days):
+    dates = np.array([datetime(2024, 1, day) for day in days], dtype="datetime64[ns]")
+    return Series(dates, np.arange(len(days), dtype=np.float64) + 10)
+
+FROM, TO = datetime(2024, 1, 1), datetime(2024, 1, 31)
+
+def test_put_and_extend():
+    cache = SeriesCache()
+    from_dt, to_dt, generation = cache.window("A", FROM, TO)
+    cache.put("A", series(2, 3), from_dt, to_dt, generation)
+    cache.extend("A", series(4))
+    assert len(cache.get("A", FROM, TO)) == 3
+
+def test_load_racing_an_extend_is_not_cached():
+    # A load that read Mongo before extend() stored new rows must not
+    # replace the entry, or the new rows vanish until the TTL expires
+    cache = SeriesCache()
+    from_dt, to_dt, generation = cache.window("A", FROM, TO)
+    cache.put("A", series(2, 3), from_dt, to_dt, generation)
+    from_dt, to_dt, generation = cache.window("A", datetime(2023, 12, 1), TO)
+    cache.extend("A", series(4))
+    cache.put("A", series(2, 3), from_dt, to_dt, generation)
+    assert len(cache.get("A", FROM, TO)) == 3
+    assert cache.stats()["staleLoads"] == 1
+
+def test_first_load_racing_an_extend_is_not_cached():
+    cache = SeriesCache()
+    from_dt, to_dt, generation = cache.window("A", FROM, TO)
+    cache.extend("A", series(4))
+    cache.put("A", series(2, 3), from_dt, to_dt, generation)
+    assert cache.get("A", FROM, TO) is None
@@ -0,0 +1,47 @@
+import json
+import numpy as np
+import pandas as pd
+import pytest
+from services import compare_service
+from services.benchmark_service import benchmarks, DEFAULT_BENCHMARK
+from services.plots import plot_cache
+from main import app
+
+# A fund whose NAV does not move over the period has no correlation with the
+# benchmark; the API reports it as null and the response stays valid JSON.
+
+DATES = pd.bdate_range("2025-01-01", periods=60)
+FUND = "Constant Fund"
+
+@pytest.fixture
+def constant_fund(monkeypatch, tmp_path):
+    nav = pd.DataFrame({"date": DATES, "nav": np.full(len(DATES), 10.0)})
+    close = pd.DataFrame({"Date": DATES, "Close": 20000 + np.cumsum(np.random.default_rng(0).normal(0, 50, len(DATES)))})
+    monkeypatch.setattr(compare_service, "get_nav_data", lambda name, from_date, to_date: (nav.copy(), None))
+    monkeypatch.setattr(compare_service, "get_nav_data_many", lambda names, from_date, to_date: {name: (nav.copy(), None) for name in names})
+    monkeypatch.setattr(compare_service, "get_benchmarks_data", lambda names, from_date, to_date: ({name: close.copy() for name in names}, None))
+    monkeypatch.setattr(plot_cache, "plot_dir", str(tmp_path))
+    return app.test_client()
+
+def test_compare_mf_nifty(constant_fund):
+    response = constant_fund.post("/api/compare_mf_nifty", json={"MFName": FUND, "FromDate": "01-Jan-2025", "ToDate": "31-Mar-2025"})
+    assert response.status_code == 200
+    body = json.loads(response.get_data(as_text=True))
+    assert body["correlation"] is None
+    assert body["total_points"] == len(DATES)
+
+def test_compare_matrix(constant_fund):
+    response = constant_fund.post("/api/compare_matrix", json={"MFNames": [FUND], "FromDate": "01-Jan-2025", "ToDate": "31-Mar-2025"})
+    assert response.status_code == 200
+    body = json.loads(response.get_data(as_text=True))
+    matrix = body["correlation"]["matrix"]
+    fund = body["correlation"]["labels"].index(FUND)
+    assert matrix[fund] == [None, None]
+    assert body["stats"][FUND]["volatility_percent"] == 0
+
+# The dashboard's benchmark list comes from providers.json through the API
+def test_benchmarks_endpoint():
+    body = app.test_client().get("/api/benchmarks").get_json()
+    assert body["default"] == DEFAULT_BENCHMARK
+    assert body["benchmarks"] == {code: benchmark["name"] for code, benchmark in benchmarks().items()}
+    assert body["benchmarks"][DEFAULT_BENCHMARK] == "Nifty 50"
@@ -0,0 +1,61 @@
+from datetime import datetime, timedelta
+from db import coverage_collection
+from services.coverage import merge_intervals, missing_intervals, split_interval, plan_fetches, fetch_missing
+from services.benchmark_service import weekdays_before_today
+
+def day(n):
+    return datetime(2024, 1, 1) + timedelta(days=n)
+
+def test_merge_intervals_joins_overlapping_and_adjacent():
+    assert merge_intervals([(day(5), day(9)), (day(0), day(3)), (day(4), day(4)), (day(12), day(14)), (day(13), day(20))]) == [
+        (day(0), day(9)), (day(12), day(20))
+    ]
+    assert merge_intervals([]) == []
+
+def test_missing_intervals():
+    covered = [(day(3), day(5)), (day(10), day(12))]
+    assert missing_intervals(covered, day(0), day(15)) == [(day(0), day(2)), (day(6), day(9)), (day(13), day(15))]
+    assert missing_intervals(covered, day(3), day(5)) == []
+    assert missing_intervals(covered, day(4), day(11)) == [(day(6), day(9))]
+    assert missing_intervals([], day(0), day(1)) == [(day(0), day(1))]
+
+def test_split_interval_respects_max_days():
+    chunks = split_interval(day(0), day(9), 4)
+    assert chunks == [(day(0), day(3)), (day(4), day(7)), (day(8), day(9))]
+    assert split_interval(day(0), day(0), 4) == [(day(0), day(0))]
+
+def test_plan_fetches_splits_only_the_gaps():
+    code = "plan@1"
+    coverage_collection.insert_one({"code": code, "intervals": [{"start": day(10), "end": day(19)}]})
+    assert plan_fetches(code, day(0), day(29), 5) == [
+        (day(0), day(4)), (day(5), day(9)), (day(20), day(24)), (day(25), day(29))
+    ]
+
+def test_zero_row_chunks_are_only_provisionally_covered():
+    # An error page served with HTTP 200 parses to no rows; that range must
+    # be fetched again once the provisional coverage expires
+    code = "empty@1"
+    stats = fetch_missing(code, day(0), day(9), lambda start, end: [], 30, 1)
+    assert stats == {"chunks": 1, "failed": 0, "rows": 0}
+    (interval,) = coverage_collection.find_one({"code": code})["intervals"]
+    assert interval.get("expires")
+
+def test_failed_chunks_are_not_covered():
+    code = "failed@1"
+    stats = fetch_missing(code, day(0), day(9), lambda start, end: None, 30, 1)
+    assert stats["failed"] == 1
+    assert coverage_collection.find_one({"code": code}) is None
+    assert plan_fetches(code, day(0), day(9), 30) == [(day(0), day(9))]
+
+def test_fetched_rows_are_covered_permanently():
+    code = "rows@1"
+    fetch_missing(code, day(0), day(9), lambda start, end: [1, 2, 3], 30, 1)
+    (interval,) = coverage_collection.find_one({"code": code})["intervals"]
+    assert "expires" not in interval
+    assert plan_fetches(code, day(0), day(9), 30) == []
+
+def test_weekdays_before_today():
+    assert weekdays_before_today("06-Jan-2024", "07-Jan-2024") == 0
+    assert weekdays_before_today("05-Jan-2024", "08-Jan-2024") == 2
+    today = datetime.now().strftime("%d-%b-%Y")
+    assert weekdays_before_today(today, today) == 0
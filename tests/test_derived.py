@@ -0,0 +1,27 @@
+from datetime import datetime
+import numpy as np
+from services.derived import DerivedStore
+from services.storage import Series
+
+def series(*days):
+    dates = np.array([datetime(2024, 1, day) for day in days], dtype="datetime64[ns]")
+    return Series(dates, np.arange(len(days), dtype=np.float64) + 10)
+
+def test_extend_appends_to_cached_series():
+    store = DerivedStore()
+    store.get("A", lambda: series(2, 3))
+    store.extend("A", series(4))
+    assert len(store.get("A", lambda: series(2, 3))) == 3
+
+def test_build_racing_an_extend_is_not_cached():
+    # extend() runs while the loader is reading Mongo: the build is returned
+    # but the next get() must rebuild instead of serving it
+    store = DerivedStore()
+
+    def racing_loader():
+        store.extend("A", series(4))
+        return series(2, 3)
+
+    assert len(store.get("A", racing_loader)) == 2
+    assert len(store.get("A", lambda: series(2, 3, 4))) == 3
+    assert store.stats()["staleLoads"] == 1
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from services import downsample
+from services.downsample import downsample_rows, lttb_indices, min_points, MAX_SEARCH_STEPS
+
+# downsample_rows must never return more rows than asked for, whatever the
+# number of columns and however much their picks overlap.
+
+def columns(rng, n, count, similar):
+    base = np.cumsum(rng.normal(0, 1, n))
+    if similar:
+        return [base * (1 + 0.1 * k) + rng.normal(0, 0.05, n) for k in range(count)]
+    return [np.cumsum(rng.normal(0, 1, n)) for _ in range(count)]
+
+@pytest.mark.parametrize("similar", [False, True])
+@pytest.mark.parametrize("count", [1, 2, 3, 5])
+def test_never_exceeds_max_points(count, similar):
+    rng = np.random.default_rng(count)
+    n = 2000
+    x = np.arange(n) * 86400
+    cols = columns(rng, n, count, similar)
+    for max_points in sorted({min_points(count), min_points(count) + 1, 10, 57, 200, 999, 1999}):
+        if max_points < min_points(count):
+            continue
+        rows = downsample_rows(x, cols, max_points)
+        assert len(rows) <= max_points
+        assert rows[0] == 0 and rows[-1] == n - 1
+        assert np.all(np.diff(rows) > 0)
+
+def test_small_budget_rejected_and_large_budget_keeps_all():
+    x = np.arange(100)
+    cols = [np.sin(x / 5), np.cos(x / 5)]
+    with pytest.raises(ValueError):
+        downsample_rows(x, cols, min_points(2) - 1)
+    assert len(downsample_rows(x, cols, 100)) == 100
+    assert len(downsample_rows(x, cols, None)) == 100
+
+def test_search_is_bounded(monkeypatch):
+    calls = []
+    def counted(x, y, max_points):
+        calls.append(max_points)
+        return lttb_indices(x, y, max_points)
+    monkeypatch.setattr(downsample, "lttb_indices", counted)
+    rng = np.random.default_rng(0)
+    cols = columns(rng, 50000, 3, similar=True)
+    rows = downsample_rows(np.arange(50000), cols, 5000)
+    assert len(rows) <= 5000
+    assert len(calls) <= 3 * (1 + MAX_SEARCH_STEPS)
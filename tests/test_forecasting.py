@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from services.forecasting import FEATURE_COLS, create_features, recursive_residual_forecast
+
+# recursive_residual_forecast must match the DataFrame loop it replaced:
+# append the previous forecast, rebuild the features with create_features and
+# predict the residual from the last row.
+
+def reference_forecast(xgb_model, nav, arima_future):
+    horizon = len(arima_future)
+    future_dates = pd.date_range(start=nav.index.max() + pd.Timedelta(days=1), periods=horizon, freq="D")
+    last_data = nav.tail(10).to_frame("nav")
+    future_features = []
+    for i in range(horizon):
+        if i == 0:
+            prev_nav = nav.iloc[-1]
+        else:
+            prev_nav = arima_future[i - 1] + xgb_model.predict(future_features[-1].reshape(1, -1))[0]
+        last_data = pd.concat([last_data, pd.DataFrame({"nav": [prev_nav]}, index=[future_dates[i]])])
+        features = create_features(last_data).dropna()
+        future_features.append(features[FEATURE_COLS].iloc[-1].values)
+    return arima_future + xgb_model.predict(np.array(future_features))
+
+def fitted_model(nav):
+    features = create_features(nav.to_frame("nav")).dropna()
+    residuals = np.random.default_rng(1).normal(0, 0.5, len(features))
+    model = xgb.XGBRegressor(n_estimators=50, learning_rate=0.1, max_depth=3)
+    model.fit(features[FEATURE_COLS], residuals)
+    return model
+
+def test_matches_dataframe_loop():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range("2023-01-01", periods=400, freq="D")
+    nav = pd.Series(100 * np.exp(np.cumsum(rng.normal(0.0004, 0.01, len(dates)))), index=dates)
+    model = fitted_model(nav)
+    arima_future = nav.iloc[-1] + np.cumsum(rng.normal(0.05, 0.2, 30))
+
+    expected = reference_forecast(model, nav, arima_future)
+    actual = recursive_residual_forecast(model.get_booster(), nav.to_numpy(dtype=np.float64), arima_future)
+    np.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+def test_single_step():
+    nav = pd.Series(np.linspace(10, 12, 50), index=pd.date_range("2024-01-01", periods=50, freq="D"))
+    model = fitted_model(nav)
+    arima_future = np.array([12.05])
+    np.testing.assert_allclose(
+        recursive_residual_forecast(model.get_booster(), nav.to_numpy(dtype=np.float64), arima_future),
+        reference_forecast(model, nav, arima_future),
+        rtol=1e-6
+    )
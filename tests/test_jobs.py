@@ -0,0 +1,48 @@
+from services import nav_service
+from services.jobs import JobManager
+
+# Jobs keep only the forecast payload, and repeated model cache hits for one
+# key share a single job record.
+
+def test_complete_reuses_job_for_key():
+    jobs = JobManager(max_workers=1)
+    first = jobs.complete("fund-a", "Fund A", {"predictions": [1]})
+    second = jobs.complete("fund-a", "Fund A", {"predictions": [1]})
+    other = jobs.complete("fund-b", "Fund B", {"predictions": [2]})
+    assert second is first and other is not first
+    assert jobs.stats()["jobs"] == {"done": 2}
+    assert jobs.get(first["job_id"])["result"] == {"predictions": [1]}
+
+def test_cache_hit_job_holds_only_forecast(monkeypatch):
+    entry = {"predictions": [{"date": "2025-04-02", "nav": 10.0}], "metrics": {"rmse_percent": 1.0},
+             "arima_fit": object(), "xgb_model": object(), "fund": "Fund A"}
+    monkeypatch.setattr(nav_service.model_cache, "get", lambda key: entry)
+    monkeypatch.setattr(nav_service, "prediction_jobs", JobManager(max_workers=1))
+    job, error = nav_service.start_prediction({"key": "fund-a", "fund": "Fund A", "df": None, "config": None})
+    assert error is None
+    assert job["result"] == {"predictions": entry["predictions"], "metrics": entry["metrics"]}
+    view = nav_service.prediction_job_view(job)
+    assert view["predictions"] == entry["predictions"] and view["metrics"] == entry["metrics"]
+
+def test_submit_runs_in_forkserver_pool():
+    jobs = JobManager(max_workers=1)
+    job, error = jobs.submit("pow", "pow", pow, (2, 10), lambda result: {"value": result})
+    assert error is None
+    job = jobs.wait(job, 60)
+    assert job["status"] == "done" and job["result"] == {"value": 1024}
+    assert jobs._pool()._mp_context.get_start_method() == "forkserver"
+    jobs._pool().shutdown()
+
+def test_split_runs_tasks_and_merges():
+    jobs = JobManager(max_workers=2)
+    split = lambda base: [(pow, (base, 2)), (abs, (-base,)), (divmod, (base, 0 if base == 3 else 3))]
+    merge = lambda base, parts: {"base": base, "parts": parts}
+    job, _ = jobs.submit("split", "split", pow, (2, 3), merge, split)
+    job = jobs.wait(job, 60)
+    assert job["status"] == "done" and job["result"] == {"base": 8, "parts": [64, 8, (2, 2)]}
+
+    # A failing task fails the whole job
+    job, _ = jobs.submit("split-error", "split", pow, (3, 1), merge, split)
+    job = jobs.wait(job, 60)
+    assert job["status"] == "failed" and "division" in job["error"]
+    jobs._pool().shutdown()
@@ -0,0 +1,66 @@
+import os
+from datetime import datetime
+import pytest
+from db import mf_collection, nav_collection, coverage_collection
+from services.nav_bulk import iter_nav_file, ingest_nav_file, ingest_nav_lines
+
+# Offline ingestion of AMFI's all-schemes NAV file against the fixture written
+# by benchmarks/make_fixtures.py: 500 schemes for 01-Apr-2025, the four seeded
+# ones first, with "N.A." for scheme 200013.
+
+FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures", "NAVAll_sample.txt")
+DATE = datetime(2025, 4, 1)
+REGISTERED = [200010 + i for i in range(10)]  # includes 200013
+
+@pytest.fixture
+def registered():
+    schemes = [{"company": "AMC 1 Mutual Fund", "fund": f"Synthetic Scheme {sc_id - 200000}", "mfID": 101, "scID": sc_id} for sc_id in REGISTERED]
+    mf_collection.insert_many(schemes)
+    nav_collection.delete_many({})
+    coverage_collection.delete_many({})
+    yield
+    mf_collection.delete_many({"scID": {"$in": REGISTERED}})
+
+def test_iter_nav_file():
+    with open(FIXTURE) as f:
+        rows = list(iter_nav_file(f))
+    assert len(rows) == 500
+    assert rows[0] == (125497, DATE, 761.5354)
+    assert {sc_id: nav for sc_id, _, nav in rows}[200013] is None
+    assert all(date == DATE for _, date, _ in rows)
+
+def test_iter_nav_file_skips_headings_and_bad_dates():
+    lines = [
+        "Scheme Code;ISIN Div Payout/ ISIN Growth;ISIN Div Reinvestment;Scheme Name;Net Asset Value;Date",
+        "Open Ended Schemes(Equity Scheme - Flexi Cap Fund)",
+        "",
+        "SBI Mutual Fund",
+        "125497;INF200K01T28;-;SBI Small Cap Fund;178.3512;17-Oct-2025",
+        "125498;INF200K01T29;-;Broken Date Fund;10.0;not-a-date",
+        "125499;INF200K01T30;-;Short Line"
+    ]
+    assert list(iter_nav_file(lines)) == [(125497, datetime(2025, 10, 17), 178.3512)]
+
+def test_ingest_fixture(registered):
+    stats = ingest_nav_file(FIXTURE, batch_size=3)
+    assert stats["rows"] == 500
+    assert stats["matched"] == 4 + len(REGISTERED)
+    assert stats["inserted"] == 4 + len(REGISTERED)
+    assert stats["schemes"] == 4 + len(REGISTERED)
+    assert nav_collection.count_documents({}) == 4 + len(REGISTERED)
+
+    assert nav_collection.find_one({"code": "22@125497", "date": DATE})["nav"] == 761.5354
+    assert nav_collection.find_one({"code": "101@200013", "date": DATE})["nav"] is None
+    assert coverage_collection.find_one({"code": "101@200013"})["intervals"][0]["start"] == DATE
+
+def test_later_file_fills_na_rows(registered):
+    ingest_nav_file(FIXTURE)
+    # A republished file with the NAV now available must replace the null,
+    # and a stale "N.A." must never erase a stored NAV
+    stats = ingest_nav_lines([
+        "200013;INF000200013;-;Synthetic Scheme 13 - Direct Plan - Growth;12.3456;01-Apr-2025",
+        "200010;INF000200010;-;Synthetic Scheme 10 - Direct Plan - Growth;N.A.;01-Apr-2025"
+    ])
+    assert stats["inserted"] == 0
+    assert nav_collection.find_one({"code": "101@200013", "date": DATE})["nav"] == 12.3456
+    assert nav_collection.find_one({"code": "101@200010", "date": DATE})["nav"] is not None
@@ -0,0 +1,37 @@
+import glob
+import os
+import pytest
+from services.parsers import parse_nav_history, parse_nav_history_lxml, parse_nav_history_soup
+
+# The lxml parser replaced BeautifulSoup on the hot path and must return
+# exactly the same rows for every saved response: the synthetic fixtures,
+# the edge-case page and anything captured from AMFI with
+# benchmarks/make_fixtures.py --capture (fixtures/captured/).
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+FIXTURES = sorted(glob.glob(os.path.join(FIXTURES_DIR, "**", "nav_history_*.html"), recursive=True))
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda path: os.path.relpath(path, FIXTURES_DIR))
+def test_parsers_agree(path):
+    html = read(path)
+    rows = parse_nav_history_soup(html)
+    assert rows
+    assert parse_nav_history_lxml(html) == rows
+    assert parse_nav_history(html) == rows
+
+def test_edge_cases():
+    rows = parse_nav_history_lxml(read(os.path.join(FIXTURES_DIR, "nav_history_edge_cases.html")))
+    assert rows == [
+        {"date": "02-Jan-2025", "nav": "201.7346"},
+        {"date": "03-Jan-2025", "nav": "203.1177"},
+        {"date": "06-Jan-2025", "nav": "N.A."},
+        {"date": "07-Jan-2025", "nav": "199.0051"},
+        {"date": "08-Jan-2025", "nav": "198.4410"}
+    ]
+
+def test_empty_response():
+    assert parse_nav_history_lxml("") == parse_nav_history_soup("") == []